@@ -0,0 +1,49 @@
+"""add composite indexes for list filters and ordering"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20241015_01"
+down_revision: str | None = "20241001_01"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+# (name, table, columns) - each one matches a WHERE + ORDER BY combination used by
+# list_allocations, list_movements and list_audit_logs.
+INDEXES: list[tuple[str, str, list[str]]] = [
+    ("ix_allocations_client_id_buy_date", "allocations", ["client_id", "buy_date", "id"]),
+    ("ix_allocations_asset_id_buy_date", "allocations", ["asset_id", "buy_date", "id"]),
+    ("ix_allocations_buy_date", "allocations", ["buy_date", "id"]),
+    ("ix_movements_client_id_date", "movements", ["client_id", "date", "id"]),
+    ("ix_movements_type_date", "movements", ["type", "date", "id"]),
+    ("ix_movements_date", "movements", ["date", "id"]),
+    ("ix_audit_logs_action_created_at", "audit_logs", ["action", "created_at", "id"]),
+    ("ix_audit_logs_user_id_created_at", "audit_logs", ["user_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so the
+    # statements are issued in autocommit mode and can be applied to a live database.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
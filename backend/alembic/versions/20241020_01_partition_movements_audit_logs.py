@@ -0,0 +1,118 @@
+"""partition movements and audit_logs by month (PostgreSQL only)
+
+The tables are rebuilt as RANGE partitioned parents and the existing rows are
+copied over, so this migration takes an ACCESS EXCLUSIVE lock on both tables for
+the duration of the copy and should run in a maintenance window. Afterwards run
+``python -m app.db.partitions`` periodically (e.g. daily cron) to pre-create
+upcoming partitions and detach expired ones.
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import context, op
+
+from app.db.partitions import (
+    add_months,
+    create_default_partition_sql,
+    create_partition_sql,
+    month_start,
+)
+
+revision: str = "20241020_01"
+down_revision: str | None = "20241015_01"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+MONTHS_AHEAD = 3
+
+TABLES: dict[str, dict[str, object]] = {
+    "movements": {
+        "key": "date",
+        "min_expr": "min(date)",
+        "foreign_key_name": "movements_client_id_fkey",
+        "foreign_key": "FOREIGN KEY (client_id) REFERENCES clients (id) ON DELETE CASCADE",
+        "indexes": [
+            ("ix_movements_id", ["id"]),
+            ("ix_movements_client_id_date", ["client_id", "date", "id"]),
+            ("ix_movements_type_date", ["type", "date", "id"]),
+            ("ix_movements_date", ["date", "id"]),
+        ],
+    },
+    "audit_logs": {
+        "key": "created_at",
+        "min_expr": "min(created_at AT TIME ZONE 'UTC')::date",
+        "foreign_key_name": "audit_logs_user_id_fkey",
+        "foreign_key": "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL",
+        "indexes": [
+            ("ix_audit_logs_entity", ["entity"]),
+            ("ix_audit_logs_created_at", ["created_at"]),
+            ("ix_audit_logs_action_created_at", ["action", "created_at", "id"]),
+            ("ix_audit_logs_user_id_created_at", ["user_id", "created_at", "id"]),
+        ],
+    },
+}
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _partition_months(table: str, min_expr: str) -> list:
+    current = month_start(datetime.now(UTC).date())
+    first = current
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text(f"SELECT {min_expr} FROM {table}_legacy")).scalar()
+        if oldest is not None:
+            first = min(first, month_start(oldest))
+    last = add_months(current, MONTHS_AHEAD)
+    months = []
+    month = first
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _restore_keys(table: str, spec: dict[str, object], primary_key: str) -> None:
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {spec['foreign_key_name']} {spec['foreign_key']}")
+    for name, columns in spec["indexes"]:  # type: ignore[union-attr]
+        op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    if not _is_postgres():
+        return
+    for table, spec in TABLES.items():
+        key = spec["key"]
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({key})"
+        )
+        op.execute(create_default_partition_sql(table))
+        for month in _partition_months(table, str(spec["min_expr"])):
+            op.execute(create_partition_sql(table, month))
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_legacy")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"DROP TABLE {table}_legacy")
+        # Unique constraints on a partitioned table must include the partition key.
+        _restore_keys(table, spec, f"id, {key}")
+
+
+def downgrade() -> None:
+    if not _is_postgres():
+        return
+    # Partitions detached by app.db.partitions are standalone tables and are not
+    # folded back in.
+    for table, spec in TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+        _restore_keys(table, spec, "id")
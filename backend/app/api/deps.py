@@ -1,14 +1,26 @@
-from fastapi import Depends, HTTPException, status
+from collections.abc import AsyncGenerator
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core.security import verify_password
-from app.db.session import get_db
+from app.core.security import check_password, hash_password, password_needs_rehash
+from app.db.session import STATEMENT_TIMEOUT_KEY, USER_ID_KEY, get_db, read_session
 from app.models.user import User
 from app.schemas.auth import TokenPayload
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    IdempotencyStore,
+    IdempotentRequest,
+    begin_idempotent_request,
+    get_idempotency_store,
+    request_fingerprint,
+)
+from app.services.principals import cache_principal, get_cached_principal
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -23,12 +35,18 @@ async def authenticate_user(session: AsyncSession, email: str, password: str) ->
     user = await get_user_by_email(session, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await check_password(password, user.hashed_password):
         return None
+    if password_needs_rehash(user.hashed_password):
+        # BCRYPT_ROUNDS changed since this hash was made; upgrade it while the
+        # plain password is at hand.
+        user.hashed_password = await hash_password(password)
+        await session.commit()
     return user
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_db),
 ) -> User:
@@ -46,10 +64,17 @@ async def get_current_user(
         token_data = TokenPayload(sub=sub)
     except JWTError as exc:
         raise credentials_exception from exc
-    result = await session.execute(select(User).where(User.id == int(token_data.sub)))
-    user = result.scalars().first()
-    if user is None or not user.is_active:
-        raise credentials_exception
+    user_id = int(token_data.sub)
+    user = await get_cached_principal(user_id, token)
+    if user is None:
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if user is None or not user.is_active:
+            raise credentials_exception
+        await cache_principal(user, token)
+    session.info[USER_ID_KEY] = user.id
+    # Lets middleware (profiling) see who the request was authenticated as.
+    request.state.user_id = user.id
     return user
 
 
@@ -57,3 +82,52 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return current_user
+
+
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    async with read_session(current_user.id) as session:
+        yield session
+
+
+async def get_export_db(
+    current_user: User = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    settings = get_settings()
+    async with read_session(
+        current_user.id,
+        statement_timeout_ms=settings.db_export_statement_timeout_ms,
+    ) as session:
+        yield session
+
+
+async def get_primary_export_db(session: AsyncSession = Depends(get_db)) -> AsyncSession:
+    # For exports whose result is cached under the current data version: the
+    # primary has every write that bumped it, a replica may not.
+    session.info[STATEMENT_TIMEOUT_KEY] = get_settings().db_export_statement_timeout_ms
+    return session
+
+
+async def get_idempotent_request(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    store: IdempotencyStore = Depends(get_idempotency_store),
+) -> AsyncGenerator[IdempotentRequest | None, None]:
+    # Without the header the endpoint behaves as before. With it, a replay raises
+    # IdempotentReplay (answered from the stored response) before the route runs.
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        yield None
+        return
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} printable characters",
+        )
+    fingerprint = request_fingerprint(request.method, request.url.path, await request.body())
+    idempotent = await begin_idempotent_request(store, f"idempotency:{current_user.id}:{key}", fingerprint)
+    try:
+        yield idempotent
+    finally:
+        await idempotent.release()
@@ -7,6 +7,7 @@ from app.api.routes import (
     clients,
     dashboard,
     export,
+    imports,
     movements,
     users,
     audit,
@@ -20,5 +21,6 @@ api_router.include_router(assets.router, prefix="/assets", tags=["assets"])
 api_router.include_router(allocations.router, prefix="/allocations", tags=["allocations"])
 api_router.include_router(movements.router, prefix="/movements", tags=["movements"])
 api_router.include_router(export.router, prefix="/export", tags=["export"])
+api_router.include_router(imports.router, prefix="/import", tags=["import"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
@@ -2,14 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_idempotent_request, get_read_db
 from app.db.session import get_db
 from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.models.client import Client
 from app.models.user import User
+from app.services.idempotency import IdempotentRequest
 from app.services.audit import log_audit_event
-from app.services.dashboard_metrics import invalidate_dashboard_metrics
+from app.services.bulk import create_in_bulk
+from app.services.writes import commit_write, insert_returning
 from app.utils.pagination import paginate
 from app.schemas.allocation import AllocationCreate, AllocationRead
+from app.schemas.bulk import BulkCreate, BulkResult
 from app.schemas.pagination import Paginated
 
 router = APIRouter()
@@ -21,7 +26,7 @@ async def list_allocations(
     asset_id: int | None = Query(default=None, ge=1),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[AllocationRead]:
     stmt = select(Allocation)
@@ -36,12 +41,11 @@ async def list_allocations(
 @router.post("/", response_model=AllocationRead, status_code=status.HTTP_201_CREATED)
 async def create_allocation(
     allocation_in: AllocationCreate,
+    idempotent: IdempotentRequest | None = Depends(get_idempotent_request),
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
-) -> Allocation:
-    allocation = Allocation(**allocation_in.model_dump())
-    session.add(allocation)
-    await session.flush()
+) -> AllocationRead:
+    allocation = await insert_returning(session, Allocation, allocation_in.model_dump())
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -53,10 +57,43 @@ async def create_allocation(
             "asset_id": allocation.asset_id,
         },
     )
-    await session.commit()
-    await session.refresh(allocation)
-    await invalidate_dashboard_metrics()
-    return allocation
+    await commit_write(session)
+    result = AllocationRead.model_validate(allocation)
+    if idempotent is not None:
+        await idempotent.save(status.HTTP_201_CREATED, result)
+    return result
+
+
+@router.post("/bulk", response_model=BulkResult[AllocationRead], status_code=status.HTTP_201_CREATED)
+async def create_allocations_bulk(
+    payload: BulkCreate,
+    idempotent: IdempotentRequest | None = Depends(get_idempotent_request),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> BulkResult[AllocationRead]:
+    outcome = await create_in_bulk(
+        session,
+        model=Allocation,
+        schema=AllocationCreate,
+        items=payload.items,
+        references={"client_id": Client, "asset_id": Asset},
+        atomic=payload.atomic,
+        user_id=current_user.id,
+        entity="allocation",
+    )
+    # Nothing stored (atomic rollback or every row rejected) is a client error.
+    if outcome.errors and (payload.atomic or not outcome.created):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in outcome.errors],
+        )
+    result = BulkResult[AllocationRead](
+        created=[AllocationRead.model_validate(values) for values in outcome.created],
+        errors=outcome.errors,
+    )
+    if idempotent is not None:
+        await idempotent.save(status.HTTP_201_CREATED, result)
+    return result
 
 
 @router.delete("/{allocation_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -80,6 +117,5 @@ async def delete_allocation(
         },
     )
     await session.delete(allocation)
-    await session.commit()
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return None
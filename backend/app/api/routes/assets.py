@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_read_db
 from app.db.session import get_db
 from app.models.asset import Asset
 from app.models.user import User
@@ -10,7 +10,7 @@ from app.utils.pagination import paginate
 from app.schemas.asset import AssetCreate, AssetRead
 from app.schemas.pagination import Paginated
 from app.services.audit import log_audit_event
-from app.services.dashboard_metrics import invalidate_dashboard_metrics
+from app.services.writes import commit_write, insert_returning
 from app.services.yahoo_finance import yahoo_finance_service
 
 router = APIRouter()
@@ -23,7 +23,7 @@ async def list_assets(
     search: str | None = None,
     exchange: str | None = None,
     currency: str | None = None,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[AssetRead]:
     stmt = select(Asset)
@@ -46,9 +46,7 @@ async def create_asset(
 ) -> Asset:
     payload = asset_in.model_dump()
     payload["ticker"] = payload["ticker"].upper()
-    asset = Asset(**payload)
-    session.add(asset)
-    await session.flush()
+    asset = await insert_returning(session, Asset, payload)
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -57,9 +55,7 @@ async def create_asset(
         entity_id=asset.id,
         metadata={"ticker": asset.ticker, "name": asset.name},
     )
-    await session.commit()
-    await session.refresh(asset)
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return asset
 
 
@@ -78,14 +74,16 @@ async def fetch_asset(
         payload = await yahoo_finance_service.fetch_quote(normalized)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
-    asset = Asset(
-        ticker=payload.get("symbol", normalized).upper(),
-        name=payload.get("shortName") or payload.get("longName") or normalized,
-        exchange=payload.get("fullExchangeName", "Unknown"),
-        currency=payload.get("currency", "USD"),
+    asset = await insert_returning(
+        session,
+        Asset,
+        {
+            "ticker": payload.get("symbol", normalized).upper(),
+            "name": payload.get("shortName") or payload.get("longName") or normalized,
+            "exchange": payload.get("fullExchangeName", "Unknown"),
+            "currency": payload.get("currency", "USD"),
+        },
     )
-    session.add(asset)
-    await session.flush()
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -97,7 +95,5 @@ async def fetch_asset(
             "source": "yahoo",
         },
     )
-    await session.commit()
-    await session.refresh(asset)
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return asset
@@ -1,16 +1,17 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
-from app.api.deps import get_current_active_user
-from app.db.session import get_db
+from app.api.deps import get_current_active_user, get_read_db
 from app.models.audit_log import AuditLog
 from app.models.user import User
 from app.schemas.audit import AuditLogRead
 from app.schemas.pagination import Paginated
+from app.services.audit import metadata_filter_clause, parse_metadata_filters
+from app.services.audit_archive import ArchiveQuery, archive_applies, paginate_with_archive
 from app.utils.pagination import paginate
 
 router = APIRouter()
@@ -18,6 +19,7 @@ router = APIRouter()
 
 @router.get("/", response_model=Paginated[AuditLogRead])
 async def list_audit_logs(
+    request: Request,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
     action: str | None = Query(default=None),
@@ -25,12 +27,17 @@ async def list_audit_logs(
     user_id: int | None = Query(default=None, ge=1),
     starts_at: datetime | None = Query(default=None),
     ends_at: datetime | None = Query(default=None),
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[AuditLogRead]:
+    try:
+        metadata_filters = parse_metadata_filters(request.query_params.multi_items())
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
     stmt = (
         select(AuditLog)
-        .options(selectinload(AuditLog.user))
+        .options(joinedload(AuditLog.user))
         .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
     )
     if action:
@@ -43,5 +50,18 @@ async def list_audit_logs(
         stmt = stmt.where(AuditLog.created_at >= starts_at)
     if ends_at:
         stmt = stmt.where(AuditLog.created_at <= ends_at)
+    dialect_name = session.bind.dialect.name
+    for key, value in metadata_filters.items():
+        stmt = stmt.where(metadata_filter_clause(dialect_name, key, value))
 
+    if archive_applies(starts_at):
+        archive_query = ArchiveQuery(
+            starts_at=starts_at,
+            ends_at=ends_at,
+            action=action,
+            entity=entity,
+            user_id=user_id,
+            metadata=metadata_filters,
+        )
+        return await paginate_with_archive(session, stmt, archive_query, page=page, page_size=page_size)
     return await paginate(session, stmt, page=page, page_size=page_size)
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import authenticate_user, get_user_by_email
-from app.core.security import create_access_token, get_password_hash
+from app.core.security import create_access_token, hash_password
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import LoginRequest, Token
 from app.schemas.user import UserCreate, UserRead
+from app.services.writes import commit_write, insert_returning
 
 
 router = APIRouter()
@@ -26,13 +27,15 @@ async def register(user_in: UserCreate, session: AsyncSession = Depends(get_db))
     existing = await get_user_by_email(session, user_in.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    user = User(
-        name=user_in.name,
-        email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
-        is_active=user_in.is_active,
+    user = await insert_returning(
+        session,
+        User,
+        {
+            "name": user_in.name,
+            "email": user_in.email,
+            "hashed_password": await hash_password(user_in.password),
+            "is_active": user_in.is_active,
+        },
     )
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    await commit_write(session, invalidate=False)
     return user
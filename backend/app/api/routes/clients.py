@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_read_db
+from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.client import Client
 from app.models.user import User
-from app.services.dashboard_metrics import invalidate_dashboard_metrics
 from app.services.audit import log_audit_event
+from app.services.client_deletion import (
+    ClientDeleteJobs,
+    count_client_dependents,
+    get_client_delete_jobs,
+    log_client_deleted,
+)
+from app.services.writes import commit_write, insert_returning
 from app.utils.pagination import paginate
-from app.schemas.client import ClientCreate, ClientRead, ClientUpdate
+from app.schemas.client import ClientCreate, ClientDeleteJobRead, ClientRead, ClientUpdate
 from app.schemas.pagination import Paginated
 
 router = APIRouter()
@@ -21,7 +30,7 @@ async def list_clients(
     page_size: int = Query(default=20, ge=1, le=200),
     search: str | None = None,
     is_active: bool | None = None,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[ClientRead]:
     stmt = select(Client)
@@ -37,7 +46,7 @@ async def list_clients(
 @router.get("/{client_id}", response_model=ClientRead)
 async def get_client(
     client_id: int,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Client:
     client = await session.get(Client, client_id)
@@ -52,9 +61,7 @@ async def create_client(
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Client:
-    client = Client(**client_in.model_dump())
-    session.add(client)
-    await session.flush()
+    client = await insert_returning(session, Client, client_in.model_dump())
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -63,9 +70,7 @@ async def create_client(
         entity_id=client.id,
         metadata={"email": client.email, "name": client.name},
     )
-    await session.commit()
-    await session.refresh(client)
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return client
 
 
@@ -91,30 +96,47 @@ async def update_client(
             entity_id=client.id,
             metadata={"fields": sorted(update_data.keys())},
         )
-    await session.commit()
-    await session.refresh(client)
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return client
 
 
-@router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{client_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"model": ClientDeleteJobRead}},
+)
 async def delete_client(
     client_id: int,
+    request: Request,
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
-) -> None:
+    jobs: ClientDeleteJobs = Depends(get_client_delete_jobs),
+) -> Response:
     client = await session.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
-    await log_audit_event(
-        session,
-        user_id=current_user.id,
-        action="client.deleted",
-        entity="client",
-        entity_id=client.id,
-        metadata={"email": client.email, "name": client.name},
-    )
+    dependents = await count_client_dependents(session, client_id)
+    if dependents > get_settings().delete_background_threshold:
+        # Too many rows for one transaction: delete in batches in the background.
+        job = jobs.submit(client, current_user.id, dependents)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(jobs.describe(job)),
+            headers={"Location": str(request.url_for("get_client_delete_job", job_id=job.id))},
+        )
+    await log_client_deleted(session, client, user_id=current_user.id, dependents=dependents)
     await session.delete(client)
-    await session.commit()
-    await invalidate_dashboard_metrics()
-    return None
+    await commit_write(session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/delete-jobs/{job_id}", response_model=ClientDeleteJobRead)
+async def get_client_delete_job(
+    job_id: str,
+    jobs: ClientDeleteJobs = Depends(get_client_delete_jobs),
+    _: User = Depends(get_current_active_user),
+) -> ClientDeleteJobRead:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delete job not found")
+    return jobs.describe(job)
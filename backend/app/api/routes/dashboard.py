@@ -10,6 +10,8 @@ from app.services.dashboard_metrics import get_dashboard_metrics
 router = APIRouter()
 
 
+# Cache misses are computed on the primary so the result can be cached under the
+# current data version; a replica may lag behind it. Hits never check out a connection.
 @router.get("/metrics", response_model=DashboardMetrics)
 async def read_dashboard_metrics(
     refresh: bool = Query(default=False),
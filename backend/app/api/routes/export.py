@@ -1,284 +1,201 @@
-import csv
-import io
-from decimal import Decimal
-from typing import Iterable, Sequence
+from datetime import date
 
-import pandas as pd
-
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
-from app.db.session import get_db
-from app.models.allocation import Allocation
-from app.models.asset import Asset
-from app.models.client import Client
-from app.models.movement import Movement, MovementType
+from app.api.deps import get_current_active_user, get_export_db, get_primary_export_db
+from app.core.executor import get_worker_pool
+from app.db.session import get_db, is_replica_session
+from app.models.movement import MovementType
 from app.models.user import User
-from app.services.dashboard_metrics import cache_dashboard_metrics, compute_dashboard_metrics
+from app.schemas.export import ExportFilters, ExportJobCreate, ExportJobRead, TableExportFormat
+from app.services.dashboard_metrics import cache_dashboard_metrics
+from app.services.data_version import current_data_version
+from app.services.export_cache import ExportCache, etag_for, etag_matches, export_cache_key, get_export_cache
+from app.services.export_jobs import ExportJobService, get_export_jobs
+from app.services.exports import (
+    EXPORT_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    XLSX_MEDIA_TYPE,
+    build_dashboard_workbook,
+    export_watermark,
+    stream_table_export,
+)
+from app.services.jobs import Job, JobStatus
 
 router = APIRouter()
 
-
-def _query_to_dicts(rows: Sequence, columns: Iterable[str]) -> list[dict[str, str]]:
-    data: list[dict[str, str]] = []
-    for row in rows:
-        values = {}
-        for column in columns:
-            value = getattr(row, column, "")
-            values[column] = str(value) if value is not None else ""
-        data.append(values)
-    return data
-
-
-def _list_to_csv(data: list[dict[str, str]]) -> StreamingResponse:
-    buffer = io.StringIO()
-    if not data:
-        writer = csv.writer(buffer)
-        writer.writerow([])
-    else:
-        writer = csv.DictWriter(buffer, fieldnames=list(data[0].keys()))
-        writer.writeheader()
-        writer.writerows(data)
-    buffer.seek(0)
-    return StreamingResponse(iter([buffer.getvalue()]), media_type="text/csv")
+EXPORT_WATERMARK_HEADER = "X-Export-Watermark"
+
+
+def _revalidation_headers(key: str) -> dict[str, str]:
+    return {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+
+
+async def _table_response(
+    request: Request,
+    session: AsyncSession,
+    kind: str,
+    filters: ExportFilters,
+    export_format: str,
+) -> Response:
+    # Table exports are too large to keep on disk, but the ETag still lets a client
+    # that already holds this data version skip the download. Replica rows may be
+    # older than the current version, so replica exports carry no ETag.
+    headers: dict[str, str] = {}
+    if not is_replica_session(session):
+        data_version = await current_data_version(session)
+        key = export_cache_key(kind, export_format, filters.model_dump(mode="json"), data_version)
+        headers = _revalidation_headers(key)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    await get_worker_pool().wait_for_capacity()
+    watermark = await export_watermark(session, kind, filters)
+    filename = f"{kind}.{EXPORT_EXTENSIONS[export_format]}"
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    if watermark is not None:
+        headers[EXPORT_WATERMARK_HEADER] = str(watermark)
+    return StreamingResponse(
+        stream_table_export(session, kind, filters, export_format, until_id=watermark),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
 
 
 @router.get("/clients")
 async def export_clients(
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    export_format: TableExportFormat = Query(default="csv", alias="format"),
+    search: str | None = None,
+    is_active: bool | None = None,
+    since_id: int | None = Query(default=None, ge=0),
+    session: AsyncSession = Depends(get_export_db),
     _: User = Depends(get_current_active_user),
-) -> StreamingResponse:
-    result = await session.execute(select(Client))
-    clients = list(result.scalars().all())
-    data = _query_to_dicts(clients, ("id", "name", "email", "is_active", "created_at"))
-    response = _list_to_csv(data)
-    response.headers["Content-Disposition"] = "attachment; filename=clients.csv"
-    return response
+) -> Response:
+    filters = ExportFilters(search=search, is_active=is_active, since_id=since_id)
+    return await _table_response(request, session, "clients", filters, export_format)
 
 
 @router.get("/allocations")
 async def export_allocations(
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    export_format: TableExportFormat = Query(default="csv", alias="format"),
+    client_id: int | None = Query(default=None, ge=1),
+    asset_id: int | None = Query(default=None, ge=1),
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    since_id: int | None = Query(default=None, ge=0),
+    session: AsyncSession = Depends(get_export_db),
     _: User = Depends(get_current_active_user),
-) -> StreamingResponse:
-    result = await session.execute(select(Allocation))
-    allocations = list(result.scalars().all())
-    data = _query_to_dicts(
-        allocations,
-        ("id", "client_id", "asset_id", "quantity", "buy_price", "buy_date"),
+) -> Response:
+    filters = ExportFilters(
+        client_id=client_id,
+        asset_id=asset_id,
+        start_date=start_date,
+        end_date=end_date,
+        since_id=since_id,
     )
-    response = _list_to_csv(data)
-    response.headers["Content-Disposition"] = "attachment; filename=allocations.csv"
-    return response
+    return await _table_response(request, session, "allocations", filters, export_format)
 
 
 @router.get("/movements")
 async def export_movements(
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    export_format: TableExportFormat = Query(default="csv", alias="format"),
+    client_id: int | None = Query(default=None, ge=1),
+    movement_type: MovementType | None = Query(default=None),
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    since_id: int | None = Query(default=None, ge=0),
+    session: AsyncSession = Depends(get_export_db),
     _: User = Depends(get_current_active_user),
-) -> StreamingResponse:
-    result = await session.execute(select(Movement))
-    movements = list(result.scalars().all())
-    data = _query_to_dicts(
-        movements,
-        ("id", "client_id", "type", "amount", "date", "note"),
+) -> Response:
+    filters = ExportFilters(
+        client_id=client_id,
+        movement_type=movement_type,
+        start_date=start_date,
+        end_date=end_date,
+        since_id=since_id,
     )
-    response = _list_to_csv(data)
-    response.headers["Content-Disposition"] = "attachment; filename=movements.csv"
-    return response
-
-
-def _ensure_float(value: float | int | Decimal | None) -> float:
-    if value is None:
-        return 0.0
-    return float(value)
-
-
-def _bool_label(value: bool) -> str:
-    return "Sim" if value else "Nao"
+    return await _table_response(request, session, "movements", filters, export_format)
 
 
 @router.get("/dashboard/excel")
 async def export_dashboard_excel(
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    session: AsyncSession = Depends(get_primary_export_db),
+    cache: ExportCache = Depends(get_export_cache),
     _: User = Depends(get_current_active_user),
-) -> StreamingResponse:
-    clients_result = await session.execute(select(Client))
-    clients = list(clients_result.scalars().all())
-
-    assets_result = await session.execute(select(Asset))
-    assets = list(assets_result.scalars().all())
-
-    allocations_result = await session.execute(select(Allocation))
-    allocations = list(allocations_result.scalars().all())
-
-    movements_result = await session.execute(select(Movement))
-    movements = list(movements_result.scalars().all())
-
-    client_map = {client.id: client for client in clients}
-    asset_map = {asset.id: asset for asset in assets}
-
-    metrics = compute_dashboard_metrics(clients, assets, allocations, movements)
-    await cache_dashboard_metrics(metrics)
-
-    allocation_rows: list[dict[str, object]] = []
-    for allocation in allocations:
-        quantity = _ensure_float(allocation.quantity)
-        price = _ensure_float(allocation.buy_price)
-        invested_value = round(quantity * price, 2)
-
-        asset = asset_map.get(allocation.asset_id)
-        client = client_map.get(allocation.client_id)
-
-        allocation_rows.append(
-            {
-                "ID": allocation.id,
-                "Cliente": client.name if client else str(allocation.client_id),
-                "Ticker": asset.ticker if asset else str(allocation.asset_id),
-                "Ativo": asset.name if asset else "",
-                "Quantidade": round(quantity, 4),
-                "Preco de compra": round(price, 4),
-                "Valor investido": invested_value,
-                "Data da compra": allocation.buy_date.isoformat(),
-                "Moeda": asset.currency if asset else "",
-            }
-        )
-
-    movement_rows: list[dict[str, object]] = []
-    for movement in movements:
-        amount = round(_ensure_float(movement.amount), 2)
-        client = client_map.get(movement.client_id)
-        movement_type = "Deposito" if movement.type == MovementType.deposit else "Retirada"
-
-        movement_rows.append(
-            {
-                "ID": movement.id,
-                "Cliente": client.name if client else str(movement.client_id),
-                "Tipo": movement_type,
-                "Valor": amount,
-                "Data": movement.date.isoformat(),
-                "Observacao": movement.note or "",
-            }
-        )
-
-    allocation_totals_map = {
-        entry["client_id"]: entry["total"] for entry in metrics["allocation_totals_by_client"]
-    }
-
-    clients_rows = []
-    for client in clients:
-        total_for_client = allocation_totals_map.get(client.id, 0.0)
-        clients_rows.append(
-            {
-                "ID": client.id,
-                "Nome": client.name,
-                "Email": client.email,
-                "Ativo": _bool_label(client.is_active),
-                "Total investido": round(total_for_client, 2),
-                "Criado em": client.created_at.isoformat(),
-            }
-        )
-
-    custody_rows = [
-        {"Mes": point["label"], "Valor acumulado": round(point["value"], 2)}
-        for point in metrics["custody_series"]
-    ]
-
-    flow_rows = [
-        {
-            "Mes": point["label"],
-            "Entradas": round(point["inflow"], 2),
-            "Saidas": round(point["outflow"], 2),
-            "Saldo liquido": round(point["net"], 2),
-        }
-        for point in metrics["flow_series"]
-    ]
-
-    allocation_mix_rows = [
-        {
-            "Ativo": entry["label"],
-            "Valor investido": round(entry["value"], 2),
-            "Participacao (%)": round(entry["share"], 2),
-        }
-        for entry in metrics["allocation_mix"]
-    ]
-
-    kpi_rows = [
-        {
-            "Indicador": entry["indicator"],
-            "Valor": entry["value"],
-            "Variacao (%)": round(entry["variation"], 2),
-        }
-        for entry in metrics["kpis"]
-    ]
-
-    movement_totals = metrics["movement_totals"]
-    movement_summary_df = pd.DataFrame(
-        [
-            {
-                "Entradas": round(movement_totals["deposits"], 2),
-                "Saidas": round(movement_totals["withdrawals"], 2),
-                "Saldo liquido": round(movement_totals["net"], 2),
-            }
-        ]
-    )
-
-    custody_df = pd.DataFrame(custody_rows)
-    if custody_df.empty:
-        custody_df = pd.DataFrame(columns=["Mes", "Valor acumulado"])
-
-    flow_df = pd.DataFrame(flow_rows)
-    if flow_df.empty:
-        flow_df = pd.DataFrame(columns=["Mes", "Entradas", "Saidas", "Saldo liquido"])
-
-    allocation_mix_df = pd.DataFrame(allocation_mix_rows)
-    if allocation_mix_df.empty:
-        allocation_mix_df = pd.DataFrame(columns=["Ativo", "Valor investido", "Participacao (%)"])
-
-    clients_df = pd.DataFrame(clients_rows)
-    if clients_df.empty:
-        clients_df = pd.DataFrame(columns=["ID", "Nome", "Email", "Ativo", "Total investido", "Criado em"])
-
-    allocations_df = pd.DataFrame(allocation_rows)
-    if allocations_df.empty:
-        allocations_df = pd.DataFrame(
-            columns=[
-                "ID",
-                "Cliente",
-                "Ticker",
-                "Ativo",
-                "Quantidade",
-                "Preco de compra",
-                "Valor investido",
-                "Data da compra",
-                "Moeda",
-            ]
+) -> Response:
+    data_version = await current_data_version(session)
+    key = export_cache_key("dashboard", "xlsx", {}, data_version)
+    headers = _revalidation_headers(key)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = cache.lookup(key, "xlsx")
+    if path is None:
+        workbook, metrics = await build_dashboard_workbook(session)
+        await cache_dashboard_metrics(metrics)
+        path = await get_worker_pool().run_local(cache.store, key, "xlsx", workbook)
+    return FileResponse(path, media_type=XLSX_MEDIA_TYPE, filename="dashboard.xlsx", headers=headers)
+
+
+def _download_url(request: Request, job: Job) -> str:
+    return str(request.url_for("download_export_job", job_id=job.id))
+
+
+def _get_job(jobs: ExportJobService, job_id: str, current_user: User) -> Job:
+    # Another user's job is reported as missing rather than forbidden, so job ids
+    # cannot be probed.
+    job = jobs.get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+    return job
+
+
+@router.post("/jobs", response_model=ExportJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    job_in: ExportJobCreate,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_db),
+    jobs: ExportJobService = Depends(get_export_jobs),
+    current_user: User = Depends(get_current_active_user),
+) -> ExportJobRead:
+    job = jobs.submit(job_in, current_user.id, data_version=await current_data_version(session))
+    response.headers["Location"] = str(request.url_for("get_export_job", job_id=job.id))
+    return jobs.describe(job, _download_url(request, job))
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobRead)
+async def get_export_job(
+    job_id: str,
+    request: Request,
+    jobs: ExportJobService = Depends(get_export_jobs),
+    current_user: User = Depends(get_current_active_user),
+) -> ExportJobRead:
+    job = _get_job(jobs, job_id, current_user)
+    return jobs.describe(job, _download_url(request, job))
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    jobs: ExportJobService = Depends(get_export_jobs),
+    current_user: User = Depends(get_current_active_user),
+) -> FileResponse:
+    job = _get_job(jobs, job_id, current_user)
+    if job.status != JobStatus.succeeded or job.artifact is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status.value}",
         )
-
-    movements_df = pd.DataFrame(movement_rows)
-    if movements_df.empty:
-        movements_df = pd.DataFrame(columns=["ID", "Cliente", "Tipo", "Valor", "Data", "Observacao"])
-
-    kpi_df = pd.DataFrame(kpi_rows)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        kpi_df.to_excel(writer, sheet_name="KPIs", index=False)
-        movement_summary_df.to_excel(writer, sheet_name="Resumo Mov.", index=False)
-        custody_df.to_excel(writer, sheet_name="Custodia", index=False)
-        flow_df.to_excel(writer, sheet_name="Fluxo", index=False)
-        allocation_mix_df.to_excel(writer, sheet_name="Mix de Ativos", index=False)
-        clients_df.to_excel(writer, sheet_name="Clientes", index=False)
-        allocations_df.to_excel(writer, sheet_name="Alocacoes", index=False)
-        movements_df.to_excel(writer, sheet_name="Movimentacoes", index=False)
-
-    output.seek(0)
-    headers = {"Content-Disposition": "attachment; filename=dashboard.xlsx"}
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
+    export_format = job.details["format"]
+    return FileResponse(
+        job.artifact,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        filename=f"{job.details['kind']}.{EXPORT_EXTENSIONS[export_format]}",
     )
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+
+from app.api.deps import get_current_active_user
+from app.models.user import User
+from app.schemas.imports import ImportFormat, ImportJobRead, ImportKind
+from app.services.import_jobs import ImportJobService, ImportTooLarge, get_import_jobs
+from app.services.jobs import Job
+
+router = APIRouter()
+
+
+def _rejects_url(request: Request, job: Job) -> str:
+    return str(request.url_for("download_import_rejects", job_id=job.id))
+
+
+def _get_job(jobs: ImportJobService, job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+
+@router.post("/{kind}", response_model=ImportJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def create_import_job(
+    kind: ImportKind,
+    request: Request,
+    response: Response,
+    import_format: ImportFormat = Query(default="csv", alias="format"),
+    jobs: ImportJobService = Depends(get_import_jobs),
+    current_user: User = Depends(get_current_active_user),
+) -> ImportJobRead:
+    # The file is the raw request body (e.g. curl --data-binary @movements.csv), so
+    # it streams to disk without multipart buffering.
+    try:
+        path = await jobs.receive(request.stream(), import_format)
+    except ImportTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    job = jobs.submit(kind, path, import_format, current_user.id)
+    response.headers["Location"] = str(request.url_for("get_import_job", job_id=job.id))
+    return jobs.describe(job, _rejects_url(request, job))
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobRead)
+async def get_import_job(
+    job_id: str,
+    request: Request,
+    jobs: ImportJobService = Depends(get_import_jobs),
+    _: User = Depends(get_current_active_user),
+) -> ImportJobRead:
+    job = _get_job(jobs, job_id)
+    return jobs.describe(job, _rejects_url(request, job))
+
+
+@router.get("/jobs/{job_id}/rejects")
+async def download_import_rejects(
+    job_id: str,
+    jobs: ImportJobService = Depends(get_import_jobs),
+    _: User = Depends(get_current_active_user),
+) -> FileResponse:
+    job = _get_job(jobs, job_id)
+    if job.artifact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job has no rejected rows")
+    return FileResponse(job.artifact, media_type="text/csv", filename=f"{job.details['kind']}.rejects.csv")
@@ -4,13 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_idempotent_request, get_read_db
 from app.db.session import get_db
+from app.models.client import Client
 from app.models.movement import Movement, MovementType
 from app.models.user import User
+from app.services.idempotency import IdempotentRequest
 from app.services.audit import log_audit_event
-from app.services.dashboard_metrics import invalidate_dashboard_metrics
+from app.services.bulk import create_in_bulk
+from app.services.writes import commit_write, insert_returning
 from app.utils.pagination import paginate
+from app.schemas.bulk import BulkCreate, BulkResult
 from app.schemas.movement import MovementCreate, MovementRead
 from app.schemas.pagination import Paginated
 
@@ -25,7 +29,7 @@ async def list_movements(
     end_date: date | None = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[MovementRead]:
     stmt = select(Movement)
@@ -47,12 +51,11 @@ async def list_movements(
 @router.post("/", response_model=MovementRead, status_code=status.HTTP_201_CREATED)
 async def create_movement(
     movement_in: MovementCreate,
+    idempotent: IdempotentRequest | None = Depends(get_idempotent_request),
     session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
-) -> Movement:
-    movement = Movement(**movement_in.model_dump())
-    session.add(movement)
-    await session.flush()
+) -> MovementRead:
+    movement = await insert_returning(session, Movement, movement_in.model_dump())
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -64,10 +67,43 @@ async def create_movement(
             "type": movement.type.value,
         },
     )
-    await session.commit()
-    await session.refresh(movement)
-    await invalidate_dashboard_metrics()
-    return movement
+    await commit_write(session)
+    result = MovementRead.model_validate(movement)
+    if idempotent is not None:
+        await idempotent.save(status.HTTP_201_CREATED, result)
+    return result
+
+
+@router.post("/bulk", response_model=BulkResult[MovementRead], status_code=status.HTTP_201_CREATED)
+async def create_movements_bulk(
+    payload: BulkCreate,
+    idempotent: IdempotentRequest | None = Depends(get_idempotent_request),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> BulkResult[MovementRead]:
+    outcome = await create_in_bulk(
+        session,
+        model=Movement,
+        schema=MovementCreate,
+        items=payload.items,
+        references={"client_id": Client},
+        atomic=payload.atomic,
+        user_id=current_user.id,
+        entity="movement",
+    )
+    # Nothing stored (atomic rollback or every row rejected) is a client error.
+    if outcome.errors and (payload.atomic or not outcome.created):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in outcome.errors],
+        )
+    result = BulkResult[MovementRead](
+        created=[MovementRead.model_validate(values) for values in outcome.created],
+        errors=outcome.errors,
+    )
+    if idempotent is not None:
+        await idempotent.save(status.HTTP_201_CREATED, result)
+    return result
 
 
 @router.delete("/{movement_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -91,6 +127,5 @@ async def delete_movement(
         },
     )
     await session.delete(movement)
-    await session.commit()
-    await invalidate_dashboard_metrics()
+    await commit_write(session)
     return None
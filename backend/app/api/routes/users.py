@@ -2,11 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_active_user
-from app.core.security import get_password_hash
+from app.api.deps import get_current_active_user, get_read_db
+from app.core.security import hash_password
 from app.db.session import get_db
 from app.models.user import User
 from app.services.audit import log_audit_event
+from app.services.principals import invalidate_principal
+from app.services.writes import commit_write, insert_returning
 from app.utils.pagination import paginate
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 from app.schemas.pagination import Paginated
@@ -19,7 +21,7 @@ async def list_users(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
     search: str | None = None,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> Paginated[UserRead]:
     stmt = select(User)
@@ -33,7 +35,7 @@ async def list_users(
 @router.get("/{user_id}", response_model=UserRead)
 async def get_user(
     user_id: int,
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ) -> User:
     user = await session.get(User, user_id)
@@ -51,14 +53,16 @@ async def create_user(
     result = await session.execute(select(User).where(User.email == user_in.email))
     if result.scalars().first():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    user = User(
-        name=user_in.name,
-        email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
-        is_active=user_in.is_active,
+    user = await insert_returning(
+        session,
+        User,
+        {
+            "name": user_in.name,
+            "email": user_in.email,
+            "hashed_password": await hash_password(user_in.password),
+            "is_active": user_in.is_active,
+        },
     )
-    session.add(user)
-    await session.flush()
     await log_audit_event(
         session,
         user_id=current_user.id,
@@ -67,8 +71,7 @@ async def create_user(
         entity_id=user.id,
         metadata={"email": user.email, "name": user.name},
     )
-    await session.commit()
-    await session.refresh(user)
+    await commit_write(session, invalidate=False)
     return user
 
 
@@ -85,7 +88,7 @@ async def update_user(
     update_data = user_in.model_dump(exclude_unset=True)
     changed_fields: list[str] = []
     if "password" in update_data:
-        user.hashed_password = get_password_hash(update_data.pop("password"))
+        user.hashed_password = await hash_password(update_data.pop("password"))
         changed_fields.append("password")
     for field, value in update_data.items():
         setattr(user, field, value)
@@ -100,8 +103,8 @@ async def update_user(
             entity_id=user.id,
             metadata={"fields": sorted(set(changed_fields))},
         )
-    await session.commit()
-    await session.refresh(user)
+    await commit_write(session, invalidate=False)
+    await invalidate_principal(user.id)
     return user
 
 
@@ -123,5 +126,6 @@ async def delete_user(
         metadata={"email": user.email},
     )
     await session.delete(user)
-    await session.commit()
+    await commit_write(session, invalidate=False)
+    await invalidate_principal(user_id)
     return None
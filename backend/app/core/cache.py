@@ -2,16 +2,28 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from functools import lru_cache
-from typing import Any
+from typing import Any, Sequence
 
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 
 from app.core.config import get_settings
+from app.core.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total",
+    "Redis JSON cache lookups by cache (key prefix) and result (hit, miss, error).",
+    labelnames=("cache", "result"),
+)
+
+
+def cache_name(key: str) -> str:
+    return key.split(":", 1)[0]
+
 
 @lru_cache()
 def get_redis_client() -> Redis:
@@ -25,14 +37,19 @@ async def redis_get_json(key: str) -> Any | None:
         value = await client.get(key)
     except RedisError as exc:
         logger.warning("Redis get failed for %s: %s", key, exc)
+        CACHE_LOOKUPS.inc(cache=cache_name(key), result="error")
         return None
     if value is None:
+        CACHE_LOOKUPS.inc(cache=cache_name(key), result="miss")
         return None
     try:
-        return json.loads(value)
+        decoded = json.loads(value)
     except json.JSONDecodeError as exc:
         logger.warning("Redis cached value for %s is not valid JSON: %s", key, exc)
+        CACHE_LOOKUPS.inc(cache=cache_name(key), result="error")
         return None
+    CACHE_LOOKUPS.inc(cache=cache_name(key), result="hit")
+    return decoded
 
 
 async def redis_set_json(key: str, value: Any, ttl: int | None = None) -> None:
@@ -56,3 +73,31 @@ async def redis_delete(*keys: str) -> None:
         await client.delete(*keys)
     except RedisError as exc:
         logger.warning("Redis delete failed for %s: %s", ",".join(keys), exc)
+
+
+async def redis_get_or_set(key: str, default: str) -> str | None:
+    client = get_redis_client()
+    try:
+        await client.set(key, default, nx=True)
+        value = await client.get(key)
+    except RedisError as exc:
+        logger.warning("Redis get failed for %s: %s", key, exc)
+        return None
+    return None if value is None else str(value)
+
+
+async def redis_invalidate(delete: Sequence[str] = (), incr: Sequence[str] = ()) -> None:
+    # Sends the deletes and increments in one pipelined round trip. Counters that
+    # are missing (flushed or evicted) are seeded with the current time before the
+    # INCR, so they never restart at 1 and repeat a value handed out earlier.
+    client = get_redis_client()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            if delete:
+                pipe.delete(*delete)
+            for key in incr:
+                pipe.set(key, time.time_ns(), nx=True)
+                pipe.incr(key)
+            await pipe.execute()
+    except RedisError as exc:
+        logger.warning("Redis invalidation failed for %s: %s", ",".join([*delete, *incr]), exc)
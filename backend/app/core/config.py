@@ -1,4 +1,6 @@
 from functools import lru_cache
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,15 +17,85 @@ class Settings(BaseSettings):
     secret_key: str = Field(default="change-me")
     access_token_expire_minutes: int = Field(default=60)
     algorithm: str = Field(default="HS256")
+    principal_cache_ttl_seconds: float = Field(default=10.0, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    principal_cache_redis_ttl_seconds: int = Field(default=0, alias="PRINCIPAL_CACHE_REDIS_TTL_SECONDS")
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31, alias="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(default=4, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=64, alias="PASSWORD_HASH_MAX_PENDING")
+    password_hash_queue_timeout: float = Field(default=5.0, alias="PASSWORD_HASH_QUEUE_TIMEOUT")
 
     database_url: str = Field(
         default="postgresql+asyncpg://invest:investpw@db/investdb",
         alias="DATABASE_URL",
     )
+    database_replica_urls: str = Field(default="", alias="DATABASE_REPLICA_URLS")
+    read_your_writes_seconds: float = Field(default=5.0, alias="READ_YOUR_WRITES_SECONDS")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    db_statement_timeout_ms: int = Field(default=30_000, alias="DB_STATEMENT_TIMEOUT_MS")
+    db_export_statement_timeout_ms: int = Field(default=300_000, alias="DB_EXPORT_STATEMENT_TIMEOUT_MS")
+    sql_instrumentation_enabled: bool = Field(default=True, alias="SQL_INSTRUMENTATION_ENABLED")
+    sql_detection_enabled: bool = Field(default=False, alias="SQL_DETECTION_ENABLED")
+    sql_query_budget: int = Field(default=50, alias="SQL_QUERY_BUDGET")
+    sql_repeated_statement_threshold: int = Field(default=10, alias="SQL_REPEATED_STATEMENT_THRESHOLD")
+    sql_detection_raise: bool = Field(default=False, alias="SQL_DETECTION_RAISE")
+    audit_async_enabled: bool = Field(default=False, alias="AUDIT_ASYNC_ENABLED")
+    audit_batch_size: int = Field(default=500, alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval_ms: int = Field(default=200, alias="AUDIT_FLUSH_INTERVAL_MS")
+    audit_max_pending: int = Field(default=10_000, alias="AUDIT_MAX_PENDING")
+    audit_retention_days: int = Field(default=365, alias="AUDIT_RETENTION_DAYS")
+    audit_archive_dir: str = Field(default="var/audit-archive", alias="AUDIT_ARCHIVE_DIR")
+    audit_archive_batch_size: int = Field(default=5_000, alias="AUDIT_ARCHIVE_BATCH_SIZE")
+    worker_pool_kind: Literal["thread", "process"] = Field(default="thread", alias="WORKER_POOL_KIND")
+    worker_pool_max_workers: int = Field(default=0, alias="WORKER_POOL_MAX_WORKERS")
+    worker_pool_max_pending: int = Field(default=32, alias="WORKER_POOL_MAX_PENDING")
+    worker_pool_job_timeout: float = Field(default=120.0, alias="WORKER_POOL_JOB_TIMEOUT")
+    worker_pool_queue_timeout: float = Field(default=5.0, alias="WORKER_POOL_QUEUE_TIMEOUT")
+    export_yield_per: int = Field(default=2_000, alias="EXPORT_YIELD_PER")
+    export_chunk_bytes: int = Field(default=64 * 1024, alias="EXPORT_CHUNK_BYTES")
+    export_parquet_row_group_size: int = Field(default=65_536, alias="EXPORT_PARQUET_ROW_GROUP_SIZE")
+    export_cache_dir: str = Field(default="var/export-cache", alias="EXPORT_CACHE_DIR")
+    export_cache_max_bytes: int = Field(default=1024 * 1024 * 1024, alias="EXPORT_CACHE_MAX_BYTES")
+    export_jobs_dir: str = Field(default="var/exports", alias="EXPORT_JOBS_DIR")
+    export_jobs_concurrency: int = Field(default=2, alias="EXPORT_JOBS_CONCURRENCY")
+    export_jobs_ttl_seconds: int = Field(default=3_600, alias="EXPORT_JOBS_TTL_SECONDS")
+    import_dir: str = Field(default="var/imports", alias="IMPORT_DIR")
+    import_chunk_size: int = Field(default=5_000, alias="IMPORT_CHUNK_SIZE")
+    import_max_bytes: int = Field(default=1024 * 1024 * 1024, alias="IMPORT_MAX_BYTES")
+    import_jobs_concurrency: int = Field(default=1, alias="IMPORT_JOBS_CONCURRENCY")
+    import_jobs_ttl_seconds: int = Field(default=3_600, alias="IMPORT_JOBS_TTL_SECONDS")
+    delete_batch_size: int = Field(default=5_000, alias="DELETE_BATCH_SIZE")
+    delete_background_threshold: int = Field(default=10_000, alias="DELETE_BACKGROUND_THRESHOLD")
+    delete_jobs_ttl_seconds: int = Field(default=3_600, alias="DELETE_JOBS_TTL_SECONDS")
+    idempotency_ttl_seconds: int = Field(default=86_400, alias="IDEMPOTENCY_TTL_SECONDS")
+    idempotency_lock_seconds: int = Field(default=30, alias="IDEMPOTENCY_LOCK_SECONDS")
+    idempotency_wait_seconds: float = Field(default=10.0, alias="IDEMPOTENCY_WAIT_SECONDS")
+    idempotency_poll_interval_ms: int = Field(default=50, alias="IDEMPOTENCY_POLL_INTERVAL_MS")
+    partition_months_ahead: int = Field(default=3, alias="PARTITION_MONTHS_AHEAD")
+    movements_partition_retention_months: int = Field(default=0, alias="MOVEMENTS_PARTITION_RETENTION_MONTHS")
+    audit_partition_retention_months: int = Field(default=0, alias="AUDIT_PARTITION_RETENTION_MONTHS")
     redis_url: str = Field(default="redis://redis:6379/0", alias="REDIS_URL")
     dashboard_cache_ttl: int = Field(default=300, alias="DASHBOARD_CACHE_TTL")
     market_cache_ttl: int = Field(default=600, alias="MARKET_CACHE_TTL")
     brapi_token: str | None = Field(default=None, alias="BRAPI_TOKEN")
+    profiling_admin_ids: str = Field(default="", alias="PROFILING_ADMIN_IDS")
+    profiling_interval_ms: float = Field(default=1.0, alias="PROFILING_INTERVAL_MS")
+    profiling_tracemalloc_frames: int = Field(default=25, alias="PROFILING_TRACEMALLOC_FRAMES")
+    profiling_sample_rate: float = Field(default=0.0, ge=0.0, le=1.0, alias="PROFILING_SAMPLE_RATE")
+    profiling_slowest_count: int = Field(default=20, alias="PROFILING_SLOWEST_COUNT")
+    profiling_dir: str = Field(default="var/profiles", alias="PROFILING_DIR")
+
+    @property
+    def replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
+    @property
+    def profiling_admins(self) -> set[int]:
+        return {int(item) for item in self.profiling_admin_ids.split(",") if item.strip()}
 
 
 @lru_cache()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Literal, TypeVar
+
+from app.core.config import get_settings
+from app.core.metrics import registry
+
+T = TypeVar("T")
+PoolKind = Literal["thread", "process"]
+
+WORKER_JOBS = registry.counter(
+    "worker_pool_jobs_total",
+    "Jobs submitted to the CPU worker pool by outcome.",
+    labelnames=("outcome",),
+)
+WORKER_JOB_SECONDS = registry.histogram(
+    "worker_pool_job_seconds",
+    "Time from submission to completion of worker pool jobs, queueing included.",
+)
+
+
+class WorkerPoolBusy(RuntimeError):
+    pass
+
+
+class WorkerPoolTimeout(TimeoutError):
+    pass
+
+
+# Runs CPU-bound sections outside the event loop. ``run`` targets the configured
+# executor, which may be a process pool, so its function and arguments must be
+# picklable: pass plain tuples, never ORM objects. ``run_local`` always uses a
+# thread and is meant for work that holds unpicklable state (e.g. an open
+# workbook). Both share one bound on queued + running jobs; a job only gives its
+# slot back when it really finishes, even if the caller already timed out.
+# Streamed responses check capacity up front and use ``run_streaming`` per batch.
+class WorkerPool:
+    def __init__(
+        self,
+        *,
+        kind: PoolKind = "thread",
+        max_workers: int | None = None,
+        max_pending: int = 32,
+        job_timeout: float | None = None,
+        queue_timeout: float = 5.0,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+        self.job_timeout = job_timeout
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.BoundedSemaphore(max(max_pending, 1))
+        self._executor: Executor | None = None
+        self._thread_executor: ThreadPoolExecutor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn avoids forking a process that is running an event loop and threads.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = self._get_thread_executor()
+        return self._executor
+
+    def _get_thread_executor(self) -> ThreadPoolExecutor:
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="worker-pool",
+            )
+        return self._thread_executor
+
+    async def _acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError as exc:
+            WORKER_JOBS.inc(outcome="rejected")
+            raise WorkerPoolBusy("Worker pool queue is full") from exc
+
+    async def _submit(
+        self,
+        executor: Executor,
+        fn: Callable[..., T],
+        args: tuple[Any, ...],
+        timeout: float | None,
+    ) -> T:
+        # Expects a slot to be held already; the job gives it back when it finishes.
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        future = loop.run_in_executor(executor, functools.partial(fn, *args))
+
+        def _finished(_: asyncio.Future[T]) -> None:
+            self._slots.release()
+            WORKER_JOB_SECONDS.observe(loop.time() - started)
+
+        future.add_done_callback(_finished)
+        try:
+            if timeout is None:
+                result = await asyncio.shield(future)
+            else:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as exc:
+            WORKER_JOBS.inc(outcome="timeout")
+            raise WorkerPoolTimeout(f"{getattr(fn, '__name__', fn)} exceeded {timeout}s") from exc
+        except Exception:
+            WORKER_JOBS.inc(outcome="error")
+            raise
+        WORKER_JOBS.inc(outcome="ok")
+        return result
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+        await self._acquire()
+        return await self._submit(self._get_executor(), fn, args, self.job_timeout if timeout is None else timeout)
+
+    async def run_local(self, fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+        await self._acquire()
+        return await self._submit(
+            self._get_thread_executor(), fn, args, self.job_timeout if timeout is None else timeout
+        )
+
+    async def wait_for_capacity(self) -> None:
+        # For callers about to commit to a streamed response: raise WorkerPoolBusy
+        # while a 503 can still be sent, not partway through the body.
+        await self._acquire()
+        self._slots.release()
+
+    async def run_streaming(self, fn: Callable[..., T], *args: Any, local: bool = False) -> T:
+        # For work after the response headers went out, where a 503/504 can no
+        # longer be sent: never raises WorkerPoolBusy or WorkerPoolTimeout. Without
+        # a free slot the job runs on asyncio's default thread pool instead.
+        if self._slots.locked():
+            WORKER_JOBS.inc(outcome="overflow")
+            return await asyncio.to_thread(fn, *args)
+        await self._slots.acquire()
+        executor = self._get_thread_executor() if local else self._get_executor()
+        return await self._submit(executor, fn, args, None)
+
+    def shutdown(self) -> None:
+        if self._executor is not None and self._executor is not self._thread_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._thread_executor is not None:
+            self._thread_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._thread_executor = None
+
+
+_pool: WorkerPool | None = None
+
+
+def get_worker_pool() -> WorkerPool:
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = WorkerPool(
+            kind=settings.worker_pool_kind,
+            max_workers=settings.worker_pool_max_workers or None,
+            max_pending=settings.worker_pool_max_pending,
+            job_timeout=settings.worker_pool_job_timeout or None,
+            queue_timeout=settings.worker_pool_queue_timeout,
+        )
+    return _pool
+
+
+def shutdown_worker_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+PROFILE_SUFFIX = ".speedscope.json"
+MAX_STACK_DEPTH = 128
+
+
+class FrameTable:
+    # Speedscope files list every frame once and refer to it by index.
+    def __init__(self) -> None:
+        self.frames: list[dict[str, Any]] = []
+        self._index: dict[Any, int] = {}
+
+    def index(self, key: Any, name: str, file: str, line: int) -> int:
+        position = self._index.get(key)
+        if position is None:
+            position = self._index[key] = len(self.frames)
+            self.frames.append({"name": name, "file": file, "line": line})
+        return position
+
+    def code(self, code: CodeType) -> int:
+        return self.index(code, code.co_qualname, code.co_filename, code.co_firstlineno)
+
+
+# Wall-clock sampler: a daemon thread snapshots the stack of every other thread
+# each interval and weights the sample by the time since the previous one. The
+# sampler needs the GIL to run, so while the event loop is busy the real interval
+# is bounded by sys.getswitchinterval() (5 ms by default); the weights absorb that.
+# Time spent awaiting I/O shows up under the selector call of the loop thread.
+class SamplingProfiler:
+    def __init__(self, table: FrameTable, *, interval: float) -> None:
+        self.table = table
+        self.interval = interval
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._origin = 0
+        self._samples: defaultdict[int, list[tuple[tuple[int, ...], float]]] = defaultdict(list)
+        self._thread_names: dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._origin = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        self._thread_names = {thread.ident: thread.name for thread in threading.enumerate() if thread.ident}
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    self._samples[thread_id].append((self._stack(frame), weight))
+
+    def _stack(self, frame: FrameType | None) -> tuple[int, ...]:
+        stack: list[int] = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self.table.code(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def profiles(self) -> list[dict[str, Any]]:
+        # One profile per thread, the thread that started profiling (the event loop) first.
+        ordered = sorted(self._samples.items(), key=lambda item: item[0] != self._origin)
+        return [
+            {
+                "type": "sampled",
+                "name": f"cpu: {self._thread_names.get(thread_id, thread_id)}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.elapsed,
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            }
+            for thread_id, samples in ordered
+        ]
+
+
+# Net memory growth over the request, by allocating stack. tracemalloc is global
+# and slows every allocation down, so it only runs while a profiled request does.
+class MemoryTracer:
+    def __init__(self, table: FrameTable, *, frames: int) -> None:
+        self.table = table
+        self.frames = frames
+        self._owned = False
+        self._before: tracemalloc.Snapshot | None = None
+        self._after: tracemalloc.Snapshot | None = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owned = True
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        self._after = tracemalloc.take_snapshot()
+        if self._owned:
+            tracemalloc.stop()
+            self._owned = False
+
+    def profile(self) -> dict[str, Any] | None:
+        if self._before is None or self._after is None:
+            return None
+        ignored = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+        after = self._after.filter_traces(ignored)
+        before = self._before.filter_traces(ignored)
+        samples: list[list[int]] = []
+        weights: list[int] = []
+        for stat in after.compare_to(before, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            samples.append(
+                [
+                    self.table.index(
+                        (frame.filename, frame.lineno),
+                        f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                        frame.filename,
+                        frame.lineno,
+                    )
+                    for frame in stat.traceback
+                ]
+            )
+            weights.append(stat.size_diff)
+        return {
+            "type": "sampled",
+            "name": "memory: net allocations",
+            "unit": "bytes",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }
+
+
+class RequestProfile:
+    def __init__(self, name: str, *, memory: bool) -> None:
+        settings = get_settings()
+        self.name = name
+        self.table = FrameTable()
+        self.cpu = SamplingProfiler(self.table, interval=settings.profiling_interval_ms / 1000)
+        self.memory = MemoryTracer(self.table, frames=settings.profiling_tracemalloc_frames) if memory else None
+
+    @property
+    def duration(self) -> float:
+        return self.cpu.elapsed
+
+    def start(self) -> None:
+        if self.memory is not None:
+            self.memory.start()
+        self.cpu.start()
+
+    def stop(self) -> None:
+        self.cpu.stop()
+        if self.memory is not None:
+            self.memory.stop()
+
+    def speedscope(self) -> dict[str, Any]:
+        profiles = self.cpu.profiles()
+        memory = self.memory.profile() if self.memory is not None else None
+        if memory is not None:
+            profiles.append(memory)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "anka-backend",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.table.frames},
+            "profiles": profiles,
+        }
+
+    def render(self) -> bytes:
+        return json.dumps(self.speedscope(), separators=(",", ":")).encode()
+
+
+def _slug(value: str) -> str:
+    return "".join(char if char.isalnum() else "-" for char in value).strip("-")[:80] or "root"
+
+
+# Keeps the profiles of the slowest `keep` sampled requests on disk. The duration
+# in microseconds prefixes each file name, so the ranking survives restarts.
+class SlowestProfiles:
+    def __init__(self, directory: Path, *, keep: int) -> None:
+        self.directory = directory
+        self.keep = max(keep, 1)
+        self._heap: list[tuple[int, str]] = []
+        self._names: set[str] = set()
+        if directory.is_dir():
+            for path in directory.glob(f"*{PROFILE_SUFFIX}"):
+                prefix = path.name.split("-", 1)[0]
+                if prefix.isdigit():
+                    self._heap.append((int(prefix), path.name))
+            heapq.heapify(self._heap)
+            while len(self._heap) > self.keep:
+                self._unlink(heapq.heappop(self._heap)[1])
+            self._names = {name for _, name in self._heap}
+
+    def qualifies(self, duration: float) -> bool:
+        return len(self._heap) < self.keep or int(duration * 1_000_000) > self._heap[0][0]
+
+    def files(self) -> list[Path]:
+        return [self.directory / name for _, name in sorted(self._heap, reverse=True)]
+
+    def reserve(self, duration: float, name: str) -> tuple[Path, Path | None]:
+        # Ranking happens on the event loop; callers write the file afterwards.
+        micros = int(duration * 1_000_000)
+        filename = f"{micros:012d}-{_slug(name)}-{os.urandom(4).hex()}{PROFILE_SUFFIX}"
+        evicted = None
+        if len(self._heap) < self.keep:
+            heapq.heappush(self._heap, (micros, filename))
+        else:
+            evicted = self.directory / heapq.heapreplace(self._heap, (micros, filename))[1]
+            self._names.discard(evicted.name)
+        self._names.add(filename)
+        return self.directory / filename, evicted
+
+    def write(self, path: Path, evicted: Path | None, content: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        if evicted is not None:
+            self._unlink(evicted.name)
+        if path.name not in self._names:
+            # Pushed out by a slower request before this write finished.
+            self._unlink(path.name)
+
+    def _unlink(self, filename: str) -> None:
+        try:
+            (self.directory / filename).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("Could not remove profile %s: %s", filename, exc)
+
+
+_slowest: SlowestProfiles | None = None
+
+
+def get_slowest_profiles() -> SlowestProfiles:
+    global _slowest
+    if _slowest is None:
+        settings = get_settings()
+        _slowest = SlowestProfiles(Path(settings.profiling_dir), keep=settings.profiling_slowest_count)
+    return _slowest
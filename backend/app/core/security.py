@@ -5,6 +5,7 @@ import bcrypt
 from jose import jwt
 
 from app.core.config import get_settings
+from app.core.executor import WorkerPool
 
 
 def create_access_token(subject: str | Any, expires_delta: Optional[timedelta] = None) -> str:
@@ -25,5 +26,42 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     password_bytes = password.encode("utf-8")
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=get_settings().bcrypt_rounds))
     return hashed.decode("utf-8")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+digest>.
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != get_settings().bcrypt_rounds
+
+
+# bcrypt releases the GIL, so a small dedicated thread pool hashes in parallel
+# without blocking the event loop. It is separate from the CPU worker pool so a
+# login burst cannot starve exports (or the other way around); once its queue is
+# full callers get WorkerPoolBusy (503).
+_password_pool: WorkerPool | None = None
+
+
+def get_password_pool() -> WorkerPool:
+    global _password_pool
+    if _password_pool is None:
+        settings = get_settings()
+        _password_pool = WorkerPool(
+            kind="thread",
+            max_workers=settings.password_hash_workers,
+            max_pending=settings.password_hash_max_pending,
+            queue_timeout=settings.password_hash_queue_timeout,
+        )
+    return _password_pool
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_pool().run(verify_password, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    return await get_password_pool().run(get_password_hash, password)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+_QUERY_START_KEY = "query_started_at"
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|\$\d+|:\w+)\s*\)")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    # Bound parameters are already placeholders; collapse IN (...) lists so the same
+    # query with a different number of ids counts as one shape.
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class RequestQueryStats:
+    __slots__ = (
+        "count",
+        "checkouts",
+        "total_time",
+        "slowest_time",
+        "slowest_statement",
+        "shapes",
+        "query_budget",
+        "repeat_threshold",
+        "raise_on_violation",
+    )
+
+    def __init__(
+        self,
+        *,
+        query_budget: int = 0,
+        repeat_threshold: int = 0,
+        raise_on_violation: bool = False,
+    ) -> None:
+        self.count = 0
+        self.checkouts = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+        self.shapes: Counter[str] = Counter()
+        self.query_budget = query_budget
+        self.repeat_threshold = repeat_threshold
+        self.raise_on_violation = raise_on_violation
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        if self.repeat_threshold or self.query_budget:
+            self.shapes[statement_shape(statement)] += 1
+            if self.raise_on_violation:
+                violations = self.violations()
+                if violations:
+                    raise QueryBudgetExceeded("; ".join(violations))
+
+    def violations(self) -> list[str]:
+        problems: list[str] = []
+        if self.query_budget and self.count > self.query_budget:
+            problems.append(f"{self.count} queries exceed the budget of {self.query_budget}")
+        if self.repeat_threshold:
+            for shape, repeats in self.shapes.most_common():
+                if repeats <= self.repeat_threshold:
+                    break
+                problems.append(f"statement repeated {repeats} times (possible N+1): {shape[:200]}")
+        return problems
+
+    def as_log_record(self) -> dict[str, Any]:
+        return {
+            "queries": self.count,
+            "checkouts": self.checkouts,
+            "db_ms": round(self.total_time * 1000, 2),
+            "slowest_ms": round(self.slowest_time * 1000, 2),
+            "slowest_statement": (self.slowest_statement or "")[:500] or None,
+        }
+
+
+_current_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def begin_request_stats(stats: RequestQueryStats) -> Token[RequestQueryStats | None]:
+    return _current_stats.set(stats)
+
+
+def end_request_stats(token: Token[RequestQueryStats | None]) -> None:
+    _current_stats.reset(token)
+
+
+def current_request_stats() -> RequestQueryStats | None:
+    return _current_stats.get()
+
+
+@event.listens_for(Pool, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    # Sessions only check out a connection on their first statement, so requests
+    # answered from caches should report zero here.
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.checkouts += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_stats.get() is None:
+        return
+    conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info.get(_QUERY_START_KEY)
+    if not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context) -> None:
+    # after_cursor_execute never runs for a failed statement; drop its start time
+    # so it does not pile up on the pooled connection and pair with later queries.
+    conn = context.connection
+    started = conn.info.get(_QUERY_START_KEY) if conn is not None else None
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current_stats.get()
+    if stats is not None and context.statement is not None:
+        stats.record(context.statement, elapsed)
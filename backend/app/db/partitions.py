@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key column. Both tables are RANGE partitioned by month on
+# Postgres (see migration 20241020_01); other backends keep plain tables.
+PARTITIONED_TABLES: dict[str, str] = {
+    "movements": "date",
+    "audit_logs": "created_at",
+}
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def parse_partition_month(table: str, name: str) -> date | None:
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_SUFFIX.search(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _bound_literal(table: str, month: date) -> str:
+    if PARTITIONED_TABLES[table] == "created_at":
+        return f"'{month.isoformat()} 00:00:00+00'"
+    return f"'{month.isoformat()}'"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    month = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ({_bound_literal(table, month)}) TO ({_bound_literal(table, add_months(month, 1))})"
+    )
+
+
+def _month_condition(table: str, month: date) -> str:
+    column = PARTITIONED_TABLES[table]
+    return (
+        f"{column} >= {_bound_literal(table, month)} AND {column} < {_bound_literal(table, add_months(month, 1))}"
+    )
+
+
+def default_overlap_sql(table: str, month: date) -> str:
+    return f"SELECT 1 FROM {default_partition_name(table)} WHERE {_month_condition(table, month_start(month))} LIMIT 1"
+
+
+def split_default_partition_sql(table: str, month: date) -> list[str]:
+    # Postgres refuses to create a partition while the default partition holds rows
+    # in its range. Detaching the default lets the new partition be created and the
+    # rows be routed into it; the default is attached again at the end. Run inside
+    # one transaction, which keeps the parent table locked while the rows move.
+    month = month_start(month)
+    default = default_partition_name(table)
+    condition = _month_condition(table, month)
+    return [
+        detach_partition_sql(table, default),
+        create_partition_sql(table, month),
+        f"INSERT INTO {table} SELECT * FROM {default} WHERE {condition}",
+        f"DELETE FROM {default} WHERE {condition}",
+        f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT",
+    ]
+
+
+def create_default_partition_sql(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"
+
+
+def detach_partition_sql(table: str, name: str) -> str:
+    return f"ALTER TABLE {table} DETACH PARTITION {name}"
+
+
+@dataclass
+class PartitionPlan:
+    table: str
+    create: list[date] = field(default_factory=list)
+    detach: list[str] = field(default_factory=list)
+    failed: list[date] = field(default_factory=list)
+
+
+def plan_partition_maintenance(
+    table: str,
+    existing: list[str],
+    *,
+    today: date,
+    months_ahead: int,
+    retain_months: int | None,
+) -> PartitionPlan:
+    plan = PartitionPlan(table=table)
+    existing_months = {
+        month: name
+        for name in existing
+        if (month := parse_partition_month(table, name)) is not None
+    }
+    current = month_start(today)
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing_months:
+            plan.create.append(month)
+    if retain_months is not None and retain_months > 0:
+        cutoff = add_months(current, -retain_months)
+        plan.detach = [name for month, name in sorted(existing_months.items()) if month < cutoff]
+    return plan
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[str]:
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return [row[0] for row in result.all()]
+
+
+async def is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table "
+            "JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+            "WHERE pg_class.relname = :table"
+        ),
+        {"table": table},
+    )
+    return result.first() is not None
+
+
+async def create_partition(conn: AsyncConnection, table: str, month: date, *, has_default: bool) -> None:
+    statements = [create_partition_sql(table, month)]
+    if has_default and (await conn.execute(text(default_overlap_sql(table, month)))).first() is not None:
+        logger.info("Moving rows of %s out of %s", partition_name(table, month), default_partition_name(table))
+        statements = split_default_partition_sql(table, month)
+    for statement in statements:
+        await conn.execute(text(statement))
+
+
+async def maintain_partitions(
+    conn: AsyncConnection,
+    *,
+    months_ahead: int,
+    retention: dict[str, int | None],
+    today: date | None = None,
+) -> list[PartitionPlan]:
+    today = today or datetime.now(UTC).date()
+    plans: list[PartitionPlan] = []
+    for table in PARTITIONED_TABLES:
+        if not await is_partitioned(conn, table):
+            logger.info("Skipping %s: table is not partitioned", table)
+            continue
+        existing = await list_partitions(conn, table)
+        plan = plan_partition_maintenance(
+            table,
+            existing,
+            today=today,
+            months_ahead=months_ahead,
+            retain_months=retention.get(table),
+        )
+        has_default = default_partition_name(table) in existing
+        for month in plan.create:
+            # A savepoint per month, so one failure does not block the others or
+            # the detaches below, and the job reports it instead of erroring out.
+            try:
+                async with conn.begin_nested():
+                    await create_partition(conn, table, month, has_default=has_default)
+            except DBAPIError as exc:
+                logger.error("Could not create partition %s: %s", partition_name(table, month), exc)
+                plan.failed.append(month)
+        for name in plan.detach:
+            await conn.execute(text(detach_partition_sql(table, name)))
+        plans.append(plan)
+    return plans
+
+
+async def run_maintenance(months_ahead: int, retention: dict[str, int | None]) -> list[PartitionPlan]:
+    from app.db.session import engine
+
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            logger.info("Partition maintenance only applies to PostgreSQL")
+            return []
+        return await maintain_partitions(conn, months_ahead=months_ahead, retention=retention)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Create upcoming monthly partitions and detach expired ones.")
+    parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead)
+    parser.add_argument(
+        "--retain-movements-months",
+        type=int,
+        default=settings.movements_partition_retention_months,
+        help="Detach movements partitions older than this many months (0 keeps all).",
+    )
+    parser.add_argument(
+        "--retain-audit-months",
+        type=int,
+        default=settings.audit_partition_retention_months,
+        help="Detach audit_logs partitions older than this many months (0 keeps all).",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    plans = asyncio.run(
+        run_maintenance(
+            args.months_ahead,
+            {"movements": args.retain_movements_months, "audit_logs": args.retain_audit_months},
+        )
+    )
+    for plan in plans:
+        created = ", ".join(
+            partition_name(plan.table, month) for month in plan.create if month not in plan.failed
+        ) or "-"
+        detached = ", ".join(plan.detach) or "-"
+        logger.info("%s: created [%s] detached [%s]", plan.table, created, detached)
+        if plan.failed:
+            failed = ", ".join(partition_name(plan.table, month) for month in plan.failed)
+            logger.error("%s: could not create [%s]", plan.table, failed)
+
+
+if __name__ == "__main__":
+    main()
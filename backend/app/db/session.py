@@ -1,15 +1,275 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from itertools import cycle
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
-from app.core.config import get_settings
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from app.core.cache import get_redis_client
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_TIMEOUT_KEY = "statement_timeout_ms"
+USER_ID_KEY = "user_id"
+HAS_WRITES_KEY = "has_writes"
+REPLICA_KEY = "replica"
+PIN_KEY_PREFIX = "db:pin:"
+
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    labelnames=("pool",),
+)
+POOL_CHECKOUT_TIMEOUTS = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout seconds.",
+    labelnames=("pool",),
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self) -> PoolProxiedConnection:
+        name = self.logging_name or "primary"
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=name)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, pool=name)
+
+
+def build_engine_options(database_url: str, settings: Settings, *, pool_name: str = "primary") -> dict[str, Any]:
+    url = make_url(database_url)
+    options: dict[str, Any] = {"echo": settings.debug, "future": True}
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=pool_name,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if url.get_driver_name() == "asyncpg":
+        server_settings: dict[str, str] = {}
+        if settings.db_statement_timeout_ms > 0:
+            server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+        # Both caches must be disabled (size 0) when running behind pgbouncer in
+        # transaction mode; SQLAlchemy keeps its own prepared statement LRU on top
+        # of asyncpg's.
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "server_settings": server_settings,
+        }
+    return options
+
+
+def _pool_samples(engines: dict[str, AsyncEngine], settings: Settings):
+    for name, db_engine in engines.items():
+        pool = db_engine.sync_engine.pool
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            continue
+        capacity = pool.size() + max(settings.db_max_overflow, 0)
+        checked_out = pool.checkedout()
+        yield {"pool": name, "state": "checked_out"}, float(checked_out)
+        yield {"pool": name, "state": "idle"}, float(pool.checkedin())
+        yield {"pool": name, "state": "overflow"}, float(max(pool.overflow(), 0))
+        yield {"pool": name, "state": "saturation"}, checked_out / capacity if capacity else 0.0
+
+
+# Read-only sessions go round-robin across replicas. A user who just committed a
+# write is pinned to the primary for read_your_writes_seconds so their next reads
+# are not served from a lagging replica. Pins are shared through Redis, so they
+# hold whichever worker serves the next read; the in-process copy covers this
+# worker while Redis is unreachable or the SET is still in flight.
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: async_sessionmaker[AsyncSession],
+        replicas: list[async_sessionmaker[AsyncSession]],
+        pin_seconds: float,
+        redis: Callable[[], Redis] | None = None,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.pin_seconds = pin_seconds
+        self.redis = redis
+        self._cycle = cycle(replicas) if replicas else None
+        self._pins: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._shared_pins: set[asyncio.Task[None]] = set()
+
+    def pin(self, user_id: int) -> None:
+        if not self.replicas or self.pin_seconds <= 0:
+            return
+        with self._lock:
+            self._pins[user_id] = time.monotonic() + self.pin_seconds
+        if self.redis is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Called from a sync commit hook, so the SET runs as a task.
+        task = loop.create_task(self._share_pin(user_id))
+        self._shared_pins.add(task)
+        task.add_done_callback(self._shared_pins.discard)
+
+    async def _share_pin(self, user_id: int) -> None:
+        try:
+            await self.redis().set(f"{PIN_KEY_PREFIX}{user_id}", 1, px=max(int(self.pin_seconds * 1000), 1))
+        except RedisError as exc:
+            logger.warning("Could not share the primary pin of user %s: %s", user_id, exc)
+
+    def is_pinned(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        deadline = self._pins.get(user_id)
+        if deadline is None:
+            return False
+        if deadline > time.monotonic():
+            return True
+        with self._lock:
+            if self._pins.get(user_id) == deadline:
+                del self._pins[user_id]
+        return False
+
+    async def is_pinned_anywhere(self, user_id: int | None) -> bool:
+        if self.is_pinned(user_id):
+            return True
+        if user_id is None or self.redis is None:
+            return False
+        try:
+            return bool(await self.redis().exists(f"{PIN_KEY_PREFIX}{user_id}"))
+        except RedisError as exc:
+            logger.warning("Could not read the primary pin of user %s: %s", user_id, exc)
+            return False
+
+    async def route(self, user_id: int | None) -> async_sessionmaker[AsyncSession]:
+        if self._cycle is None or await self.is_pinned_anywhere(user_id):
+            return self.primary
+        with self._lock:
+            return next(self._cycle)
 
 
 settings = get_settings()
-engine = create_async_engine(settings.database_url, echo=settings.debug, future=True)
+engine = create_async_engine(settings.database_url, **build_engine_options(settings.database_url, settings))
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines: dict[str, AsyncEngine] = {}
+for _index, _url in enumerate(settings.replica_urls, start=1):
+    _name = f"replica{_index}"
+    replica_engines[_name] = create_async_engine(_url, **build_engine_options(_url, settings, pool_name=_name))
+
+replica_router = ReplicaRouter(
+    AsyncSessionLocal,
+    [async_sessionmaker(replica, expire_on_commit=False) for replica in replica_engines.values()],
+    settings.read_your_writes_seconds,
+    redis=get_redis_client,
+)
+
+registry.gauge(
+    "db_pool_connections",
+    "Connection pool usage; saturation is checked_out / (pool_size + max_overflow).",
+    labelnames=("pool", "state"),
+    callback=lambda: _pool_samples({"primary": engine, **replica_engines}, settings),
+)
 
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked per
+    # connection; the relationships rely on the database cascade.
+    if "sqlite" not in type(dbapi_connection).__module__:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction, connection) -> None:
+    timeout_ms = session.info.get(STATEMENT_TIMEOUT_KEY)
+    if timeout_ms is None or connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush_writes(session: Session, flush_context) -> None:
+    session.info[HAS_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_statement_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[HAS_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session: Session) -> None:
+    if not session.info.pop(HAS_WRITES_KEY, False):
+        return
+    user_id = session.info.get(USER_ID_KEY)
+    if user_id is not None:
+        replica_router.pin(user_id)
+
+
+# Sessions are lazy: the pool checkout happens on the first statement, not here,
+# so requests answered from caches (dashboard snapshot, principal cache) never
+# wait on the pool. Server-Timing's db-checkouts shows the count per request.
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    # Replicas may lag behind a write whose invalidation already happened, so what
+    # they return must not be cached under the current data version.
+    return bool(session.info.get(REPLICA_KEY))
+
+
+@asynccontextmanager
+async def read_session(
+    user_id: int | None,
+    *,
+    statement_timeout_ms: int | None = None,
+) -> AsyncIterator[AsyncSession]:
+    sessionmaker = await replica_router.route(user_id)
+    async with sessionmaker() as session:
+        if sessionmaker is not replica_router.primary:
+            session.info[REPLICA_KEY] = True
+        if statement_timeout_ms is not None:
+            session.info[STATEMENT_TIMEOUT_KEY] = statement_timeout_ms
+        yield session
+
+
+@asynccontextmanager
+async def primary_session(*, statement_timeout_ms: int | None = None) -> AsyncIterator[AsyncSession]:
+    # For reads whose result is keyed by the current data version (export jobs):
+    # the primary has every write that bumped it.
+    async with AsyncSessionLocal() as session:
+        if statement_timeout_ms is not None:
+            session.info[STATEMENT_TIMEOUT_KEY] = statement_timeout_ms
+        yield session
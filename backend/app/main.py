@@ -1,24 +1,100 @@
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.api.router import api_router
 from app.core.config import get_settings
+from app.core.executor import WorkerPoolBusy, WorkerPoolTimeout, shutdown_worker_pool
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from app.middleware.profiling import PROFILED_STATUS_HEADER, ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.services.audit import start_audit_writer, stop_audit_writer
+from app.services.client_deletion import shutdown_client_delete_jobs
+from app.services.export_jobs import shutdown_export_jobs
+from app.services.idempotency import (
+    REPLAYED_HEADER,
+    IdempotencyInProgress,
+    IdempotencyKeyMismatch,
+    IdempotentReplay,
+)
+from app.services.import_jobs import shutdown_import_jobs
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    start_audit_writer()
+    try:
+        yield
+    finally:
+        await shutdown_export_jobs()
+        await shutdown_import_jobs()
+        await shutdown_client_delete_jobs()
+        await stop_audit_writer()
+        shutdown_worker_pool()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
+
+# Added first so it sits innermost: CORS and Server-Timing still apply to profiles.
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Content-Disposition", "X-Export-Watermark", REPLAYED_HEADER, PROFILED_STATUS_HEADER],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(api_router, prefix="/api")
 
 
+@app.exception_handler(WorkerPoolBusy)
+async def worker_pool_busy_handler(_: Request, exc: WorkerPoolBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"},
+    )
+
+
+@app.exception_handler(WorkerPoolTimeout)
+async def worker_pool_timeout_handler(_: Request, exc: WorkerPoolTimeout) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_504_GATEWAY_TIMEOUT, content={"detail": str(exc)})
+
+
+@app.exception_handler(IdempotentReplay)
+async def idempotent_replay_handler(_: Request, exc: IdempotentReplay) -> JSONResponse:
+    return JSONResponse(status_code=exc.status_code, content=exc.body, headers={REPLAYED_HEADER: "true"})
+
+
+@app.exception_handler(IdempotencyKeyMismatch)
+async def idempotency_mismatch_handler(_: Request, exc: IdempotencyKeyMismatch) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": str(exc)})
+
+
+@app.exception_handler(IdempotencyInProgress)
+async def idempotency_in_progress_handler(_: Request, exc: IdempotencyInProgress) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/health", tags=["health"])
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
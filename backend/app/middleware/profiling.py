@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.profiling import PROFILE_SUFFIX, RequestProfile, get_slowest_profiles
+from app.middleware.request_metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile"
+PROFILED_STATUS_HEADER = "X-Profiled-Status"
+# get_current_user stores the authenticated id here (request.state.user_id).
+AUTHENTICATED_USER_STATE = "user_id"
+
+
+def profiling_requested(scope: Scope) -> bool:
+    if any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+        return True
+    query = scope.get("query_string", b"")
+    return PROFILE_QUERY.encode() in query and PROFILE_QUERY in parse_qs(query.decode("latin-1"))
+
+
+def profiling_admin(scope: Scope) -> int | None:
+    # A cheap pre-check before routing: a valid token whose subject is listed in
+    # PROFILING_ADMIN_IDS. The profile is only handed out once the route's own
+    # authentication (active user, principal cache) confirmed the same user.
+    settings = get_settings()
+    admins = settings.profiling_admins
+    if not admins:
+        return None
+    for name, value in scope["headers"]:
+        if name != b"authorization":
+            continue
+        scheme, _, token = value.decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            user_id = int(payload.get("sub"))
+        except (JWTError, TypeError, ValueError):
+            return None
+        return user_id if user_id in admins else None
+    return None
+
+
+async def _send_busy(send: Send) -> None:
+    body = json.dumps({"detail": "Another request is being profiled; retry shortly"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 409,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+# Admins add an X-Profile header (or ?profile=1) to get a speedscope file for that
+# request instead of its response: a wall-clock sampled CPU profile per thread plus
+# the net allocations seen by tracemalloc. Open it at https://www.speedscope.app.
+# The sampler sees whole threads, so frames of other requests the event loop
+# served meanwhile appear in the profile too; profile on a quiet worker for a
+# clean picture. If authentication fails, or the route is not authenticated, the
+# real response is returned instead.
+# With PROFILING_SAMPLE_RATE > 0 a fraction of all requests is also sampled (CPU
+# only) and the slowest PROFILING_SLOWEST_COUNT are kept under PROFILING_DIR. One
+# request is profiled at a time per worker: explicit requests get 409 while
+# another profile runs, sampled ones just run unprofiled.
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if profiling_requested(scope):
+            admin_id = profiling_admin(scope)
+            if admin_id is not None:
+                if self._busy:
+                    await _send_busy(send)
+                else:
+                    await self._profile(scope, receive, send, admin_id)
+                return
+        rate = get_settings().profiling_sample_rate
+        if not self._busy and rate > 0 and random.random() < rate:
+            await self._sample(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, admin_id: int) -> None:
+        profile = RequestProfile(f"{scope['method']} {scope['path']}", memory=True)
+        status_code = 500
+        profiled = False
+
+        async def capture(message: Message) -> None:
+            # Authentication has run by the time the response starts: a confirmed
+            # admin gets the profile instead of the body, anyone else the response.
+            nonlocal status_code, profiled
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                authenticated = scope.get("state", {}).get(AUTHENTICATED_USER_STATE)
+                profiled = authenticated == admin_id and status_code not in (401, 403)
+            if not profiled:
+                await send(message)
+
+        self._busy = True
+        profile.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profile.stop()
+            self._busy = False
+        if not profiled:
+            return
+
+        body = await asyncio.to_thread(profile.render)
+        filename = f"profile-{time.strftime('%Y%m%dT%H%M%S')}{PROFILE_SUFFIX}"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"content-disposition", f'attachment; filename="{filename}"'.encode()),
+                    (PROFILED_STATUS_HEADER.lower().encode(), str(status_code).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _sample(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile = RequestProfile("", memory=False)
+        self._busy = True
+        profile.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.stop()
+            self._busy = False
+
+        store = get_slowest_profiles()
+        if not store.qualifies(profile.duration):
+            return
+        profile.name = f"{scope['method']} {route_label(scope)}"
+        path, evicted = store.reserve(profile.duration, profile.name)
+        try:
+            await asyncio.to_thread(lambda: store.write(path, evicted, profile.render()))
+        except OSError as exc:
+            logger.warning("Could not write profile %s: %s", path, exc)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.db.instrumentation import RequestQueryStats, begin_request_stats, end_request_stats
+
+logger = logging.getLogger("app.sql")
+
+QUERY_WARNINGS_HEADER = "X-Query-Warnings"
+
+POOL_CHECKOUTS_PER_REQUEST = registry.histogram(
+    "db_pool_checkouts_per_request",
+    "Pooled connections checked out while serving one request.",
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+
+
+# Server-Timing is sent with the response headers, so it only covers the queries
+# run before them. Streamed bodies (the table exports) run their main query after
+# the headers are out; the app.sql log record is written once the body finished
+# and counts those too, as queries_after_headers.
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        settings = get_settings()
+        if scope["type"] != "http" or not settings.sql_instrumentation_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        detect = settings.debug or settings.sql_detection_enabled
+        stats = RequestQueryStats(
+            query_budget=settings.sql_query_budget if detect else 0,
+            repeat_threshold=settings.sql_repeated_statement_threshold if detect else 0,
+            raise_on_violation=detect and settings.sql_detection_raise,
+        )
+        status_code = 500
+        header_queries = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, header_queries
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header_queries = stats.count
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries", '
+                    f"db-slowest;dur={stats.slowest_time * 1000:.2f}, "
+                    f'db-checkouts;desc="{stats.checkouts}"',
+                )
+                violations = stats.violations() if detect else []
+                if violations:
+                    headers.append(QUERY_WARNINGS_HEADER, str(len(violations)))
+            await send(message)
+
+        token = begin_request_stats(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_stats(token)
+            POOL_CHECKOUTS_PER_REQUEST.observe(stats.checkouts)
+            record = {
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status_code,
+                **stats.as_log_record(),
+            }
+            if stats.count > header_queries:
+                record["queries_after_headers"] = stats.count - header_queries
+            violations = stats.violations() if detect else []
+            if violations:
+                record["violations"] = violations
+                logger.warning(json.dumps(record))
+            elif stats.count:
+                logger.info(json.dumps(record))
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+UNMATCHED_ROUTE = "unmatched"
+SIZE_BUCKETS = (256, 1024, 4096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the last response byte was sent; _count doubles as the request counter.",
+    labelnames=("method", "route", "status"),
+)
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes",
+    "Response body sizes by route template.",
+    labelnames=("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+
+
+def route_label(scope: Scope) -> str:
+    # Route templates (/api/clients/{client_id}) keep label cardinality bounded;
+    # paths that matched no route share a single label.
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method = scope["method"]
+            route = route_label(scope)
+            status = str(status_code)
+            HTTP_DURATION.observe(time.perf_counter() - started, method=method, route=route, status=status)
+            HTTP_RESPONSE_SIZE.observe(size, method=method, route=route)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date
 
-from sqlalchemy import Date, ForeignKey, Numeric
+from sqlalchemy import Date, ForeignKey, Index, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -10,6 +10,11 @@ from app.db.base import Base
 
 class Allocation(Base):
     __tablename__ = "allocations"
+    __table_args__ = (
+        Index("ix_allocations_client_id_buy_date", "client_id", "buy_date", "id"),
+        Index("ix_allocations_asset_id_buy_date", "asset_id", "buy_date", "id"),
+        Index("ix_allocations_buy_date", "buy_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"))
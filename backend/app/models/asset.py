@@ -15,4 +15,6 @@ class Asset(Base):
     exchange: Mapped[str] = mapped_column(String(128))
     currency: Mapped[str] = mapped_column(String(8))
 
-    allocations: Mapped[list[Allocation]] = relationship(back_populates="asset", cascade="all, delete-orphan")
+    allocations: Mapped[list[Allocation]] = relationship(
+        back_populates="asset", cascade="all, delete-orphan", passive_deletes=True
+    )
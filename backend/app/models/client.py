@@ -19,9 +19,11 @@ class Client(Base):
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
     )
 
+    # Children are removed by the ON DELETE CASCADE foreign keys; passive_deletes
+    # keeps the ORM from loading them just to delete them one by one.
     allocations: Mapped[list[Allocation]] = relationship(
-        back_populates="client", cascade="all, delete-orphan"
+        back_populates="client", cascade="all, delete-orphan", passive_deletes=True
     )
     movements: Mapped[list[Movement]] = relationship(
-        back_populates="client", cascade="all, delete-orphan"
+        back_populates="client", cascade="all, delete-orphan", passive_deletes=True
     )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 from enum import Enum
 
-from sqlalchemy import Date, Enum as SqlEnum, ForeignKey, Numeric, String
+from sqlalchemy import Date, Enum as SqlEnum, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -16,6 +16,11 @@ class MovementType(str, Enum):
 
 class Movement(Base):
     __tablename__ = "movements"
+    __table_args__ = (
+        Index("ix_movements_client_id_date", "client_id", "date", "id"),
+        Index("ix_movements_type_date", "type", "date", "id"),
+        Index("ix_movements_date", "date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"))
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+BULK_MAX_ITEMS = 10_000
+
+
+class BulkCreate(BaseModel):
+    # Items are validated one by one by the endpoint so a bad row is reported with
+    # its index instead of rejecting the whole request.
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+    atomic: bool = False
+
+
+class BulkRowError(BaseModel):
+    index: int
+    errors: list[str]
+
+
+class BulkResult(BaseModel, Generic[T]):
+    created: list[T]
+    errors: list[BulkRowError]
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, EmailStr
 
+from app.services.jobs import JobStatus
+
 
 class ClientBase(BaseModel):
     name: str
@@ -24,3 +26,17 @@ class ClientRead(ClientBase):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ClientDeleteJobRead(BaseModel):
+    id: str
+    client_id: int
+    status: JobStatus
+    progress: float
+    deleted_rows: int
+    total_rows: int | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    expires_at: datetime | None
+    error: str | None
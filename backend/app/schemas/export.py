@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.models.movement import MovementType
+from app.services.jobs import JobStatus
+
+ExportKind = Literal["clients", "allocations", "movements", "dashboard"]
+TableExportFormat = Literal["csv", "parquet", "arrow"]
+ExportFormat = Literal["csv", "xlsx", "parquet", "arrow"]
+
+
+class ExportFilters(BaseModel):
+    search: str | None = None
+    is_active: bool | None = None
+    client_id: int | None = Field(default=None, ge=1)
+    asset_id: int | None = Field(default=None, ge=1)
+    movement_type: MovementType | None = None
+    start_date: date | None = None
+    end_date: date | None = None
+    since_id: int | None = Field(default=None, ge=0)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class ExportJobCreate(BaseModel):
+    kind: ExportKind
+    format: ExportFormat = "csv"
+    filters: ExportFilters = Field(default_factory=ExportFilters)
+
+    @model_validator(mode="after")
+    def check_format(self) -> "ExportJobCreate":
+        if (self.kind == "dashboard") != (self.format == "xlsx"):
+            expected = "xlsx" if self.kind == "dashboard" else "csv, parquet or arrow"
+            raise ValueError(f"{self.kind} exports are only available as {expected}")
+        return self
+
+
+class ExportJobRead(BaseModel):
+    id: str
+    kind: str
+    format: str
+    status: JobStatus
+    progress: float
+    processed_rows: int
+    total_rows: int | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    expires_at: datetime | None
+    error: str | None
+    watermark: int | None
+    download_url: str | None
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.services.jobs import JobStatus
+
+ImportKind = Literal["movements", "allocations"]
+ImportFormat = Literal["csv", "xlsx"]
+
+
+class ImportJobRead(BaseModel):
+    id: str
+    kind: str
+    format: str
+    status: JobStatus
+    progress: float
+    processed_rows: int
+    total_rows: int | None
+    imported_rows: int
+    rejected_rows: int
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    expires_at: datetime | None
+    error: str | None
+    rejects_url: str | None
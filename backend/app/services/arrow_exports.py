@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import io
+from typing import Any, AsyncIterator, Callable, Sequence
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.core.config import get_settings
+from app.core.executor import get_worker_pool
+from app.models.movement import MovementType
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Movement types are encoded against one fixed dictionary, so every batch shares it
+# and IPC streams never need dictionary replacements.
+MOVEMENT_TYPES = pa.array([member.value for member in MovementType], type=pa.string())
+_MOVEMENT_TYPE_INDEX = {member: index for index, member in enumerate(MovementType)}
+
+ARROW_SCHEMAS: dict[str, pa.Schema] = {
+    "clients": pa.schema(
+        [
+            pa.field("id", pa.int64(), nullable=False),
+            pa.field("name", pa.string()),
+            pa.field("email", pa.string()),
+            pa.field("is_active", pa.bool_()),
+            pa.field("created_at", pa.timestamp("us", tz="UTC")),
+        ]
+    ),
+    "allocations": pa.schema(
+        [
+            pa.field("id", pa.int64(), nullable=False),
+            pa.field("client_id", pa.int64()),
+            pa.field("asset_id", pa.int64()),
+            pa.field("quantity", pa.decimal128(18, 4)),
+            pa.field("buy_price", pa.decimal128(18, 4)),
+            pa.field("buy_date", pa.date32()),
+        ]
+    ),
+    "movements": pa.schema(
+        [
+            pa.field("id", pa.int64(), nullable=False),
+            pa.field("client_id", pa.int64()),
+            pa.field("type", pa.dictionary(pa.int8(), pa.string())),
+            pa.field("amount", pa.decimal128(18, 2)),
+            pa.field("date", pa.date32()),
+            pa.field("note", pa.string()),
+        ]
+    ),
+}
+
+
+def _movement_types(values: Sequence[MovementType | str | None]) -> pa.DictionaryArray:
+    indices = pa.array(
+        [None if value is None else _MOVEMENT_TYPE_INDEX[MovementType(value)] for value in values],
+        type=pa.int8(),
+    )
+    return pa.DictionaryArray.from_arrays(indices, MOVEMENT_TYPES)
+
+
+def rows_to_record_batch(kind: str, rows: Sequence[tuple[Any, ...]]) -> pa.RecordBatch:
+    # Module-level and tuple-only so it can run in a worker process.
+    schema = ARROW_SCHEMAS[kind]
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(_movement_types(values))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _DrainableSink(io.RawIOBase):
+    # Parquet footers record absolute offsets, so tell() keeps counting even though
+    # written bytes are handed out and dropped after every batch.
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        view = memoryview(data)
+        self._buffer += view
+        self._position += view.nbytes
+        return view.nbytes
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class _ArrowEncoder:
+    def __init__(self, export_format: str, schema: pa.Schema, row_group_size: int) -> None:
+        self.sink = _DrainableSink()
+        self.row_group_size = row_group_size
+        self._pending: list[pa.RecordBatch] = []
+        self._pending_rows = 0
+        stream = pa.PythonFile(self.sink, mode="w")
+        if export_format == "parquet":
+            self._parquet: pq.ParquetWriter | None = pq.ParquetWriter(stream, schema, compression="zstd")
+            self._ipc = None
+        else:
+            self._parquet = None
+            self._ipc = ipc.new_stream(stream, schema)
+
+    def write(self, batch: pa.RecordBatch) -> bytes:
+        if self._ipc is not None:
+            self._ipc.write_batch(batch)
+            return self.sink.drain()
+        # Small cursor batches are gathered into proper row groups.
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush_row_group()
+        return self.sink.drain()
+
+    def _flush_row_group(self) -> None:
+        if self._pending and self._parquet is not None:
+            self._parquet.write_table(pa.Table.from_batches(self._pending))
+        self._pending = []
+        self._pending_rows = 0
+
+    def close(self) -> bytes:
+        if self._parquet is not None:
+            self._flush_row_group()
+            self._parquet.close()
+        elif self._ipc is not None:
+            self._ipc.close()
+        return self.sink.drain()
+
+
+async def stream_arrow(
+    session: AsyncSession,
+    stmt: Select[Any],
+    kind: str,
+    export_format: str,
+    *,
+    yield_per: int | None = None,
+    on_rows: Callable[[int], None] | None = None,
+) -> AsyncIterator[bytes]:
+    # Same shape as stream_csv: cursor batches are converted to Arrow record batches
+    # in the worker pool and the encoded bytes are sent as soon as they exist. The
+    # writer is stateful, so it runs on the pool's threads.
+    settings = get_settings()
+    pool = get_worker_pool()
+    encoder = _ArrowEncoder(export_format, ARROW_SCHEMAS[kind], settings.export_parquet_row_group_size)
+    try:
+        header = encoder.sink.drain()
+        if header:
+            yield header
+        result = await session.stream(stmt.execution_options(yield_per=yield_per or settings.export_yield_per))
+        async for rows in result.partitions():
+            batch = await pool.run_streaming(rows_to_record_batch, kind, [tuple(row) for row in rows])
+            data = await pool.run_streaming(encoder.write, batch, local=True)
+            if on_rows is not None:
+                on_rows(len(rows))
+            if data:
+                yield data
+        tail = await pool.run_streaming(encoder.close, local=True)
+        if tail:
+            yield tail
+    finally:
+        await session.close()
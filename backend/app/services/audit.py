@@ -1,14 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any
+import math
+import re
+from datetime import UTC, datetime
+from typing import Any, Iterable
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import ColumnElement, event, func, insert, or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
 
+from app.core.config import get_settings
+from app.core.metrics import registry
 from app.models.audit_log import AuditLog
 
 logger = logging.getLogger(__name__)
 
+PENDING_AUDIT_KEY = "pending_audit_rows"
+METADATA_FILTER_PREFIX = "metadata."
+_METADATA_KEY = re.compile(r"^[A-Za-z0-9_]{1,64}$")
+
+AUDIT_EVENTS_WRITTEN = registry.counter(
+    "audit_events_written_total",
+    "Audit events written by the batched writer.",
+)
+AUDIT_EVENTS_DROPPED = registry.counter(
+    "audit_events_dropped_total",
+    "Audit events lost because a batch insert failed.",
+)
+AUDIT_FLUSH_SECONDS = registry.histogram(
+    "audit_flush_seconds",
+    "Duration of batched audit inserts.",
+)
+
 
 def _ensure_serializable(value: Any) -> Any:
     if isinstance(value, (str, int, float, bool)) or value is None:
@@ -16,6 +42,205 @@ def _ensure_serializable(value: Any) -> Any:
     return str(value)
 
 
+def parse_metadata_filters(params: Iterable[tuple[str, str]]) -> dict[str, str]:
+    filters: dict[str, str] = {}
+    for name, value in params:
+        if not name.startswith(METADATA_FILTER_PREFIX):
+            continue
+        key = name[len(METADATA_FILTER_PREFIX) :]
+        if not _METADATA_KEY.match(key):
+            raise ValueError(f"Invalid metadata filter key: {key!r}")
+        filters[key] = value
+    return filters
+
+
+def metadata_value_candidates(raw: str) -> list[Any]:
+    # Query strings are untyped, while metadata keeps ints/bools as JSON scalars, so
+    # "42" must match both 42 and "42".
+    candidates: list[Any] = [raw]
+    lowered = raw.lower()
+    if lowered in ("true", "false"):
+        candidates.append(lowered == "true")
+    else:
+        try:
+            candidates.append(int(raw))
+        except ValueError:
+            try:
+                number = float(raw)
+            except ValueError:
+                pass
+            else:
+                # "nan"/"inf" parse as floats but are not JSON numbers.
+                if math.isfinite(number):
+                    candidates.append(number)
+    return candidates
+
+
+def metadata_filter_clause(dialect_name: str, key: str, raw: str) -> ColumnElement[bool]:
+    candidates = metadata_value_candidates(raw)
+    if dialect_name == "postgresql":
+        # Containment (@>) is what the jsonb_path_ops GIN index supports.
+        document = type_coerce(AuditLog.data, JSONB)
+        return or_(*(document.contains({key: value}) for value in candidates))
+    extracted = func.json_extract(AuditLog.data, f"$.{key}")
+    return or_(*(extracted == value for value in candidates))
+
+
+# Buffers committed audit events and inserts them in multi-row batches. A slot is
+# reserved when an event is logged, so producers wait once max_pending events are
+# queued or in flight. Events reach the queue only when the request transaction
+# commits; rolled back events just release their slot. Only a transaction's first
+# event may wait: one that already holds slots would wait on itself (or on another
+# transaction waiting for its slots), so its further events go inline when full.
+class AuditLogWriter:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self._slots = asyncio.Semaphore(max(max_pending, 1))
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+
+    async def reserve(self, *, wait: bool = True) -> bool:
+        if not wait and self._slots.locked():
+            return False
+        await self._slots.acquire()
+        return True
+
+    def release(self, count: int = 1) -> None:
+        for _ in range(count):
+            self._slots.release()
+
+    def submit(self, rows: list[dict[str, Any]]) -> None:
+        for row in rows:
+            self._queue.put_nowait(row)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    closing = True
+                    break
+                batch.append(row)
+            await self._write(batch)
+
+    async def _write(self, rows: list[dict[str, Any]]) -> None:
+        started = asyncio.get_running_loop().time()
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(AuditLog), rows)
+                await session.commit()
+            AUDIT_EVENTS_WRITTEN.inc(len(rows))
+        except Exception as exc:  # noqa: BLE001
+            AUDIT_EVENTS_DROPPED.inc(len(rows))
+            logger.error("Failed to write %s audit events: %s", len(rows), exc)
+        finally:
+            AUDIT_FLUSH_SECONDS.observe(asyncio.get_running_loop().time() - started)
+            self.release(len(rows))
+
+    async def flush(self) -> None:
+        rows: list[dict[str, Any]] = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                rows.append(row)
+        for start in range(0, len(rows), self.batch_size):
+            await self._write(rows[start : start + self.batch_size])
+
+    async def stop(self) -> None:
+        # The sentinel lets the worker finish the batch it is writing before exiting.
+        if self._task is not None:
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+_writer: AuditLogWriter | None = None
+
+
+def get_audit_writer() -> AuditLogWriter | None:
+    if _writer is not None and _writer.running:
+        return _writer
+    return None
+
+
+def start_audit_writer(session_factory: async_sessionmaker[AsyncSession] | None = None) -> AuditLogWriter | None:
+    global _writer
+    settings = get_settings()
+    if not settings.audit_async_enabled:
+        return None
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    _writer = AuditLogWriter(
+        session_factory,
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval_ms / 1000,
+        max_pending=settings.audit_max_pending,
+    )
+    _writer.start()
+    return _writer
+
+
+async def stop_audit_writer() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.stop()
+        _writer = None
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending_audit(session: Session) -> None:
+    rows = session.info.pop(PENDING_AUDIT_KEY, None)
+    if not rows:
+        return
+    writer = _writer
+    if writer is None:
+        logger.warning("Audit writer stopped before %s committed events were queued", len(rows))
+        return
+    writer.submit(rows)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_rolled_back_audit(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is not None:
+        return
+    rows = session.info.pop(PENDING_AUDIT_KEY, None)
+    if rows and _writer is not None:
+        _writer.release(len(rows))
+
+
 async def log_audit_event(
     session: AsyncSession,
     *,
@@ -24,18 +249,28 @@ async def log_audit_event(
     entity: str,
     entity_id: int | str | None = None,
     metadata: dict[str, Any] | None = None,
+    durable: bool = False,
 ) -> None:
     payload = metadata or {}
     safe_metadata = {key: _ensure_serializable(value) for key, value in payload.items()}
+    values = {
+        "user_id": user_id,
+        "action": action,
+        "entity": entity,
+        "entity_id": str(entity_id) if entity_id is not None else None,
+        "data": safe_metadata or None,
+    }
+
+    writer = None if durable else get_audit_writer()
+    if writer is not None and await writer.reserve(wait=not session.info.get(PENDING_AUDIT_KEY)):
+        if not session.in_transaction():
+            # Pending rows are tied to the transaction outcome, so make sure one exists.
+            session.sync_session.begin()
+        values["created_at"] = datetime.now(UTC)
+        session.info.setdefault(PENDING_AUDIT_KEY, []).append(values)
+        return
 
-    log_entry = AuditLog(
-        user_id=user_id,
-        action=action,
-        entity=entity,
-        entity_id=str(entity_id) if entity_id is not None else None,
-        data=safe_metadata or None,
-    )
     try:
-        session.add(log_entry)
+        session.add(AuditLog(**values))
     except Exception as exc:  # pragma: no cover - defensive
         logger.warning("Failed to enqueue audit log for %s:%s (%s)", entity, entity_id, exc)
@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.sql import Select
+
+from app.core.config import get_settings
+from app.models.audit_log import AuditLog
+from app.models.user import User
+from app.schemas.audit import AuditLogRead, AuditLogUser
+from app.schemas.pagination import Paginated, PaginationMeta
+from app.services.audit import metadata_value_candidates
+from app.utils.pagination import normalize_pagination
+
+logger = logging.getLogger(__name__)
+
+# Archived rows live in one gzip-compressed JSONL file per day:
+#   <archive_dir>/<YYYY>/<MM>/audit-<YYYY-MM-DD>.jsonl.gz
+# Each archive run appends a new gzip member, which gzip readers concatenate.
+# manifest.json records the newest archived timestamp plus the row count and
+# committed byte size of every file, so readers can tell whether the archive may
+# hold matches, and how many rows a file has, without decompressing anything.
+ARCHIVE_GLOB = "*/*/audit-*.jsonl.gz"
+MANIFEST_NAME = "manifest.json"
+MAX_CACHED_COUNTS = 4_096
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def archive_path(archive_dir: Path, day: date) -> Path:
+    return archive_dir / f"{day:%Y}" / f"{day:%m}" / f"audit-{day.isoformat()}.jsonl.gz"
+
+
+def serialize_audit_log(log: AuditLog) -> dict[str, Any]:
+    return {
+        "id": log.id,
+        "user_id": log.user_id,
+        "action": log.action,
+        "entity": log.entity,
+        "entity_id": log.entity_id,
+        "metadata": log.data,
+        "created_at": _as_utc(log.created_at).isoformat(),
+    }
+
+
+def _read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    # A retention run interrupted mid-write can leave a truncated member at the end
+    # of a file; its rows were never deleted from the hot table, so skipping the
+    # rest of the file loses nothing.
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                yield json.loads(line)
+    except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError) as exc:
+        logger.warning("Skipping unreadable tail of audit archive %s: %s", path, exc)
+
+
+def _scan_manifest(archive_dir: Path) -> dict[str, Any]:
+    manifest: dict[str, Any] = {"newest": None, "files": {}}
+    for path in archive_dir.glob(ARCHIVE_GLOB):
+        rows = 0
+        for row in _read_rows(path):
+            rows += 1
+            if manifest["newest"] is None or row["created_at"] > manifest["newest"]:
+                manifest["newest"] = row["created_at"]
+        manifest["files"][path.relative_to(archive_dir).as_posix()] = {
+            "rows": rows,
+            "bytes": path.stat().st_size,
+        }
+    return manifest
+
+
+def read_manifest(archive_dir: Path) -> dict[str, Any]:
+    try:
+        return json.loads((archive_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        # Archives written before the manifest existed.
+        return _scan_manifest(archive_dir) if archive_dir.is_dir() else {"newest": None, "files": {}}
+
+
+def _write_manifest(archive_dir: Path, manifest: dict[str, Any]) -> None:
+    path = archive_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _append_archive(archive_dir: Path, rows: list[dict[str, Any]]) -> None:
+    by_day: defaultdict[date, list[dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        by_day[datetime.fromisoformat(row["created_at"]).date()].append(row)
+    manifest = read_manifest(archive_dir)
+    for day, day_rows in by_day.items():
+        path = archive_path(archive_dir, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = manifest["files"].setdefault(path.relative_to(archive_dir).as_posix(), {"rows": 0, "bytes": 0})
+        member = gzip.compress(
+            "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in day_rows).encode("utf-8")
+        )
+        with open(path, "ab") as handle:
+            # Drop whatever an interrupted run left past the last committed member.
+            handle.truncate(entry["bytes"])
+            handle.write(member)
+            handle.flush()
+            os.fsync(handle.fileno())
+        entry["rows"] += len(day_rows)
+        entry["bytes"] += len(member)
+        newest = max(row["created_at"] for row in day_rows)
+        if manifest["newest"] is None or newest > manifest["newest"]:
+            manifest["newest"] = newest
+    _write_manifest(archive_dir, manifest)
+
+
+@dataclass
+class ArchiveReport:
+    cutoff: datetime
+    archived: int = 0
+    batches: int = 0
+    files: set[str] = field(default_factory=set)
+
+
+async def archive_audit_logs(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    cutoff: datetime,
+    archive_dir: Path,
+    batch_size: int,
+) -> ArchiveReport:
+    # Rows are written to disk before they are deleted, so a crash between the two
+    # steps can leave duplicates in the archive but never loses rows; readers skip
+    # repeated ids.
+    report = ArchiveReport(cutoff=cutoff)
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(AuditLog)
+                .where(AuditLog.created_at < cutoff)
+                .order_by(AuditLog.created_at, AuditLog.id)
+                .limit(batch_size)
+            )
+            logs = list(result.scalars().all())
+            if not logs:
+                break
+            rows = [serialize_audit_log(log) for log in logs]
+            await asyncio.to_thread(_append_archive, archive_dir, rows)
+            await session.execute(
+                delete(AuditLog)
+                .where(AuditLog.id.in_([log.id for log in logs]))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        report.archived += len(rows)
+        report.batches += 1
+        report.files.update(
+            str(archive_path(archive_dir, datetime.fromisoformat(row["created_at"]).date())) for row in rows
+        )
+        if len(logs) < batch_size:
+            break
+    return report
+
+
+@dataclass
+class ArchiveQuery:
+    starts_at: datetime | None = None
+    ends_at: datetime | None = None
+    action: str | None = None
+    entity: str | None = None
+    user_id: int | None = None
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def filters_rows(self) -> bool:
+        return bool(self.action or self.entity or self.user_id or self.metadata)
+
+    def signature(self) -> tuple[Any, ...]:
+        return (
+            self.starts_at,
+            self.ends_at,
+            self.action,
+            self.entity,
+            self.user_id,
+            tuple(sorted(self.metadata.items())),
+        )
+
+    def matches(self, row: dict[str, Any], created_at: datetime) -> bool:
+        if self.starts_at is not None and created_at < _as_utc(self.starts_at):
+            return False
+        if self.ends_at is not None and created_at > _as_utc(self.ends_at):
+            return False
+        if self.action and row.get("action") != self.action:
+            return False
+        if self.entity and row.get("entity") != self.entity:
+            return False
+        if self.user_id and row.get("user_id") != self.user_id:
+            return False
+        if self.metadata:
+            document = row.get("metadata") or {}
+            for key, raw in self.metadata.items():
+                if key not in document or document[key] not in metadata_value_candidates(raw):
+                    return False
+        return True
+
+
+def _archive_days(archive_dir: Path, query: ArchiveQuery) -> list[tuple[date, Path]]:
+    first = _as_utc(query.starts_at).date() if query.starts_at else None
+    last = _as_utc(query.ends_at).date() if query.ends_at else None
+    days: list[tuple[date, Path]] = []
+    for path in archive_dir.glob(ARCHIVE_GLOB):
+        try:
+            day = date.fromisoformat(path.name[len("audit-") : -len(".jsonl.gz")])
+        except ValueError:
+            continue
+        if (first and day < first) or (last and day > last):
+            continue
+        days.append((day, path))
+    days.sort(reverse=True)
+    return days
+
+
+def _day_matches(path: Path, query: ArchiveQuery) -> list[dict[str, Any]]:
+    # Newest first. The file is decompressed as a stream and filtered line by line;
+    # only the matches of a single day are held in memory to order them. A crash
+    # between archiving and deleting can repeat rows within a day, so ids are
+    # deduplicated per file.
+    seen: set[int] = set()
+    matches: list[tuple[datetime, int, dict[str, Any]]] = []
+    for row in _read_rows(path):
+        created_at = datetime.fromisoformat(row["created_at"])
+        if row["id"] in seen or not query.matches(row, created_at):
+            continue
+        seen.add(row["id"])
+        matches.append((created_at, row["id"], row))
+    matches.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [row for _, _, row in matches]
+
+
+def _fully_covered(day: date, query: ArchiveQuery) -> bool:
+    return (query.starts_at is None or _as_utc(query.starts_at).date() < day) and (
+        query.ends_at is None or day < _as_utc(query.ends_at).date()
+    )
+
+
+# Match counts of files that had to be scanned, keyed by file size so an append
+# invalidates them: paging through a filtered query scans each file once. Scans
+# run in worker threads, hence the lock.
+_match_counts: OrderedDict[tuple[str, int, tuple[Any, ...]], int] = OrderedDict()
+_match_counts_lock = threading.Lock()
+
+
+def _match_count(archive_dir: Path, day: date, path: Path, query: ArchiveQuery, manifest: dict[str, Any]) -> int:
+    entry = manifest["files"].get(path.relative_to(archive_dir).as_posix())
+    if entry is not None and not query.filters_rows and _fully_covered(day, query):
+        return entry["rows"]
+    key = (str(path), path.stat().st_size, query.signature())
+    with _match_counts_lock:
+        count = _match_counts.get(key)
+        if count is not None:
+            _match_counts.move_to_end(key)
+            return count
+    count = len(_day_matches(path, query))
+    with _match_counts_lock:
+        _match_counts[key] = count
+        if len(_match_counts) > MAX_CACHED_COUNTS:
+            _match_counts.popitem(last=False)
+    return count
+
+
+def estimate_archive_total(archive_dir: Path, query: ArchiveQuery) -> int:
+    # Manifest row counts of the files in range, without decompressing anything:
+    # exact for unfiltered queries over whole days, an upper bound otherwise.
+    files = read_manifest(archive_dir)["files"]
+    return sum(
+        files.get(path.relative_to(archive_dir).as_posix(), {}).get("rows", 0)
+        for _, path in _archive_days(archive_dir, query)
+    )
+
+
+def iter_archived(archive_dir: Path, query: ArchiveQuery) -> Iterator[dict[str, Any]]:
+    for _, path in _archive_days(archive_dir, query):
+        yield from _day_matches(path, query)
+
+
+def scan_archive_page(
+    archive_dir: Path,
+    query: ArchiveQuery,
+    *,
+    offset: int,
+    limit: int,
+) -> tuple[int, list[dict[str, Any]]]:
+    # The total comes from per-file counts; only the files the page falls in are
+    # decompressed for their rows.
+    manifest = read_manifest(archive_dir)
+    total = 0
+    page: list[dict[str, Any]] = []
+    for day, path in _archive_days(archive_dir, query):
+        count = _match_count(archive_dir, day, path, query, manifest)
+        if count and len(page) < limit and total + count > offset:
+            rows = _day_matches(path, query)
+            start = max(offset - total, 0)
+            page.extend(rows[start : start + limit - len(page)])
+        total += count
+    return total, page
+
+
+def archive_applies(starts_at: datetime | None) -> bool:
+    # Compared against what was actually archived rather than the configured
+    # retention, since run_retention(--older-than-days) can archive newer rows.
+    archive_dir = Path(get_settings().audit_archive_dir)
+    if not archive_dir.is_dir():
+        return False
+    newest = read_manifest(archive_dir).get("newest")
+    if newest is None:
+        return False
+    return starts_at is None or _as_utc(starts_at) <= datetime.fromisoformat(newest)
+
+
+async def _archived_items(session: AsyncSession, rows: list[dict[str, Any]]) -> list[AuditLogRead]:
+    user_ids = {row["user_id"] for row in rows if row.get("user_id") is not None}
+    users: dict[int, AuditLogUser] = {}
+    if user_ids:
+        result = await session.execute(select(User).where(User.id.in_(user_ids)))
+        users = {user.id: AuditLogUser.model_validate(user) for user in result.scalars().all()}
+    return [AuditLogRead(**row, user=users.get(row.get("user_id"))) for row in rows]
+
+
+async def paginate_with_archive(
+    session: AsyncSession,
+    stmt: Select[Any],
+    query: ArchiveQuery,
+    *,
+    page: int,
+    page_size: int,
+) -> Paginated[AuditLogRead]:
+    # Archiving always removes the oldest rows first, so every row still in the hot
+    # table is newer than every archived row: the archive simply continues the hot
+    # listing (newest first). Pages served entirely from the hot table never scan
+    # the archive; their total uses the manifest estimate, which the first page
+    # that reaches the archive replaces with the exact count.
+    archive_dir = Path(get_settings().audit_archive_dir)
+    page, page_size = normalize_pagination(page, page_size)
+    count_stmt = stmt.order_by(None).with_only_columns(func.count(), maintain_column_froms=True)
+    hot_total = int((await session.execute(count_stmt)).scalar_one() or 0)
+
+    async def load(offset: int) -> tuple[int, list[AuditLogRead]]:
+        items: list[AuditLogRead] = []
+        if offset < hot_total:
+            result = await session.execute(stmt.offset(offset).limit(page_size))
+            items = [AuditLogRead.model_validate(log) for log in result.unique().scalars().all()]
+        if offset + page_size <= hot_total:
+            return hot_total + await asyncio.to_thread(estimate_archive_total, archive_dir, query), items
+        archive_total, rows = await asyncio.to_thread(
+            scan_archive_page,
+            archive_dir,
+            query,
+            offset=max(offset - hot_total, 0),
+            limit=page_size - len(items),
+        )
+        items.extend(await _archived_items(session, rows))
+        return hot_total + archive_total, items
+
+    total, items = await load((page - 1) * page_size)
+    meta = PaginationMeta.create(total=total, page=page, page_size=page_size)
+    if total and meta.page != page:
+        _, items = await load((meta.page - 1) * page_size)
+    return Paginated(items=items, meta=meta)
+
+
+async def run_retention(older_than_days: int | None = None) -> ArchiveReport:
+    from app.db.session import AsyncSessionLocal
+
+    settings = get_settings()
+    days = settings.audit_retention_days if older_than_days is None else older_than_days
+    return await archive_audit_logs(
+        AsyncSessionLocal,
+        cutoff=datetime.now(UTC) - timedelta(days=days),
+        archive_dir=Path(settings.audit_archive_dir),
+        batch_size=settings.audit_archive_batch_size,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move old audit logs into compressed archive files.")
+    parser.add_argument("--older-than-days", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(run_retention(args.older_than_days))
+    logger.info(
+        "Archived %s audit logs older than %s in %s batches (%s files)",
+        report.archived,
+        report.cutoff.isoformat(),
+        report.batches,
+        len(report.files),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Sequence, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import Base
+from app.schemas.bulk import BulkRowError
+from app.services.audit import log_audit_event
+from app.services.writes import commit_write
+
+M = TypeVar("M", bound=BaseModel)
+
+# Keeps IN lists for reference checks well below driver parameter limits.
+REFERENCE_CHUNK = 1_000
+
+
+@dataclass
+class BulkOutcome:
+    created: list[dict[str, Any]] = field(default_factory=list)
+    errors: list[BulkRowError] = field(default_factory=list)
+
+
+def _format_validation_error(exc: ValidationError) -> list[str]:
+    messages = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error["loc"])
+        messages.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return messages
+
+
+def validate_rows(schema: type[M], items: Sequence[dict[str, Any]]) -> tuple[list[tuple[int, M]], list[BulkRowError]]:
+    valid: list[tuple[int, M]] = []
+    errors: list[BulkRowError] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors.append(BulkRowError(index=index, errors=_format_validation_error(exc)))
+    return valid, errors
+
+
+async def find_missing_references(
+    session: AsyncSession,
+    rows: Sequence[tuple[int, BaseModel]],
+    references: dict[str, type[Base]],
+) -> list[BulkRowError]:
+    # One query per referenced table instead of relying on the FK violation, which
+    # would abort the whole statement without saying which row was wrong.
+    missing_by_index: dict[int, list[str]] = {}
+    for attribute, model in references.items():
+        wanted = sorted({getattr(row, attribute) for _, row in rows})
+        existing: set[int] = set()
+        for start in range(0, len(wanted), REFERENCE_CHUNK):
+            chunk = wanted[start : start + REFERENCE_CHUNK]
+            result = await session.execute(select(model.id).where(model.id.in_(chunk)))
+            existing.update(result.scalars().all())
+        for index, row in rows:
+            value = getattr(row, attribute)
+            if value not in existing:
+                missing_by_index.setdefault(index, []).append(f"{attribute}: {value} does not exist")
+    return [BulkRowError(index=index, errors=messages) for index, messages in sorted(missing_by_index.items())]
+
+
+async def create_in_bulk(
+    session: AsyncSession,
+    *,
+    model: type[Base],
+    schema: type[M],
+    items: Sequence[dict[str, Any]],
+    references: dict[str, type[Base]],
+    atomic: bool,
+    user_id: int | None,
+    entity: str,
+) -> BulkOutcome:
+    valid, errors = validate_rows(schema, items)
+    if valid:
+        errors.extend(await find_missing_references(session, valid, references))
+    errors.sort(key=lambda error: error.index)
+    outcome = BulkOutcome(errors=errors)
+
+    rejected = {error.index for error in errors}
+    accepted = [row.model_dump() for index, row in valid if index not in rejected]
+    if not accepted or (atomic and errors):
+        return outcome
+
+    # executemany with RETURNING is batched into multi-row INSERTs by SQLAlchemy;
+    # sort_by_parameter_order keeps the rows aligned with the input. Returning every
+    # column gives the stored values, server defaults included, for the response.
+    result = await session.execute(
+        insert(model).returning(*model.__table__.columns, sort_by_parameter_order=True),
+        accepted,
+    )
+    created = [dict(row) for row in result.mappings().all()]
+    ids = [row["id"] for row in created]
+    await log_audit_event(
+        session,
+        user_id=user_id,
+        action=f"{entity}.bulk_created",
+        entity=entity,
+        metadata={"count": len(ids), "first_id": ids[0], "last_id": ids[-1]},
+    )
+    await commit_write(session)
+    outcome.created = created
+    return outcome
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.allocation import Allocation
+from app.models.client import Client
+from app.models.movement import Movement
+from app.schemas.client import ClientDeleteJobRead
+from app.services.audit import log_audit_event
+from app.services.dashboard_metrics import invalidate_dashboard_metrics
+from app.services.jobs import Job, JobManager, JobRunner
+from app.services.writes import commit_write
+
+DEPENDENT_MODELS = (Movement, Allocation)
+
+
+async def count_client_dependents(session: AsyncSession, client_id: int) -> int:
+    stmt = select(
+        *(
+            select(func.count(model.id)).where(model.client_id == client_id).scalar_subquery()
+            for model in DEPENDENT_MODELS
+        )
+    )
+    return sum((await session.execute(stmt)).one())
+
+
+async def log_client_deleted(session: AsyncSession, client: Client, *, user_id: int | None, dependents: int) -> None:
+    await log_audit_event(
+        session,
+        user_id=user_id,
+        action="client.deleted",
+        entity="client",
+        entity_id=client.id,
+        metadata={"email": client.email, "name": client.name, "dependents": dependents},
+    )
+
+
+async def delete_client_in_batches(
+    session: AsyncSession,
+    client: Client,
+    *,
+    user_id: int | None,
+    batch_size: int,
+    on_batch: Callable[[int], None] | None = None,
+) -> int:
+    # Each batch is its own short transaction, so locks and WAL stay bounded and
+    # an interrupted job keeps its progress; the client row goes last. Caches are
+    # invalidated by the final commit, or on failure once any batch was committed.
+    deleted = 0
+    try:
+        for model in DEPENDENT_MODELS:
+            while True:
+                batch = select(model.id).where(model.client_id == client.id).limit(batch_size).scalar_subquery()
+                result = await session.execute(
+                    delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                deleted += result.rowcount
+                if on_batch is not None:
+                    on_batch(deleted)
+                if result.rowcount < batch_size:
+                    break
+        await log_client_deleted(session, client, user_id=user_id, dependents=deleted)
+        await session.execute(delete(Client).where(Client.id == client.id))
+        await commit_write(session)
+    except BaseException:
+        if deleted > 0:
+            await invalidate_dashboard_metrics()
+        raise
+    return deleted
+
+
+class ClientDeleteJobs:
+    def __init__(
+        self,
+        manager: JobManager,
+        *,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int,
+    ) -> None:
+        self.manager = manager
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    def submit(self, client: Client, user_id: int | None, dependents: int) -> Job:
+        job = self.manager.submit(
+            "client.delete",
+            self._runner(client.id, user_id),
+            key=f"client.delete:{client.id}",
+            owner_id=user_id,
+            details={"client_id": client.id},
+        )
+        if job.total is None:
+            job.total = dependents
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.manager.get(job_id)
+
+    def describe(self, job: Job) -> ClientDeleteJobRead:
+        return ClientDeleteJobRead(
+            id=job.id,
+            client_id=job.details["client_id"],
+            status=job.status,
+            progress=round(job.progress, 4),
+            deleted_rows=job.processed,
+            total_rows=job.total,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            expires_at=self.manager.expires_at(job),
+            error=job.error,
+        )
+
+    def _runner(self, client_id: int, user_id: int | None) -> JobRunner:
+        async def run(job: Job) -> None:
+            def progress(deleted: int) -> None:
+                job.processed = deleted
+
+            async with self.session_factory() as session:
+                client = await session.get(Client, client_id)
+                if client is None:
+                    return
+                job.total = await count_client_dependents(session, client_id)
+                await delete_client_in_batches(
+                    session,
+                    client,
+                    user_id=user_id,
+                    batch_size=self.batch_size,
+                    on_batch=progress,
+                )
+
+        return run
+
+
+_jobs: ClientDeleteJobs | None = None
+
+
+def get_client_delete_jobs() -> ClientDeleteJobs:
+    global _jobs
+    if _jobs is None:
+        from app.db.session import AsyncSessionLocal
+
+        settings = get_settings()
+        _jobs = ClientDeleteJobs(
+            JobManager(concurrency=1, ttl=timedelta(seconds=settings.delete_jobs_ttl_seconds)),
+            session_factory=AsyncSessionLocal,
+            batch_size=settings.delete_batch_size,
+        )
+    return _jobs
+
+
+async def shutdown_client_delete_jobs() -> None:
+    global _jobs
+    if _jobs is not None:
+        await _jobs.manager.shutdown()
+        _jobs = None
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import hashlib
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import redis_get_or_set
+from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.models.client import Client
+from app.models.movement import Movement
+
+DATA_VERSION_KEY = "data:version"
+VERSIONED_MODELS = (Client, Asset, Allocation, Movement)
+
+# Bumped next to the Redis counter (see invalidate_dashboard_metrics) so this
+# process notices its own writes even while Redis is down.
+_local_version = 0
+
+
+def bump_local_data_version() -> None:
+    global _local_version
+    _local_version += 1
+
+
+async def current_data_version(session: AsyncSession) -> str:
+    # The shared Redis counter is bumped on every write that invalidates the
+    # dashboard. A missing key is seeded with the current time rather than 0, so a
+    # flushed Redis never reuses a version seen before. Without Redis, fall back
+    # to row counts and max ids, which catch inserts and deletes made anywhere but
+    # in-place updates only from this process.
+    version = await redis_get_or_set(DATA_VERSION_KEY, str(time.time_ns()))
+    if version is not None:
+        return f"r{version}"
+
+    stmt = select(
+        *(select(func.count(model.id)).scalar_subquery() for model in VERSIONED_MODELS),
+        *(select(func.max(model.id)).scalar_subquery() for model in VERSIONED_MODELS),
+    )
+    row = (await session.execute(stmt)).one()
+    fingerprint = hashlib.sha256(repr(tuple(row)).encode()).hexdigest()[:16]
+    return f"l{_local_version}-{fingerprint}"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import IO, Any
+
+from app.core.config import get_settings
+
+
+def export_cache_key(kind: str, export_format: str, filters: dict[str, Any], data_version: str) -> str:
+    payload = json.dumps(
+        {"kind": kind, "format": export_format, "filters": filters, "version": data_version},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+# Generated artifacts stored on local disk under their content key, which already
+# includes the data version, so entries never need invalidation: a write simply
+# makes the next lookup miss. Least recently used files are pruned past max_bytes.
+class ExportCache:
+    def __init__(self, directory: Path, *, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key: str, extension: str) -> Path:
+        return self.directory / f"{key}.{extension}"
+
+    def lookup(self, key: str, extension: str) -> Path | None:
+        path = self.path(key, extension)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key: str, extension: str, source: IO[bytes]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(key, extension)
+        with source, tempfile.NamedTemporaryFile(dir=self.directory, suffix=".part", delete=False) as handle:
+            shutil.copyfileobj(source, handle)
+        Path(handle.name).replace(target)
+        self.prune(keep=target)
+        return target
+
+    def prune(self, keep: Path | None = None) -> None:
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".part" or not path.is_file():
+                continue
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_cache: ExportCache | None = None
+
+
+def get_export_cache() -> ExportCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = ExportCache(Path(settings.export_cache_dir), max_bytes=settings.export_cache_max_bytes)
+    return _cache
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import time
+from contextlib import AbstractAsyncContextManager
+from datetime import timedelta
+from pathlib import Path
+from typing import IO, Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.executor import WorkerPool
+from app.schemas.export import ExportJobCreate, ExportJobRead
+from app.services.export_cache import export_cache_key
+from app.services.exports import (
+    EXPORT_EXTENSIONS,
+    build_dashboard_workbook,
+    export_statement,
+    export_watermark,
+    stream_table_export,
+)
+from app.services.jobs import Job, JobManager, JobRunner
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+def export_job_key(request: ExportJobCreate, user_id: int | None, data_version: str | None = None) -> str:
+    # Including the data version means a finished job is only reused while it
+    # still reflects the current data. Jobs are only visible to their owner, so
+    # they are only shared between requests of the same user.
+    return export_cache_key(
+        request.kind,
+        request.format,
+        {"user_id": user_id, **request.filters.model_dump(mode="json")},
+        data_version or "",
+    )
+
+
+def export_session() -> AbstractAsyncContextManager[AsyncSession]:
+    # Jobs are deduplicated by data version, so they read from the primary: a
+    # lagging replica would store old rows under the current version.
+    from app.db.session import primary_session
+
+    return primary_session(statement_timeout_ms=get_settings().db_export_statement_timeout_ms)
+
+
+# Job steps run on a small pool of their own, one thread per concurrent export
+# job: each job only waits on its own previous step, so a busy request pool can
+# neither fail a job with WorkerPoolBusy nor be starved by one.
+_export_job_pool: WorkerPool | None = None
+
+
+def get_export_job_pool() -> WorkerPool:
+    global _export_job_pool
+    if _export_job_pool is None:
+        workers = max(get_settings().export_jobs_concurrency, 1)
+        _export_job_pool = WorkerPool(kind="thread", max_workers=workers, max_pending=workers, queue_timeout=60.0)
+    return _export_job_pool
+
+
+def shutdown_export_job_pool() -> None:
+    global _export_job_pool
+    if _export_job_pool is not None:
+        _export_job_pool.shutdown()
+        _export_job_pool = None
+
+
+def _copy_file(source: IO[bytes], target: Path) -> None:
+    with source, target.open("wb") as handle:
+        shutil.copyfileobj(source, handle)
+
+
+def sweep_export_dir(export_dir: Path, ttl: timedelta) -> int:
+    # Job state lives in memory, so artifacts left behind by a previous process are
+    # only reachable here.
+    if not export_dir.is_dir():
+        return 0
+    cutoff = time.time() - ttl.total_seconds()
+    removed = 0
+    for path in export_dir.iterdir():
+        if path.is_file() and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+class ExportJobService:
+    def __init__(self, manager: JobManager, *, export_dir: Path, session_factory: SessionFactory) -> None:
+        self.manager = manager
+        self.export_dir = export_dir
+        self.session_factory = session_factory
+
+    def submit(self, request: ExportJobCreate, user_id: int | None, *, data_version: str | None = None) -> Job:
+        return self.manager.submit(
+            f"export.{request.kind}",
+            self._runner(request),
+            key=export_job_key(request, user_id, data_version),
+            owner_id=user_id,
+            details={"kind": request.kind, "format": request.format},
+        )
+
+    def get(self, job_id: str) -> Job | None:
+        return self.manager.get(job_id)
+
+    def describe(self, job: Job, download_url: str | None = None) -> ExportJobRead:
+        return ExportJobRead(
+            id=job.id,
+            kind=job.details["kind"],
+            format=job.details["format"],
+            status=job.status,
+            progress=round(job.progress, 4),
+            processed_rows=job.processed,
+            total_rows=job.total,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            expires_at=self.manager.expires_at(job),
+            error=job.error,
+            watermark=job.details.get("watermark"),
+            download_url=download_url if job.artifact is not None else None,
+        )
+
+    def _runner(self, request: ExportJobCreate) -> JobRunner:
+        async def run(job: Job) -> None:
+            self.export_dir.mkdir(parents=True, exist_ok=True)
+            target = self.export_dir / f"{job.id}.{EXPORT_EXTENSIONS[request.format]}"
+            partial = target.with_name(target.name + ".part")
+            try:
+                async with self.session_factory() as session:
+                    if request.kind == "dashboard":
+                        pool = get_export_job_pool()
+                        workbook, _ = await build_dashboard_workbook(session, pool=pool)
+                        await pool.run_local(_copy_file, workbook, partial)
+                    else:
+                        await self._write_table(job, session, request, partial)
+                partial.replace(target)
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+            job.artifact = target
+
+        return run
+
+    async def _write_table(self, job: Job, session: AsyncSession, request: ExportJobCreate, path: Path) -> None:
+        watermark = await export_watermark(session, request.kind, request.filters)
+        job.details["watermark"] = watermark
+        stmt = export_statement(request.kind, request.filters, until_id=watermark)
+        count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+        job.total = int((await session.execute(count_stmt)).scalar_one())
+
+        def advance(rows: int) -> None:
+            job.processed += rows
+
+        pool = get_export_job_pool()
+        with path.open("wb") as handle:
+            chunks = stream_table_export(
+                session,
+                request.kind,
+                request.filters,
+                request.format,
+                until_id=watermark,
+                on_rows=advance,
+            )
+            async for chunk in chunks:
+                await pool.run_local(handle.write, chunk)
+
+
+_service: ExportJobService | None = None
+
+
+def get_export_jobs() -> ExportJobService:
+    global _service
+    if _service is None:
+        settings = get_settings()
+        ttl = timedelta(seconds=settings.export_jobs_ttl_seconds)
+        export_dir = Path(settings.export_jobs_dir)
+        sweep_export_dir(export_dir, ttl)
+        _service = ExportJobService(
+            JobManager(concurrency=settings.export_jobs_concurrency, ttl=ttl),
+            export_dir=export_dir,
+            session_factory=export_session,
+        )
+    return _service
+
+
+async def shutdown_export_jobs() -> None:
+    global _service
+    if _service is not None:
+        await _service.manager.shutdown()
+        _service = None
+    shutdown_export_job_pool()
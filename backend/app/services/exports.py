@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+from enum import Enum
+from typing import IO, Any, AsyncIterator, Callable, Sequence
+
+from openpyxl import Workbook
+from sqlalchemy import Row, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.core.config import get_settings
+from app.core.executor import WorkerPool, get_worker_pool
+from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+from app.schemas.export import ExportFilters
+from app.services.arrow_exports import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, stream_arrow
+from app.services.dashboard_metrics import DashboardMetrics, DashboardMetricsAccumulator
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": XLSX_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "xlsx": "xlsx", "parquet": "parquet", "arrow": "arrows"}
+# Finished workbooks stay in memory up to this size and are spilled to disk above it.
+XLSX_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+DASHBOARD_SHEETS: dict[str, list[str]] = {
+    "KPIs": ["Indicador", "Valor", "Variacao (%)"],
+    "Resumo Mov.": ["Entradas", "Saidas", "Saldo liquido"],
+    "Custodia": ["Mes", "Valor acumulado"],
+    "Fluxo": ["Mes", "Entradas", "Saidas", "Saldo liquido"],
+    "Mix de Ativos": ["Ativo", "Valor investido", "Participacao (%)"],
+    "Clientes": ["ID", "Nome", "Email", "Ativo", "Total investido", "Criado em"],
+    "Alocacoes": [
+        "ID",
+        "Cliente",
+        "Ticker",
+        "Ativo",
+        "Quantidade",
+        "Preco de compra",
+        "Valor investido",
+        "Data da compra",
+        "Moeda",
+    ],
+    "Movimentacoes": ["ID", "Cliente", "Tipo", "Valor", "Data", "Observacao"],
+}
+
+
+EXPORT_MODELS: dict[str, Any] = {"clients": Client, "allocations": Allocation, "movements": Movement}
+
+
+def _export_conditions(kind: str, filters: ExportFilters) -> list[Any]:
+    # Mirrors the filters of the matching list endpoints.
+    model = EXPORT_MODELS[kind]
+    conditions: list[Any] = []
+    if filters.since_id is not None:
+        conditions.append(model.id > filters.since_id)
+    if kind == "clients":
+        if filters.search:
+            pattern = f"%{filters.search}%"
+            conditions.append(or_(Client.name.ilike(pattern), Client.email.ilike(pattern)))
+        if filters.is_active is not None:
+            conditions.append(Client.is_active == filters.is_active)
+    elif kind == "allocations":
+        if filters.client_id is not None:
+            conditions.append(Allocation.client_id == filters.client_id)
+        if filters.asset_id is not None:
+            conditions.append(Allocation.asset_id == filters.asset_id)
+        if filters.start_date is not None:
+            conditions.append(Allocation.buy_date >= filters.start_date)
+        if filters.end_date is not None:
+            conditions.append(Allocation.buy_date <= filters.end_date)
+    elif kind == "movements":
+        if filters.client_id is not None:
+            conditions.append(Movement.client_id == filters.client_id)
+        if filters.movement_type is not None:
+            conditions.append(Movement.type == filters.movement_type)
+        if filters.start_date is not None:
+            conditions.append(Movement.date >= filters.start_date)
+        if filters.end_date is not None:
+            conditions.append(Movement.date <= filters.end_date)
+    return conditions
+
+
+def export_statement(kind: str, filters: ExportFilters, *, until_id: int | None = None) -> Select[Any]:
+    # Column selects rather than entities: rows stay plain tuples and never enter
+    # the identity map while they are streamed.
+    if kind == "clients":
+        stmt = select(Client.id, Client.name, Client.email, Client.is_active, Client.created_at)
+    elif kind == "allocations":
+        stmt = select(
+            Allocation.id,
+            Allocation.client_id,
+            Allocation.asset_id,
+            Allocation.quantity,
+            Allocation.buy_price,
+            Allocation.buy_date,
+        )
+    elif kind == "movements":
+        stmt = select(
+            Movement.id,
+            Movement.client_id,
+            Movement.type,
+            Movement.amount,
+            Movement.date,
+            Movement.note,
+        )
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+    model = EXPORT_MODELS[kind]
+    conditions = _export_conditions(kind, filters)
+    if until_id is not None:
+        conditions.append(model.id <= until_id)
+    if conditions:
+        stmt = stmt.where(*conditions)
+    return stmt.order_by(model.id)
+
+
+async def export_watermark(session: AsyncSession, kind: str, filters: ExportFilters) -> int | None:
+    # The highest id the export will contain. Exports are capped at it, so rows
+    # committed while the export streams are left for the next incremental run
+    # instead of racing the header; callers pass it back as since_id next time.
+    model = EXPORT_MODELS[kind]
+    conditions = _export_conditions(kind, filters)
+    stmt = select(func.max(model.id))
+    if conditions:
+        stmt = stmt.where(*conditions)
+    highest = (await session.execute(stmt)).scalar_one_or_none()
+    if highest is None:
+        return filters.since_id
+    return int(highest)
+
+
+def export_columns(stmt: Select[Any]) -> list[str]:
+    return [column.key for column in stmt.selected_columns]
+
+
+def csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return str(value.value)
+    return str(value)
+
+
+def encode_csv_rows(rows: Sequence[tuple[Any, ...]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([csv_value(value) for value in row])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_csv(
+    session: AsyncSession,
+    stmt: Select[Any],
+    columns: Sequence[str],
+    *,
+    yield_per: int | None = None,
+    chunk_bytes: int | None = None,
+    on_rows: Callable[[int], None] | None = None,
+) -> AsyncIterator[bytes]:
+    # Rows come from a server-side cursor in batches of ``yield_per``; each batch is
+    # encoded in the worker pool (run_streaming, so a busy pool cannot cut the
+    # download short) and sent out in ``chunk_bytes`` slices, so memory
+    # stays flat regardless of the table size. FastAPI closes yield dependencies
+    # before the body is streamed, so the query runs lazily here and the session is
+    # closed at the end.
+    settings = get_settings()
+    yield_per = yield_per or settings.export_yield_per
+    chunk_bytes = chunk_bytes or settings.export_chunk_bytes
+    pool = get_worker_pool()
+
+    pending = bytearray(encode_csv_rows([tuple(columns)]))
+    try:
+        result = await session.stream(stmt.execution_options(yield_per=yield_per))
+        async for rows in result.partitions():
+            pending += await pool.run_streaming(encode_csv_rows, [tuple(row) for row in rows])
+            if on_rows is not None:
+                on_rows(len(rows))
+            while len(pending) >= chunk_bytes:
+                yield bytes(pending[:chunk_bytes])
+                del pending[:chunk_bytes]
+        if pending:
+            yield bytes(pending)
+    finally:
+        await session.close()
+
+
+def stream_table_export(
+    session: AsyncSession,
+    kind: str,
+    filters: ExportFilters,
+    export_format: str,
+    *,
+    until_id: int | None = None,
+    on_rows: Callable[[int], None] | None = None,
+) -> AsyncIterator[bytes]:
+    stmt = export_statement(kind, filters, until_id=until_id)
+    if export_format == "csv":
+        return stream_csv(session, stmt, export_columns(stmt), on_rows=on_rows)
+    return stream_arrow(session, stmt, kind, export_format, on_rows=on_rows)
+
+
+def _bool_label(value: bool) -> str:
+    return "Sim" if value else "Nao"
+
+
+def _append_allocations(sheet: Any, accumulator: DashboardMetricsAccumulator, rows: Sequence[Row[Any]]) -> None:
+    for (
+        allocation_id,
+        client_id,
+        asset_id,
+        quantity,
+        buy_price,
+        buy_date,
+        client_name,
+        ticker,
+        asset_name,
+        currency,
+    ) in rows:
+        if ticker is not None:
+            accumulator.add_asset(asset_id, ticker, asset_name)
+        invested_value = accumulator.add_allocation(client_id, asset_id, quantity, buy_price, buy_date)
+        sheet.append(
+            [
+                allocation_id,
+                client_name if client_name is not None else str(client_id),
+                ticker if ticker is not None else str(asset_id),
+                asset_name or "",
+                round(float(quantity or 0), 4),
+                round(float(buy_price or 0), 4),
+                invested_value,
+                buy_date.isoformat(),
+                currency or "",
+            ]
+        )
+
+
+def _append_movements(sheet: Any, accumulator: DashboardMetricsAccumulator, rows: Sequence[Row[Any]]) -> None:
+    for movement_id, client_id, movement_type, amount, movement_date, note, client_name in rows:
+        value = accumulator.add_movement(movement_type, amount, movement_date)
+        sheet.append(
+            [
+                movement_id,
+                client_name if client_name is not None else str(client_id),
+                "Deposito" if movement_type == MovementType.deposit else "Retirada",
+                value,
+                movement_date.isoformat(),
+                note or "",
+            ]
+        )
+
+
+def _append_clients(sheet: Any, accumulator: DashboardMetricsAccumulator, rows: Sequence[Row[Any]]) -> None:
+    totals = accumulator.allocation_totals_by_client
+    for client_id, name, email, is_active, created_at in rows:
+        accumulator.add_client(is_active)
+        sheet.append(
+            [
+                client_id,
+                name,
+                email,
+                _bool_label(is_active),
+                round(totals.get(client_id, 0.0), 2),
+                created_at.isoformat(),
+            ]
+        )
+
+
+def _append_summaries(sheets: dict[str, Any], metrics: DashboardMetrics) -> None:
+    for entry in metrics["kpis"]:
+        sheets["KPIs"].append([entry["indicator"], entry["value"], round(entry["variation"], 2)])
+    totals = metrics["movement_totals"]
+    sheets["Resumo Mov."].append(
+        [round(totals["deposits"], 2), round(totals["withdrawals"], 2), round(totals["net"], 2)]
+    )
+    for point in metrics["custody_series"]:
+        sheets["Custodia"].append([point["label"], round(point["value"], 2)])
+    for point in metrics["flow_series"]:
+        sheets["Fluxo"].append(
+            [point["label"], round(point["inflow"], 2), round(point["outflow"], 2), round(point["net"], 2)]
+        )
+    for entry in metrics["allocation_mix"]:
+        sheets["Mix de Ativos"].append([entry["label"], round(entry["value"], 2), round(entry["share"], 2)])
+
+
+async def build_dashboard_workbook(
+    session: AsyncSession,
+    *,
+    yield_per: int | None = None,
+    pool: WorkerPool | None = None,
+) -> tuple[IO[bytes], DashboardMetrics]:
+    # openpyxl's write-only worksheets spill appended rows to their own temp files,
+    # so every sheet can be filled straight from a streamed query and nothing but
+    # the aggregates is kept in memory. Sheet appends and the final zip run in the
+    # worker pool's threads (the workbook cannot cross a process boundary), one
+    # streamed partition at a time, to keep the event loop free.
+    yield_per = yield_per or get_settings().export_yield_per
+    pool = pool or get_worker_pool()
+    workbook = Workbook(write_only=True)
+    sheets = {title: workbook.create_sheet(title) for title in DASHBOARD_SHEETS}
+    for title, header in DASHBOARD_SHEETS.items():
+        sheets[title].append(header)
+
+    accumulator = DashboardMetricsAccumulator()
+    sources = [
+        (
+            sheets["Alocacoes"],
+            _append_allocations,
+            select(
+                Allocation.id,
+                Allocation.client_id,
+                Allocation.asset_id,
+                Allocation.quantity,
+                Allocation.buy_price,
+                Allocation.buy_date,
+                Client.name,
+                Asset.ticker,
+                Asset.name,
+                Asset.currency,
+            )
+            .outerjoin(Client, Client.id == Allocation.client_id)
+            .outerjoin(Asset, Asset.id == Allocation.asset_id)
+            .order_by(Allocation.id),
+        ),
+        (
+            sheets["Movimentacoes"],
+            _append_movements,
+            select(
+                Movement.id,
+                Movement.client_id,
+                Movement.type,
+                Movement.amount,
+                Movement.date,
+                Movement.note,
+                Client.name,
+            )
+            .outerjoin(Client, Client.id == Movement.client_id)
+            .order_by(Movement.id),
+        ),
+        # Clients go last because their sheet shows the allocation totals.
+        (
+            sheets["Clientes"],
+            _append_clients,
+            select(Client.id, Client.name, Client.email, Client.is_active, Client.created_at).order_by(Client.id),
+        ),
+    ]
+    for sheet, append_rows, stmt in sources:
+        result = await session.stream(stmt.execution_options(yield_per=yield_per))
+        async for rows in result.partitions():
+            await pool.run_local(append_rows, sheet, accumulator, rows)
+
+    metrics = accumulator.result()
+    _append_summaries(sheets, metrics)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_BYTES)
+    try:
+        await pool.run_local(workbook.save, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, metrics
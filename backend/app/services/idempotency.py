@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis_client
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Delete, refresh or complete the reservation only while it still holds our token,
+# so a request whose lock expired cannot touch a newer holder's key.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_REPLACE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class IdempotencyKeyMismatch(ValueError):
+    pass
+
+
+class IdempotencyInProgress(RuntimeError):
+    pass
+
+
+class IdempotentReplay(Exception):
+    def __init__(self, status_code: int, body: Any) -> None:
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.body = body
+
+
+class MemoryIdempotencyStore:
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[str, float]] = {}
+
+    def _current(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[0]
+
+    async def reserve(self, key: str, value: str, ttl: int) -> str | None:
+        existing = self._current(key)
+        if existing is not None:
+            return existing
+        self._entries[key] = (value, time.monotonic() + ttl)
+        return None
+
+    async def replace(self, key: str, token: str, value: str, ttl: int) -> bool:
+        if self._current(key) != token:
+            return False
+        self._entries[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def release(self, key: str, value: str) -> None:
+        if self._current(key) == value:
+            del self._entries[key]
+
+
+class RedisIdempotencyStore:
+    # Falls back to process-local storage while Redis is unreachable, which still
+    # protects retries that land on the same worker.
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+        self.fallback = MemoryIdempotencyStore()
+
+    async def reserve(self, key: str, value: str, ttl: int) -> str | None:
+        try:
+            if await self.client.set(key, value, nx=True, ex=ttl):
+                return None
+            existing = await self.client.get(key)
+        except RedisError as exc:
+            logger.warning("Redis idempotency reserve failed for %s: %s", key, exc)
+            return await self.fallback.reserve(key, value, ttl)
+        # The holder may have released between SET NX and GET; try again.
+        return existing if existing is not None else await self.reserve(key, value, ttl)
+
+    async def replace(self, key: str, token: str, value: str, ttl: int) -> bool:
+        try:
+            return bool(await self.client.eval(_REPLACE_SCRIPT, 1, key, token, value, ttl))
+        except RedisError as exc:
+            logger.warning("Redis idempotency store failed for %s: %s", key, exc)
+            return await self.fallback.replace(key, token, value, ttl)
+
+    async def release(self, key: str, value: str) -> None:
+        try:
+            await self.client.eval(_RELEASE_SCRIPT, 1, key, value)
+        except RedisError as exc:
+            logger.warning("Redis idempotency release failed for %s: %s", key, exc)
+            await self.fallback.release(key, value)
+
+
+IdempotencyStore = MemoryIdempotencyStore | RedisIdempotencyStore
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# The pending reservation expires after IDEMPOTENCY_LOCK_SECONDS; a heartbeat
+# re-sets it every third of that while the handler runs, so slow writes keep it
+# and a crashed worker's reservation still frees up quickly.
+@dataclass
+class IdempotentRequest:
+    store: IdempotencyStore
+    key: str
+    fingerprint: str
+    token: str
+    ttl: int
+    lock_ttl: int
+    completed: bool = False
+    _heartbeat: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    def start_heartbeat(self) -> None:
+        self._heartbeat = asyncio.create_task(self._refresh(), name=f"idempotency-heartbeat:{self.key}")
+
+    async def _refresh(self) -> None:
+        interval = max(self.lock_ttl / 3, 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.store.replace(self.key, self.token, self.token, self.lock_ttl):
+                logger.warning("Lost the idempotency reservation for %s", self.key)
+                return
+
+    async def _stop_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat
+            self._heartbeat = None
+
+    async def save(self, status_code: int, body: Any) -> None:
+        await self._stop_heartbeat()
+        record = {
+            "fingerprint": self.fingerprint,
+            "status": "completed",
+            "status_code": status_code,
+            "body": jsonable_encoder(body),
+        }
+        self.completed = await self.store.replace(self.key, self.token, json.dumps(record), self.ttl)
+        if not self.completed:
+            # Another request took the key over; leave its reservation alone.
+            logger.warning("Idempotency reservation for %s expired before the response was saved", self.key)
+
+    async def release(self) -> None:
+        # Failed requests give the key back so a retry can run the write again.
+        await self._stop_heartbeat()
+        if not self.completed:
+            await self.store.release(self.key, self.token)
+
+
+async def begin_idempotent_request(
+    store: IdempotencyStore,
+    key: str,
+    fingerprint: str,
+) -> IdempotentRequest:
+    # A duplicate that arrives while the first request is still running polls until
+    # that request saves its response (replayed) or fails (the key is free again).
+    settings = get_settings()
+    token = json.dumps({"fingerprint": fingerprint, "status": "pending", "token": uuid.uuid4().hex})
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        existing = await store.reserve(key, token, settings.idempotency_lock_seconds)
+        if existing is None:
+            request = IdempotentRequest(
+                store=store,
+                key=key,
+                fingerprint=fingerprint,
+                token=token,
+                ttl=settings.idempotency_ttl_seconds,
+                lock_ttl=settings.idempotency_lock_seconds,
+            )
+            request.start_heartbeat()
+            return request
+        record = json.loads(existing)
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyKeyMismatch(f"{IDEMPOTENCY_HEADER} was already used for a different request")
+        if record["status"] == "completed":
+            raise IdempotentReplay(record["status_code"], record["body"])
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress(f"A request with this {IDEMPOTENCY_HEADER} is still in progress")
+        await asyncio.sleep(settings.idempotency_poll_interval_ms / 1000)
+
+
+_store: RedisIdempotencyStore | None = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        _store = RedisIdempotencyStore(get_redis_client())
+    return _store
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.schemas.imports import ImportJobRead
+from app.services.importer import ImportReport, run_import, shutdown_import_pool
+from app.services.jobs import Job, JobManager, JobRunner
+
+
+class ImportTooLarge(ValueError):
+    pass
+
+
+class ImportJobService:
+    def __init__(
+        self,
+        manager: JobManager,
+        *,
+        import_dir: Path,
+        session_factory: Callable[[], AsyncSession],
+        max_bytes: int,
+    ) -> None:
+        self.manager = manager
+        self.import_dir = import_dir
+        self.session_factory = session_factory
+        self.max_bytes = max_bytes
+
+    async def receive(self, chunks: AsyncIterator[bytes], import_format: str) -> Path:
+        # The body goes straight to disk as it arrives; nothing is buffered in memory.
+        self.import_dir.mkdir(parents=True, exist_ok=True)
+        path = self.import_dir / f"{uuid.uuid4().hex}.{import_format}"
+        size = 0
+        try:
+            with path.open("wb") as handle:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImportTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                    await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return path
+
+    def submit(self, kind: str, path: Path, import_format: str, user_id: int | None) -> Job:
+        return self.manager.submit(
+            f"import.{kind}",
+            self._runner(kind, path, import_format, user_id),
+            owner_id=user_id,
+            details={"kind": kind, "format": import_format, "imported": 0, "rejected": 0},
+        )
+
+    def get(self, job_id: str) -> Job | None:
+        return self.manager.get(job_id)
+
+    def describe(self, job: Job, rejects_url: str | None = None) -> ImportJobRead:
+        return ImportJobRead(
+            id=job.id,
+            kind=job.details["kind"],
+            format=job.details["format"],
+            status=job.status,
+            progress=round(job.progress, 4),
+            processed_rows=job.processed,
+            total_rows=job.total,
+            imported_rows=job.details["imported"],
+            rejected_rows=job.details["rejected"],
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            expires_at=self.manager.expires_at(job),
+            error=job.error,
+            rejects_url=rejects_url if job.artifact is not None else None,
+        )
+
+    def _runner(self, kind: str, path: Path, import_format: str, user_id: int | None) -> JobRunner:
+        async def run(job: Job) -> None:
+            def progress(report: ImportReport) -> None:
+                job.processed = report.processed
+                job.total = report.total
+                job.details["imported"] = report.imported
+                job.details["rejected"] = report.rejected
+
+            try:
+                report = await run_import(
+                    self.session_factory,
+                    kind,
+                    path,
+                    import_format,
+                    user_id=user_id,
+                    rejects_path=path.with_name(f"{job.id}.rejects.csv"),
+                    on_progress=progress,
+                )
+            finally:
+                path.unlink(missing_ok=True)
+            progress(report)
+            job.artifact = report.rejects_path
+
+        return run
+
+
+_service: ImportJobService | None = None
+
+
+def get_import_jobs() -> ImportJobService:
+    global _service
+    if _service is None:
+        from app.db.session import AsyncSessionLocal
+
+        settings = get_settings()
+        _service = ImportJobService(
+            JobManager(
+                concurrency=settings.import_jobs_concurrency,
+                ttl=timedelta(seconds=settings.import_jobs_ttl_seconds),
+            ),
+            import_dir=Path(settings.import_dir),
+            session_factory=AsyncSessionLocal,
+            max_bytes=settings.import_max_bytes,
+        )
+    return _service
+
+
+async def shutdown_import_jobs() -> None:
+    global _service
+    if _service is not None:
+        await _service.manager.shutdown()
+        _service = None
+    shutdown_import_pool()
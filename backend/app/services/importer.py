@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from openpyxl import load_workbook
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.executor import WorkerPool
+from app.db.base import Base
+from app.models.allocation import Allocation
+from app.models.asset import Asset
+from app.models.client import Client
+from app.models.movement import Movement
+from app.schemas.allocation import AllocationCreate
+from app.schemas.movement import MovementCreate
+from app.services.audit import log_audit_event
+from app.services.dashboard_metrics import invalidate_dashboard_metrics
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "xlsx")
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    entity: str
+    model: type[Base]
+    schema: type[BaseModel]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.schema.model_fields)
+
+
+IMPORT_SPECS: dict[str, ImportSpec] = {
+    "movements": ImportSpec("movement", Movement, MovementCreate),
+    "allocations": ImportSpec("allocation", Allocation, AllocationCreate),
+}
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    processed: int = 0
+    imported: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    total: int | None = None
+    rejects_path: Path | None = None
+
+
+# Clients and assets are resolved from in-memory maps loaded once per import, so
+# rows may reference them by email / ticker instead of id without a query per row.
+@dataclass
+class LookupMaps:
+    client_ids: set[int] = field(default_factory=set)
+    client_by_email: dict[str, int] = field(default_factory=dict)
+    asset_ids: set[int] = field(default_factory=set)
+    asset_by_ticker: dict[str, int] = field(default_factory=dict)
+
+
+async def load_lookup_maps(session: AsyncSession) -> LookupMaps:
+    maps = LookupMaps()
+    clients = await session.stream(select(Client.id, Client.email))
+    async for client_id, email in clients:
+        maps.client_ids.add(client_id)
+        maps.client_by_email[email.lower()] = client_id
+    assets = await session.stream(select(Asset.id, Asset.ticker))
+    async for asset_id, ticker in assets:
+        maps.asset_ids.add(asset_id)
+        maps.asset_by_ticker[ticker.upper()] = asset_id
+    return maps
+
+
+def iter_csv_records(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8-sig") as handle:
+        yield from csv.DictReader(handle)
+
+
+def iter_xlsx_records(path: Path) -> Iterator[dict[str, Any]]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_records(path: Path, import_format: str) -> Iterator[dict[str, Any]]:
+    return iter_xlsx_records(path) if import_format == "xlsx" else iter_csv_records(path)
+
+
+def count_records(path: Path, import_format: str) -> int | None:
+    if import_format == "csv":
+        with path.open("rb") as handle:
+            return max(sum(1 for _ in handle) - 1, 0)
+    workbook = load_workbook(path, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+    finally:
+        workbook.close()
+    return max_row - 1 if max_row else None
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def resolve_record(spec: ImportSpec, record: dict[str, Any], maps: LookupMaps) -> tuple[BaseModel | None, list[str]]:
+    values = {key.strip(): _clean(value) for key, value in record.items() if key}
+    errors: list[str] = []
+
+    email = values.pop("client_email", None)
+    if values.get("client_id") is None and email is not None:
+        values["client_id"] = maps.client_by_email.get(str(email).lower())
+        if values["client_id"] is None:
+            errors.append(f"client_email: {email} not found")
+    ticker = values.pop("ticker", None)
+    if "asset_id" in spec.columns and values.get("asset_id") is None and ticker is not None:
+        values["asset_id"] = maps.asset_by_ticker.get(str(ticker).upper())
+        if values["asset_id"] is None:
+            errors.append(f"ticker: {ticker} not found")
+    if errors:
+        return None, errors
+
+    try:
+        row = spec.schema.model_validate(values)
+    except ValidationError as exc:
+        return None, [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+    if row.client_id not in maps.client_ids:
+        errors.append(f"client_id: {row.client_id} does not exist")
+    if "asset_id" in spec.columns and row.asset_id not in maps.asset_ids:
+        errors.append(f"asset_id: {row.asset_id} does not exist")
+    return (None, errors) if errors else (row, [])
+
+
+@dataclass
+class PreparedChunk:
+    rows: list[BaseModel]
+    rejects: list[tuple[int, dict[str, Any], list[str]]]
+    consumed: int
+
+
+def prepare_chunk(
+    spec: ImportSpec,
+    records: Iterator[dict[str, Any]],
+    maps: LookupMaps,
+    size: int,
+    first_line: int,
+) -> PreparedChunk:
+    rows: list[BaseModel] = []
+    rejects: list[tuple[int, dict[str, Any], list[str]]] = []
+    consumed = 0
+    for offset, record in enumerate(islice(records, size)):
+        consumed += 1
+        row, errors = resolve_record(spec, record, maps)
+        if row is None:
+            rejects.append((first_line + offset, record, errors))
+        else:
+            rows.append(row)
+    return PreparedChunk(rows=rows, rejects=rejects, consumed=consumed)
+
+
+def _copy_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+async def load_rows(session: AsyncSession, spec: ImportSpec, rows: list[BaseModel]) -> None:
+    if not rows:
+        return
+    connection = await session.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+        # COPY runs inside the session transaction on the same connection.
+        raw = await connection.get_raw_connection()
+        columns = spec.columns
+        records = [tuple(_copy_value(getattr(row, column)) for column in columns) for row in rows]
+        await raw.driver_connection.copy_records_to_table(
+            spec.model.__tablename__,
+            records=records,
+            columns=columns,
+        )
+        return
+    await session.execute(insert(spec.model), [row.model_dump() for row in rows])
+
+
+class RejectsWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle = None
+        self._writer: csv.DictWriter | None = None
+
+    def write(self, rejects: list[tuple[int, dict[str, Any], list[str]]]) -> None:
+        for line, record, errors in rejects:
+            if self._writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handle = self.path.open("w", newline="", encoding="utf-8")
+                fieldnames = ["line", "errors", *[key for key in record if key]]
+                self._writer = csv.DictWriter(self._handle, fieldnames=fieldnames, extrasaction="ignore")
+                self._writer.writeheader()
+            self._writer.writerow({**record, "line": line, "errors": "; ".join(errors)})
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+
+
+# Parsing runs on a small pool of its own, one thread per concurrent import job,
+# so a large import cannot starve exports of the shared worker pool (or be failed
+# by it with WorkerPoolBusy). A job only ever waits on its own previous step.
+_import_pool: WorkerPool | None = None
+
+
+def get_import_pool() -> WorkerPool:
+    global _import_pool
+    if _import_pool is None:
+        workers = max(get_settings().import_jobs_concurrency, 1)
+        _import_pool = WorkerPool(kind="thread", max_workers=workers, max_pending=workers, queue_timeout=60.0)
+    return _import_pool
+
+
+def shutdown_import_pool() -> None:
+    global _import_pool
+    if _import_pool is not None:
+        _import_pool.shutdown()
+        _import_pool = None
+
+
+async def run_import(
+    session_factory: Callable[[], AsyncSession],
+    kind: str,
+    path: Path,
+    import_format: str,
+    *,
+    user_id: int | None,
+    rejects_path: Path,
+    chunk_size: int | None = None,
+    on_progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    # Each chunk is parsed and validated on a worker thread, loaded with one COPY
+    # (or multi-row INSERT) and committed, so memory is bounded by the chunk size
+    # and an interrupted import keeps the chunks already loaded. Caches are
+    # invalidated once at the end, also when the import fails after a commit.
+    spec = IMPORT_SPECS[kind]
+    chunk_size = chunk_size or get_settings().import_chunk_size
+    pool = get_import_pool()
+    report = ImportReport(kind=kind)
+    report.total = await pool.run_local(count_records, path, import_format)
+    records = iter_records(path, import_format)
+    rejects = RejectsWriter(rejects_path)
+    try:
+        async with session_factory() as session:
+            maps = await load_lookup_maps(session)
+            while True:
+                # Line numbers count the header row, matching what spreadsheets show.
+                chunk = await pool.run_local(prepare_chunk, spec, records, maps, chunk_size, report.processed + 2)
+                if not chunk.consumed:
+                    break
+                await load_rows(session, spec, chunk.rows)
+                await session.commit()
+                if chunk.rejects:
+                    await pool.run_local(rejects.write, chunk.rejects)
+                report.processed += chunk.consumed
+                report.imported += len(chunk.rows)
+                report.rejected += len(chunk.rejects)
+                report.chunks += 1
+                if on_progress is not None:
+                    on_progress(report)
+            await log_audit_event(
+                session,
+                user_id=user_id,
+                action=f"{spec.entity}.imported",
+                entity=spec.entity,
+                metadata={
+                    "file": path.name,
+                    "imported": report.imported,
+                    "rejected": report.rejected,
+                },
+            )
+            await session.commit()
+    finally:
+        records.close()
+        rejects.close()
+        if report.imported > 0:
+            await invalidate_dashboard_metrics()
+    if report.rejected:
+        report.rejects_path = rejects_path
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import allocations or movements from a CSV or XLSX file.")
+    parser.add_argument("kind", choices=sorted(IMPORT_SPECS))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    parser.add_argument("--rejects", type=Path, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    import_format = args.format or ("xlsx" if args.path.suffix.lower() == ".xlsx" else "csv")
+    rejects_path = args.rejects or args.path.with_name(f"{args.path.stem}.rejects.csv")
+
+    def progress(report: ImportReport) -> None:
+        logger.info(
+            "%s/%s rows processed (%s imported, %s rejected)",
+            report.processed,
+            report.total if report.total is not None else "?",
+            report.imported,
+            report.rejected,
+        )
+
+    async def run() -> ImportReport:
+        from app.db.session import AsyncSessionLocal, engine
+
+        try:
+            return await run_import(
+                AsyncSessionLocal,
+                args.kind,
+                args.path,
+                import_format,
+                user_id=None,
+                rejects_path=rejects_path,
+                chunk_size=args.chunk_size,
+                on_progress=progress,
+            )
+        finally:
+            shutdown_import_pool()
+            await engine.dispose()
+
+    report = asyncio.run(run())
+    logger.info("Imported %s %s, rejected %s", report.imported, args.kind, report.rejected)
+    if report.rejects_path is not None:
+        logger.info("Rejected rows written to %s", report.rejects_path)
+
+
+if __name__ == "__main__":
+    main()
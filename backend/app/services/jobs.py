@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_JOBS = registry.counter(
+    "background_jobs_total",
+    "Background jobs finished by kind and status.",
+    labelnames=("kind", "status"),
+)
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str | None = None
+    owner_id: int | None = None
+    status: JobStatus = JobStatus.queued
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    processed: int = 0
+    total: int | None = None
+    error: str | None = None
+    artifact: Path | None = None
+    details: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.succeeded, JobStatus.failed)
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.succeeded:
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(self.processed / self.total, 1.0)
+
+
+JobRunner = Callable[[Job], Awaitable[None]]
+
+
+# In-process job queue: at most ``concurrency`` jobs run at once, the rest wait on
+# the semaphore. Jobs that share a ``key`` while queued, running or still fresh
+# reuse the same job (and artifact). Finished jobs and their artifacts are dropped
+# ``ttl`` after they finish; expiry runs opportunistically on submit and lookup.
+class JobManager:
+    def __init__(self, *, concurrency: int, ttl: timedelta) -> None:
+        self.ttl = ttl
+        self._slots = asyncio.Semaphore(max(concurrency, 1))
+        self._jobs: dict[str, Job] = {}
+        self._by_key: dict[str, str] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def submit(
+        self,
+        kind: str,
+        runner: JobRunner,
+        *,
+        key: str | None = None,
+        owner_id: int | None = None,
+        details: dict[str, Any] | None = None,
+    ) -> Job:
+        self.expire()
+        if key is not None:
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status != JobStatus.failed:
+                return existing
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, key=key, owner_id=owner_id, details=details or {})
+        self._jobs[job.id] = job
+        if key is not None:
+            self._by_key[key] = job.id
+        task = asyncio.create_task(self._execute(job, runner), name=f"job-{kind}-{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self.expire()
+        return self._jobs.get(job_id)
+
+    async def _execute(self, job: Job, runner: JobRunner) -> None:
+        async with self._slots:
+            job.status = JobStatus.running
+            job.started_at = datetime.now(UTC)
+            try:
+                await runner(job)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                job.status = JobStatus.failed
+                job.error = str(exc) or exc.__class__.__name__
+                if job.artifact is not None:
+                    job.artifact.unlink(missing_ok=True)
+                    job.artifact = None
+            else:
+                job.status = JobStatus.succeeded
+            finally:
+                job.finished_at = datetime.now(UTC)
+                BACKGROUND_JOBS.inc(kind=job.kind, status=job.status.value)
+
+    def expires_at(self, job: Job) -> datetime | None:
+        return job.finished_at + self.ttl if job.finished_at else None
+
+    def expire(self, now: datetime | None = None) -> list[Job]:
+        now = now or datetime.now(UTC)
+        expired = [job for job in self._jobs.values() if job.finished and self.expires_at(job) <= now]
+        for job in expired:
+            del self._jobs[job.id]
+            if job.key is not None and self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+            if job.artifact is not None:
+                job.artifact.unlink(missing_ok=True)
+        return expired
+
+    async def join(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await self.join()
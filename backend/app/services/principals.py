@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis_client
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY_PREFIX = "auth:principal:"
+MAX_LOCAL_PRINCIPALS = 10_000
+
+PRINCIPAL_LOOKUPS = registry.counter(
+    "principal_cache_lookups_total",
+    "Authenticated principal lookups by cache tier that answered.",
+    labelnames=("source",),
+)
+
+# Authenticated users are cached per (user id, token) for a few seconds in this
+# process and, when PRINCIPAL_CACHE_REDIS_TTL_SECONDS > 0, for longer in Redis so
+# other workers share them. The JWT signature and expiry are still checked on
+# every request; the cache only replaces the users SELECT. Updating or deleting a
+# user drops all of their entries; other workers may serve their local copy until
+# its short TTL runs out.
+_local: OrderedDict[tuple[int, str], tuple[dict[str, Any], float]] = OrderedDict()
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _snapshot(user: User) -> dict[str, Any]:
+    # The password hash is deliberately left out.
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def _principal(data: dict[str, Any]) -> User:
+    # A transient User: enough for authorization and ids, never added to a session.
+    created_at = data.get("created_at")
+    return User(
+        id=data["id"],
+        name=data["name"],
+        email=data["email"],
+        is_active=data["is_active"],
+        hashed_password="",
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+    )
+
+
+async def get_cached_principal(user_id: int, token: str) -> User | None:
+    settings = get_settings()
+    key = (user_id, token_digest(token))
+    entry = _local.get(key)
+    if entry is not None:
+        if entry[1] > time.monotonic():
+            PRINCIPAL_LOOKUPS.inc(source="local")
+            return _principal(entry[0])
+        _local.pop(key, None)
+    if settings.principal_cache_redis_ttl_seconds > 0:
+        try:
+            raw = await get_redis_client().hget(f"{PRINCIPAL_KEY_PREFIX}{user_id}", key[1])
+        except RedisError as exc:
+            logger.warning("Redis principal lookup failed for %s: %s", user_id, exc)
+            raw = None
+        if raw is not None:
+            data = json.loads(raw)
+            _remember_locally(key, data)
+            PRINCIPAL_LOOKUPS.inc(source="redis")
+            return _principal(data)
+    PRINCIPAL_LOOKUPS.inc(source="database")
+    return None
+
+
+def _remember_locally(key: tuple[int, str], data: dict[str, Any]) -> None:
+    ttl = get_settings().principal_cache_ttl_seconds
+    if ttl <= 0:
+        return
+    _local[key] = (data, time.monotonic() + ttl)
+    _local.move_to_end(key)
+    while len(_local) > MAX_LOCAL_PRINCIPALS:
+        _local.popitem(last=False)
+
+
+async def cache_principal(user: User, token: str) -> None:
+    settings = get_settings()
+    key = (user.id, token_digest(token))
+    data = _snapshot(user)
+    _remember_locally(key, data)
+    if settings.principal_cache_redis_ttl_seconds > 0:
+        redis_key = f"{PRINCIPAL_KEY_PREFIX}{user.id}"
+        try:
+            async with get_redis_client().pipeline(transaction=False) as pipe:
+                pipe.hset(redis_key, key[1], json.dumps(data))
+                pipe.expire(redis_key, settings.principal_cache_redis_ttl_seconds)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Redis principal store failed for %s: %s", user.id, exc)
+
+
+async def invalidate_principal(user_id: int) -> None:
+    for key in [key for key in _local if key[0] == user_id]:
+        _local.pop(key, None)
+    if get_settings().principal_cache_redis_ttl_seconds > 0:
+        try:
+            await get_redis_client().delete(f"{PRINCIPAL_KEY_PREFIX}{user_id}")
+        except RedisError as exc:
+            logger.warning("Redis principal invalidation failed for %s: %s", user_id, exc)
+
+
+def clear_local_principals() -> None:
+    _local.clear()
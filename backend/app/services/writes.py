@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any, TypeVar
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import Base
+from app.services.dashboard_metrics import invalidate_dashboard_metrics
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+# Write path shared by the mutating routes:
+#   insert_returning -> log_audit_event -> commit_write
+# The INSERT ... RETURNING hands back the complete row (id and defaults) in one
+# statement, the audit row is flushed together with the commit, and the session
+# keeps loaded attributes after commit (expire_on_commit=False), so nothing is
+# refreshed afterwards.
+
+
+async def insert_returning(session: AsyncSession, model: type[ModelT], values: dict[str, Any]) -> ModelT:
+    result = await session.scalars(insert(model).returning(model), [values])
+    return result.one()
+
+
+async def commit_write(session: AsyncSession, *, invalidate: bool = True) -> None:
+    await session.commit()
+    if invalidate:
+        await invalidate_dashboard_metrics()
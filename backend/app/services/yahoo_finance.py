@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable
 from urllib.parse import urljoin
 
 import httpx
 
 from app.core.cache import redis_get_json, redis_set_json
 from app.core.config import get_settings
+from app.core.metrics import registry
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -18,6 +20,23 @@ if not logger.handlers:
 logger.setLevel(logging.INFO)
 logger.propagate = False
 
+UPSTREAM_SECONDS = registry.histogram(
+    "market_upstream_request_seconds",
+    "Quote lookups against external market data providers.",
+    labelnames=("provider", "outcome"),
+)
+
+
+async def _timed(provider: str, fetch: Callable[[str], Awaitable[dict[str, Any]]], symbol: str) -> dict[str, Any]:
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        quote = await fetch(symbol)
+        outcome = "ok"
+        return quote
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, provider=provider, outcome=outcome)
+
 
 class YahooFinanceClient:
     quote_api = "https://query1.finance.yahoo.com/v7/finance/quote"
@@ -119,7 +138,7 @@ class MarketDataService:
             return cached
 
         try:
-            quote = await self.yahoo.fetch_quote(symbol)
+            quote = await _timed("yahoo", self.yahoo.fetch_quote, symbol)
             logger.info("Quote fetched via Yahoo Finance for %s", symbol)
         except Exception as yahoo_error:  # noqa: BLE001
             logger.warning(
@@ -128,7 +147,7 @@ class MarketDataService:
                 yahoo_error,
             )
             try:
-                quote = await self.brapi.fetch_quote(symbol)
+                quote = await _timed("brapi", self.brapi.fetch_quote, symbol)
                 logger.info("Quote fetched via BRAPI for %s", symbol)
             except Exception as brapi_error:  # noqa: BLE001
                 logger.error(
@@ -33,7 +33,7 @@ async def paginate(
     page_size: int,
 ) -> Paginated[Any]:
     page, page_size = normalize_pagination(page, page_size)
-    count_stmt = stmt.order_by(None).with_only_columns(func.count())
+    count_stmt = stmt.order_by(None).with_only_columns(func.count(), maintain_column_froms=True)
     total_result = await session.execute(count_stmt)
     total = int(total_result.scalar_one() or 0)
     pages = ceil(total / page_size) if total else 0
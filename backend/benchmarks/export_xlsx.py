@@ -0,0 +1,215 @@
+"""Compare the pandas dashboard workbook with the streaming write-only writer.
+
+    python -m benchmarks.export_xlsx --allocations 200000 --movements 500000
+
+Each implementation runs in its own subprocess against the same seeded SQLite
+file, so the reported peak RSS (ru_maxrss) belongs to that implementation alone.
+Requires the dev requirements (pandas is only used for the baseline).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import Allocation, Asset, Client, Movement
+from app.models.movement import MovementType
+from app.services.dashboard_metrics import compute_dashboard_metrics
+from app.services.exports import build_dashboard_workbook
+
+SEED_BATCH = 10_000
+
+
+async def seed(url: str, clients: int, assets: int, allocations: int, movements: int) -> None:
+    engine = create_async_engine(url)
+    rng = random.Random(7)
+    start = date(2020, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        now = datetime.now(UTC)
+        await conn.execute(
+            insert(Client),
+            [
+                {"name": f"Client {i}", "email": f"client{i}@example.com", "is_active": i % 5 != 0, "created_at": now}
+                for i in range(clients)
+            ],
+        )
+        await conn.execute(
+            insert(Asset),
+            [
+                {"ticker": f"TCK{i}", "name": f"Asset {i}", "exchange": "B3", "currency": "BRL"}
+                for i in range(assets)
+            ],
+        )
+        for offset in range(0, allocations, SEED_BATCH):
+            await conn.execute(
+                insert(Allocation),
+                [
+                    {
+                        "client_id": rng.randint(1, clients),
+                        "asset_id": rng.randint(1, assets),
+                        "quantity": rng.randint(1, 500),
+                        "buy_price": round(rng.uniform(1, 200), 2),
+                        "buy_date": start + timedelta(days=rng.randint(0, 1500)),
+                    }
+                    for _ in range(min(SEED_BATCH, allocations - offset))
+                ],
+            )
+        for offset in range(0, movements, SEED_BATCH):
+            await conn.execute(
+                insert(Movement),
+                [
+                    {
+                        "client_id": rng.randint(1, clients),
+                        "type": rng.choice([MovementType.deposit, MovementType.withdrawal]),
+                        "amount": round(rng.uniform(10, 5000), 2),
+                        "date": start + timedelta(days=rng.randint(0, 1500)),
+                        "note": "seeded" if offset % 3 else None,
+                    }
+                    for _ in range(min(SEED_BATCH, movements - offset))
+                ],
+            )
+    await engine.dispose()
+
+
+async def run_pandas(session) -> int:
+    # The implementation that shipped before the streaming writer, kept for comparison.
+    import pandas as pd
+
+    clients = list((await session.execute(select(Client))).scalars().all())
+    assets = list((await session.execute(select(Asset))).scalars().all())
+    allocations = list((await session.execute(select(Allocation))).scalars().all())
+    movements = list((await session.execute(select(Movement))).scalars().all())
+    client_map = {client.id: client for client in clients}
+    asset_map = {asset.id: asset for asset in assets}
+    metrics = compute_dashboard_metrics(clients, assets, allocations, movements)
+
+    allocation_rows = []
+    for allocation in allocations:
+        quantity = float(allocation.quantity)
+        price = float(allocation.buy_price)
+        asset = asset_map.get(allocation.asset_id)
+        client = client_map.get(allocation.client_id)
+        allocation_rows.append(
+            {
+                "ID": allocation.id,
+                "Cliente": client.name if client else str(allocation.client_id),
+                "Ticker": asset.ticker if asset else str(allocation.asset_id),
+                "Ativo": asset.name if asset else "",
+                "Quantidade": round(quantity, 4),
+                "Preco de compra": round(price, 4),
+                "Valor investido": round(quantity * price, 2),
+                "Data da compra": allocation.buy_date.isoformat(),
+                "Moeda": asset.currency if asset else "",
+            }
+        )
+    movement_rows = []
+    for movement in movements:
+        client = client_map.get(movement.client_id)
+        movement_rows.append(
+            {
+                "ID": movement.id,
+                "Cliente": client.name if client else str(movement.client_id),
+                "Tipo": "Deposito" if movement.type == MovementType.deposit else "Retirada",
+                "Valor": round(float(movement.amount), 2),
+                "Data": movement.date.isoformat(),
+                "Observacao": movement.note or "",
+            }
+        )
+    totals = {entry["client_id"]: entry["total"] for entry in metrics["allocation_totals_by_client"]}
+    clients_rows = [
+        {
+            "ID": client.id,
+            "Nome": client.name,
+            "Email": client.email,
+            "Ativo": "Sim" if client.is_active else "Nao",
+            "Total investido": round(totals.get(client.id, 0.0), 2),
+            "Criado em": client.created_at.isoformat(),
+        }
+        for client in clients
+    ]
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        pd.DataFrame(metrics["kpis"]).to_excel(writer, sheet_name="KPIs", index=False)
+        pd.DataFrame([metrics["movement_totals"]]).to_excel(writer, sheet_name="Resumo Mov.", index=False)
+        pd.DataFrame(metrics["custody_series"]).to_excel(writer, sheet_name="Custodia", index=False)
+        pd.DataFrame(metrics["flow_series"]).to_excel(writer, sheet_name="Fluxo", index=False)
+        pd.DataFrame(metrics["allocation_mix"]).to_excel(writer, sheet_name="Mix de Ativos", index=False)
+        pd.DataFrame(clients_rows).to_excel(writer, sheet_name="Clientes", index=False)
+        pd.DataFrame(allocation_rows).to_excel(writer, sheet_name="Alocacoes", index=False)
+        pd.DataFrame(movement_rows).to_excel(writer, sheet_name="Movimentacoes", index=False)
+    return len(output.getvalue())
+
+
+async def run_streaming(session) -> int:
+    workbook, _ = await build_dashboard_workbook(session)
+    with workbook:
+        return workbook.seek(0, io.SEEK_END)
+
+
+async def measure(url: str, implementation: str) -> dict[str, float]:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    runner = run_pandas if implementation == "pandas" else run_streaming
+    started = time.perf_counter()
+    async with session_factory() as session:
+        size = await runner(session)
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    # ru_maxrss is reported in KiB on Linux.
+    return {
+        "seconds": round(elapsed, 2),
+        "peak_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "bytes": size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2_000)
+    parser.add_argument("--assets", type=int, default=300)
+    parser.add_argument("--allocations", type=int, default=100_000)
+    parser.add_argument("--movements", type=int, default=200_000)
+    parser.add_argument("--url", help="Run one implementation against an existing database (internal).")
+    parser.add_argument("--implementation", choices=["pandas", "streaming"])
+    args = parser.parse_args()
+
+    if args.url:
+        print(json.dumps(asyncio.run(measure(args.url, args.implementation))))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite+aiosqlite:///{Path(workdir) / 'bench.db'}"
+        asyncio.run(seed(url, args.clients, args.assets, args.allocations, args.movements))
+        print(f"{args.allocations} allocations, {args.movements} movements, {args.clients} clients")
+        for implementation in ("pandas", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.export_xlsx", "--url", url, "--implementation", implementation],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            print(
+                f"{implementation:>10}: {result['seconds']:>8.2f}s  "
+                f"peak RSS {result['peak_rss_mib']:>8.1f} MiB  {result['bytes']} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
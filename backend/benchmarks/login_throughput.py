@@ -0,0 +1,133 @@
+"""Measure login throughput and event-loop stalls with inline vs pooled bcrypt.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 20
+
+"inline" calls bcrypt on the event loop, as /auth/login did before the password
+pool; "pool" is the current check_password. While the logins run, a probe hits
+/health every 10 ms; its latency shows how long other requests are stalled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api import deps
+from app.core.config import get_settings
+from app.core.security import get_password_hash, verify_password
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.models.user import User
+
+PASSWORD = "benchmark-password"
+
+
+async def _inline_check_password(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def measure(users: int, logins: int, concurrency: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        done = asyncio.Event()
+        probes: list[float] = []
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def login(index: int) -> None:
+            async with slots:
+                response = await client.post(
+                    "/api/auth/login",
+                    json={"email": f"user{index % users}@example.com", "password": PASSWORD},
+                )
+                response.raise_for_status()
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(index) for index in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    probes.sort()
+    results["logins_per_second"] = logins / elapsed
+    results["probe_p50_ms"] = statistics.median(probes) * 1000
+    results["probe_max_ms"] = probes[-1] * 1000
+    return results
+
+
+async def run(url: str, users: int, logins: int, concurrency: int) -> None:
+    engine = create_async_engine(url)
+    hashed = get_password_hash(PASSWORD)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "name": f"User {index}",
+                    "email": f"user{index}@example.com",
+                    "hashed_password": hashed,
+                    "is_active": True,
+                    "created_at": datetime.now(UTC),
+                }
+                for index in range(users)
+            ],
+        )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def _get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    pooled = deps.check_password
+    print(f"{logins} logins, concurrency {concurrency}, bcrypt rounds {get_settings().bcrypt_rounds}")
+    try:
+        for name, checker in (("inline", _inline_check_password), ("pool", pooled)):
+            deps.check_password = checker
+            result = await measure(users, logins, concurrency)
+            print(
+                f"{name:>8}: {result['logins_per_second']:7.1f} logins/s  "
+                f"/health p50 {result['probe_p50_ms']:7.1f} ms  max {result['probe_max_ms']:7.1f} ms"
+            )
+    finally:
+        deps.check_password = pooled
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=None, help="Override BCRYPT_ROUNDS.")
+    args = parser.parse_args()
+
+    if args.rounds is not None:
+        get_settings().bcrypt_rounds = args.rounds
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite+aiosqlite:///{Path(workdir) / 'bench.db'}"
+        asyncio.run(run(url, args.users, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure the per-request cost of RequestMetricsMiddleware.
+
+    python -m benchmarks.request_metrics --requests 100000
+
+Requests are driven straight through the ASGI interface (no HTTP server or
+client), against a trivial endpoint with and without the middleware, so the
+difference is the middleware's own overhead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.request_metrics import RequestMetricsMiddleware
+
+
+async def _ping(_request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+def build_app(instrumented: bool):
+    app = Starlette(routes=[Route("/items/{item_id}", _ping)])
+    return RequestMetricsMiddleware(app) if instrumented else app
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/42",
+        "raw_path": b"/items/42",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message):
+        return None
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+async def run(requests: int, rounds: int) -> None:
+    # Best of several rounds, alternating variants, to damp noise.
+    best = {"plain": float("inf"), "instrumented": float("inf")}
+    for _ in range(rounds):
+        for name, app in (("plain", build_app(False)), ("instrumented", build_app(True))):
+            best[name] = min(best[name], await drive(app, requests))
+    for name, elapsed in best.items():
+        print(f"{name:>13}: {elapsed / requests * 1e6:8.2f} us/request")
+    print(f"{'overhead':>13}: {(best['instrumented'] - best['plain']) / requests * 1e6:8.2f} us/request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
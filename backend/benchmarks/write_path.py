@@ -0,0 +1,138 @@
+"""Compare per-write latency of the old create path with the shared write helper.
+
+    python -m benchmarks.write_path --writes 2000
+    python -m benchmarks.write_path --url postgresql+asyncpg://... --redis-url redis://localhost:6379/0
+
+"refresh" is the path the create routes used before app.services.writes: add,
+flush, audit, commit, refresh, then two separate Redis calls. "returning" is
+insert_returning + commit_write. Round trips matter most against a networked
+database, so pass --url (an empty, throwaway database: tables are created and
+dropped) and --redis-url for realistic numbers; without --redis-url cache
+invalidation is skipped in both variants.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.cache import get_redis_client, redis_delete
+from app.core.config import get_settings
+from app.db.base import Base
+from app.models import Client, Movement
+from app.models.movement import MovementType
+from app.services.audit import log_audit_event
+from app.services.dashboard_metrics import DASHBOARD_CACHE_KEY
+from app.services.data_version import DATA_VERSION_KEY
+from app.services.writes import commit_write, insert_returning
+
+
+def _values(client_id: int, index: int) -> dict:
+    return {
+        "client_id": client_id,
+        "type": MovementType.deposit,
+        "amount": 100 + index % 50,
+        "date": date(2024, 1, 1 + index % 28),
+        "note": None,
+    }
+
+
+async def _audit(session: AsyncSession, movement: Movement) -> None:
+    await log_audit_event(
+        session,
+        user_id=None,
+        action="movement.created",
+        entity="movement",
+        entity_id=movement.id,
+        metadata={"client_id": movement.client_id, "type": movement.type.value},
+    )
+
+
+async def write_refresh(session: AsyncSession, client_id: int, index: int, invalidate: bool) -> None:
+    movement = Movement(**_values(client_id, index))
+    session.add(movement)
+    await session.flush()
+    await _audit(session, movement)
+    await session.commit()
+    await session.refresh(movement)
+    if invalidate:
+        await redis_delete(DASHBOARD_CACHE_KEY)
+        await get_redis_client().incr(DATA_VERSION_KEY)
+
+
+async def write_returning(session: AsyncSession, client_id: int, index: int, invalidate: bool) -> None:
+    movement = await insert_returning(session, Movement, _values(client_id, index))
+    await _audit(session, movement)
+    await commit_write(session, invalidate=invalidate)
+
+
+async def run(url: str, writes: int, invalidate: bool) -> None:
+    engine = create_async_engine(url)
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_) -> None:
+        nonlocal statements
+        statements += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        result = await conn.execute(
+            insert(Client).returning(Client.id),
+            [{"name": "Bench", "email": "bench@example.com", "is_active": True, "created_at": datetime.now(UTC)}],
+        )
+        client_id = result.scalar_one()
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"{writes} writes per variant, cache invalidation {'on' if invalidate else 'off'}")
+    try:
+        for name, writer in (("refresh", write_refresh), ("returning", write_returning)):
+            for index in range(min(writes, 50)):
+                async with session_factory() as session:
+                    await writer(session, client_id, index, invalidate)
+            statements = 0
+            timings: list[float] = []
+            for index in range(writes):
+                # A fresh session per write, as each request gets one.
+                async with session_factory() as session:
+                    started = time.perf_counter()
+                    await writer(session, client_id, index, invalidate)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(
+                f"{name:>10}: p50 {statistics.median(timings) * 1000:7.3f} ms  "
+                f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:7.3f} ms  "
+                f"{statements / writes:.1f} statements/write"
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2_000)
+    parser.add_argument("--url", help="Database URL (default: a temporary SQLite file).")
+    parser.add_argument("--redis-url", help="Redis URL; enables cache invalidation in both variants.")
+    args = parser.parse_args()
+
+    if args.redis_url:
+        get_settings().redis_url = args.redis_url
+    if args.url:
+        asyncio.run(run(args.url, args.writes, bool(args.redis_url)))
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run(f"sqlite+aiosqlite:///{Path(workdir) / 'bench.db'}", args.writes, bool(args.redis_url)))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_export_db, get_read_db
 from app.db.base import Base
 from app.db.session import get_db
 from app.main import app
@@ -66,6 +66,8 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         return test_user
 
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_read_db] = _get_test_db
+    app.dependency_overrides[get_export_db] = _get_test_db
     app.dependency_overrides[get_current_active_user] = _get_test_user
 
     transport = ASGITransport(app=app)
@@ -33,3 +33,33 @@ async def test_create_allocation(client):
     data = list_response.json()
     assert data["meta"]["total"] == 1
     assert len(data["items"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_allocations(client):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Bulk Allocator", "email": "bulk-allocator@example.com", "is_active": True},
+    )
+    asset_response = await client.post(
+        "/api/assets/",
+        json={"ticker": "BULK3", "name": "Bulk SA", "exchange": "B3", "currency": "BRL"},
+    )
+    base = {
+        "client_id": client_response.json()["id"],
+        "asset_id": asset_response.json()["id"],
+        "buy_price": "12.5",
+        "buy_date": "2024-04-01",
+    }
+
+    response = await client.post(
+        "/api/allocations/bulk",
+        json={"items": [{**base, "quantity": str(quantity)} for quantity in range(1, 4)]},
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert body["errors"] == []
+    assert [item["quantity"] for item in body["created"]] == ["1.0000", "2.0000", "3.0000"]
+
+    listed = await client.get("/api/allocations/", params={"client_id": base["client_id"]})
+    assert listed.json()["meta"]["total"] == 3
@@ -1,4 +1,21 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
 import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.models import AuditLog
+from app.services.audit import (
+    AuditLogWriter,
+    log_audit_event,
+    metadata_value_candidates,
+    start_audit_writer,
+    stop_audit_writer,
+)
+from app.services import audit_archive
+from app.services.audit_archive import ARCHIVE_GLOB, archive_audit_logs
 
 
 @pytest.mark.asyncio
@@ -35,3 +52,215 @@ async def test_audit_logs_filters_by_action(client):
     data = filtered_response.json()
     assert all(item["action"] == "asset.created" for item in data["items"])
     assert data["meta"]["total"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_filter_by_metadata(client):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Metadata Holdings", "email": "metadata@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    movement_response = await client.post(
+        "/api/movements/",
+        json={"client_id": client_id, "type": "deposit", "amount": "150.00", "date": "2024-03-01"},
+    )
+    assert movement_response.status_code == 201
+    await client.post(
+        "/api/assets/",
+        json={"ticker": "mtdt3", "name": "Metadata SA", "exchange": "B3", "currency": "BRL"},
+    )
+
+    by_client = await client.get("/api/audit/", params={"metadata.client_id": str(client_id)})
+    assert by_client.status_code == 200
+    items = by_client.json()["items"]
+    assert [item["action"] for item in items] == ["movement.created"]
+    assert items[0]["data"]["client_id"] == client_id
+
+    by_ticker = await client.get("/api/audit/", params={"metadata.ticker": "MTDT3", "action": "asset.created"})
+    assert by_ticker.json()["meta"]["total"] == 1
+
+    no_match = await client.get(
+        "/api/audit/",
+        params={"metadata.client_id": str(client_id), "metadata.type": "withdrawal"},
+    )
+    assert no_match.json()["meta"]["total"] == 0
+
+    non_finite = await client.get("/api/audit/", params={"metadata.client_id": "nan"})
+    assert non_finite.status_code == 200
+    assert non_finite.json()["meta"]["total"] == 0
+
+
+def test_metadata_candidates_skip_non_finite_numbers():
+    assert metadata_value_candidates("1.5") == ["1.5", 1.5]
+    for raw in ("nan", "inf", "-Infinity"):
+        assert metadata_value_candidates(raw) == [raw]
+
+
+@pytest.mark.asyncio
+async def test_audit_logs_reject_invalid_metadata_key(client):
+    response = await client.get("/api/audit/", params={"metadata.a$b": "1"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_async_audit_writer_batches_committed_events(db_session, async_engine, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "audit_async_enabled", True)
+    monkeypatch.setattr(settings, "audit_flush_interval_ms", 60_000)
+
+    start_audit_writer(async_sessionmaker(async_engine, expire_on_commit=False))
+    try:
+        for action in ("client.created", "client.updated"):
+            await log_audit_event(db_session, user_id=None, action=action, entity="client", entity_id=1)
+        await db_session.commit()
+
+        await log_audit_event(db_session, user_id=None, action="client.deleted", entity="client", entity_id=1)
+        await db_session.rollback()
+
+        await log_audit_event(
+            db_session,
+            user_id=None,
+            action="client.exported",
+            entity="client",
+            entity_id=1,
+            durable=True,
+        )
+        await db_session.commit()
+
+        queued = await db_session.execute(select(AuditLog.action))
+        assert queued.scalars().all() == ["client.exported"]
+    finally:
+        await stop_audit_writer()
+
+    result = await db_session.execute(select(AuditLog.action))
+    assert sorted(result.scalars().all()) == ["client.created", "client.exported", "client.updated"]
+
+
+@pytest.mark.asyncio
+async def test_async_audit_writer_applies_backpressure(async_engine):
+    writer = AuditLogWriter(
+        async_sessionmaker(async_engine),
+        batch_size=10,
+        flush_interval=1.0,
+        max_pending=1,
+    )
+    await writer.reserve()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(writer.reserve(), timeout=0.05)
+    writer.release()
+    await asyncio.wait_for(writer.reserve(), timeout=0.05)
+    assert await writer.reserve(wait=False) is False
+
+
+@pytest.mark.asyncio
+async def test_transaction_logging_more_than_max_pending_does_not_wait_on_itself(
+    db_session, async_engine, monkeypatch
+):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "audit_async_enabled", True)
+    monkeypatch.setattr(settings, "audit_max_pending", 2)
+
+    start_audit_writer(async_sessionmaker(async_engine, expire_on_commit=False))
+    try:
+        for index in range(5):
+            await asyncio.wait_for(
+                log_audit_event(db_session, user_id=None, action="client.created", entity="client", entity_id=index),
+                timeout=1,
+            )
+        await db_session.commit()
+    finally:
+        await stop_audit_writer()
+
+    result = await db_session.execute(select(AuditLog.entity_id))
+    assert sorted(result.scalars().all()) == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_archived_audit_logs_are_served_from_cold_storage(
+    client, db_session, async_engine, tmp_path, monkeypatch
+):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "audit_archive_dir", str(tmp_path))
+    now = datetime.now(UTC)
+    db_session.add_all(
+        [
+            AuditLog(user_id=1, action="client.created", entity="client", created_at=now - timedelta(days=500)),
+            AuditLog(user_id=1, action="client.updated", entity="client", created_at=now - timedelta(days=400)),
+            AuditLog(user_id=1, action="client.updated", entity="client", created_at=now - timedelta(days=1)),
+        ]
+    )
+    await db_session.commit()
+
+    report = await archive_audit_logs(
+        async_sessionmaker(async_engine, expire_on_commit=False),
+        cutoff=now - timedelta(days=settings.audit_retention_days),
+        archive_dir=tmp_path,
+        batch_size=1,
+    )
+    assert report.archived == 2
+    assert len(list(tmp_path.glob(ARCHIVE_GLOB))) == 2
+    remaining = await db_session.execute(select(AuditLog.action))
+    assert remaining.scalars().all() == ["client.updated"]
+
+    starts_at = (now - timedelta(days=600)).isoformat()
+    response = await client.get("/api/audit/", params={"starts_at": starts_at})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["meta"]["total"] == 3
+    assert [item["action"] for item in data["items"]] == ["client.updated", "client.updated", "client.created"]
+    assert data["items"][-1]["user"]["email"] == "test@example.com"
+
+    response = await client.get(
+        "/api/audit/",
+        params={"starts_at": starts_at, "action": "client.created", "page_size": 1},
+    )
+    data = response.json()
+    assert data["meta"]["total"] == 1
+    assert data["items"][0]["action"] == "client.created"
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("a page served from the hot table must not scan the archive")
+
+    monkeypatch.setattr(audit_archive, "scan_archive_page", no_scan)
+    response = await client.get("/api/audit/", params={"page_size": 1})
+    data = response.json()
+    assert data["meta"]["total"] == 3
+    assert [item["action"] for item in data["items"]] == ["client.updated"]
+
+
+@pytest.mark.asyncio
+async def test_recent_archives_are_listed_and_truncated_tails_skipped(
+    client, db_session, async_engine, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), "audit_archive_dir", str(tmp_path))
+    now = datetime.now(UTC)
+    db_session.add_all(
+        [
+            AuditLog(user_id=1, action="client.created", entity="client", created_at=now - timedelta(days=3)),
+            AuditLog(user_id=1, action="client.updated", entity="client", created_at=now - timedelta(days=2)),
+        ]
+    )
+    await db_session.commit()
+
+    # Like run_retention(--older-than-days 1): newer than AUDIT_RETENTION_DAYS.
+    report = await archive_audit_logs(
+        async_sessionmaker(async_engine, expire_on_commit=False),
+        cutoff=now - timedelta(days=1),
+        archive_dir=tmp_path,
+        batch_size=10,
+    )
+    assert report.archived == 2
+
+    # An interrupted run leaves half a gzip member behind.
+    path = sorted(tmp_path.glob(ARCHIVE_GLOB))[-1]
+    with path.open("ab") as handle:
+        handle.write(path.read_bytes()[:10])
+
+    response = await client.get("/api/audit/")
+    data = response.json()
+    assert data["meta"]["total"] == 2
+    assert [item["action"] for item in data["items"]] == ["client.updated", "client.created"]
+
+    response = await client.get("/api/audit/", params={"page": 2, "page_size": 1})
+    assert [item["action"] for item in response.json()["items"]] == ["client.created"]
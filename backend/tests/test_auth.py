@@ -1,4 +1,9 @@
 import pytest
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.security import password_needs_rehash, verify_password
+from app.models.user import User
 
 
 @pytest.mark.asyncio
@@ -22,3 +27,24 @@ async def test_register_and_login(client):
     login_data = login_response.json()
     assert "access_token" in login_data
     assert login_data["token_type"] == "bearer"
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_when_rounds_change(client, db_session, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    payload = {"name": "Bob", "email": "bob@example.com", "password": "hunter22"}
+    await client.post("/api/auth/register", json=payload)
+    user = await db_session.scalar(select(User).where(User.email == payload["email"]))
+    assert user.hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    response = await client.post(
+        "/api/auth/login",
+        json={"email": payload["email"], "password": payload["password"]},
+    )
+    assert response.status_code == 200
+    await db_session.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert verify_password(payload["password"], user.hashed_password)
+    assert not password_needs_rehash(user.hashed_password)
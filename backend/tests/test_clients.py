@@ -1,4 +1,15 @@
+from datetime import timedelta
+
 import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.main import app
+from app.models.client import Client
+from app.models.movement import Movement
+from app.services.client_deletion import ClientDeleteJobs, get_client_delete_jobs
+from app.services.jobs import JobManager, JobStatus
 
 
 @pytest.mark.asyncio
@@ -16,3 +27,92 @@ async def test_create_and_filter_clients(client):
     data = list_response.json()
     assert data["meta"]["total"] >= 1
     assert any(c["email"] == payload["email"] for c in data["items"])
+
+
+async def _client_with_movements(client, email, count):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Cascade Holdings", "email": email, "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    await client.post(
+        "/api/movements/bulk",
+        json={
+            "items": [
+                {"client_id": client_id, "type": "deposit", "amount": "10", "date": "2024-06-01"}
+                for _ in range(count)
+            ]
+        },
+    )
+    return client_id
+
+
+@pytest.mark.asyncio
+async def test_delete_client_relies_on_database_cascade(client, db_session):
+    client_id = await _client_with_movements(client, "cascade@example.com", 3)
+
+    response = await client.delete(f"/api/clients/{client_id}")
+    assert response.status_code == 204
+    # Lookup, dependents count, audit insert and the client DELETE: children are
+    # neither selected nor deleted one by one.
+    assert 'desc="4 queries"' in response.headers["Server-Timing"]
+
+    remaining = await db_session.scalar(select(func.count(Movement.id)).where(Movement.client_id == client_id))
+    assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_large_client_delete_runs_as_batched_job(client, db_session, async_engine, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "delete_background_threshold", 4)
+    jobs = ClientDeleteJobs(
+        JobManager(concurrency=1, ttl=timedelta(minutes=5)),
+        session_factory=async_sessionmaker(async_engine, expire_on_commit=False),
+        batch_size=2,
+    )
+    app.dependency_overrides[get_client_delete_jobs] = lambda: jobs
+    try:
+        client_id = await _client_with_movements(client, "batched@example.com", 5)
+
+        response = await client.delete(f"/api/clients/{client_id}")
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response.json()["total_rows"] == 5
+        assert response.headers["location"].endswith(f"/api/clients/delete-jobs/{job_id}")
+
+        await jobs.manager.join()
+        status_response = await client.get(f"/api/clients/delete-jobs/{job_id}")
+        body = status_response.json()
+        assert body["status"] == JobStatus.succeeded.value
+        assert body["deleted_rows"] == 5
+        assert body["progress"] == 1.0
+    finally:
+        await jobs.manager.shutdown()
+        app.dependency_overrides.pop(get_client_delete_jobs, None)
+
+    db_session.expunge_all()
+    assert await db_session.get(Client, client_id) is None
+    audit = await client.get("/api/audit/", params={"action": "client.deleted"})
+    assert audit.json()["items"][0]["data"]["dependents"] == 5
+
+
+@pytest.mark.asyncio
+async def test_interrupted_client_delete_invalidates_committed_batches(client, db_session, monkeypatch):
+    from app.services import client_deletion
+
+    client_id = await _client_with_movements(client, "interrupted@example.com", 3)
+    owner = await db_session.get(Client, client_id)
+    invalidations = []
+
+    async def record():
+        invalidations.append(True)
+
+    def interrupt(deleted):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(client_deletion, "invalidate_dashboard_metrics", record)
+    with pytest.raises(RuntimeError):
+        await client_deletion.delete_client_in_batches(
+            db_session, owner, user_id=None, batch_size=2, on_batch=interrupt
+        )
+    assert invalidations == [True]
@@ -68,3 +68,59 @@ async def test_dashboard_metrics_endpoint(client):
 
     refresh_response = await client.get("/api/dashboard/metrics", params={"refresh": "true"})
     assert refresh_response.status_code == 200
+
+
+class _RecordingPipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return []
+
+
+class _RecordingRedis:
+    def __init__(self):
+        self.calls = []
+
+    def pipeline(self, transaction=True):
+        return _RecordingPipeline(self.calls)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_seeds_a_missing_data_version(monkeypatch):
+    from app.core import cache
+    from app.services.dashboard_metrics import invalidate_dashboard_metrics
+    from app.services.data_version import DATA_VERSION_KEY
+
+    redis = _RecordingRedis()
+    monkeypatch.setattr(cache, "get_redis_client", lambda: redis)
+    await invalidate_dashboard_metrics()
+
+    names = [name for name, _, _ in redis.calls]
+    assert names == ["delete", "set", "incr"]
+    _, args, kwargs = redis.calls[1]
+    assert args[0] == DATA_VERSION_KEY and kwargs == {"nx": True}
+    assert args[1] > 1_000_000_000
+
+
+@pytest.mark.asyncio
+async def test_dashboard_misses_are_computed_on_the_primary(client):
+    from app.api.deps import get_read_db
+    from app.main import app
+
+    async def _no_replica():
+        raise AssertionError("dashboard metrics must not read from a replica")
+        yield
+
+    app.dependency_overrides[get_read_db] = _no_replica
+    response = await client.get("/api/dashboard/metrics", params={"refresh": "true"})
+    assert response.status_code == 200
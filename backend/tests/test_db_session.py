@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import Settings
+from app.core.metrics import MetricsRegistry
+from app.db import session as db_session_module
+from app.db.session import (
+    USER_ID_KEY,
+    InstrumentedQueuePool,
+    ReplicaRouter,
+    _pool_samples,
+    build_engine_options,
+)
+from app.models import Client
+
+POSTGRES_URL = "postgresql+asyncpg://invest:investpw@db/investdb"
+
+
+def test_engine_options_apply_pool_and_driver_settings():
+    settings = Settings(
+        DB_POOL_SIZE=7,
+        DB_MAX_OVERFLOW=3,
+        DB_POOL_TIMEOUT=2.5,
+        DB_POOL_RECYCLE=600,
+        DB_POOL_PRE_PING=False,
+        DB_STATEMENT_CACHE_SIZE=0,
+        DB_STATEMENT_TIMEOUT_MS=1500,
+    )
+    options = build_engine_options(POSTGRES_URL, settings)
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_timeout"] == 2.5
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "server_settings": {"statement_timeout": "1500"},
+    }
+
+
+def test_engine_options_skip_pool_settings_for_sqlite():
+    options = build_engine_options("sqlite+aiosqlite:///:memory:", Settings())
+    assert "poolclass" not in options
+    assert "connect_args" not in options
+
+
+@pytest.mark.asyncio
+async def test_pool_samples_report_saturation():
+    settings = Settings(DB_POOL_SIZE=2, DB_MAX_OVERFLOW=2)
+    engine = create_async_engine(POSTGRES_URL, **build_engine_options(POSTGRES_URL, settings))
+    try:
+        samples = {labels["state"]: value for labels, value in _pool_samples({"primary": engine}, settings)}
+    finally:
+        await engine.dispose()
+    assert samples["checked_out"] == 0
+    assert samples["saturation"] == 0.0
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("wait_seconds", "Wait time.", labelnames=("pool",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, pool="primary")
+    histogram.observe(0.5, pool="primary")
+    registry.counter("timeouts_total", "Timeouts.").inc()
+
+    text = registry.render()
+    assert 'wait_seconds_bucket{pool="primary",le="0.1"} 1' in text
+    assert 'wait_seconds_bucket{pool="primary",le="+Inf"} 2' in text
+    assert 'wait_seconds_count{pool="primary"} 2' in text
+    assert "timeouts_total 1" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_pool_metrics(client):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in response.text
+
+
+@pytest.mark.asyncio
+async def test_replica_router_balances_and_pins_writers():
+    primary, replica_a, replica_b = object(), object(), object()
+    router = ReplicaRouter(primary, [replica_a, replica_b], pin_seconds=60)
+
+    assert [await router.route(1) for _ in range(3)] == [replica_a, replica_b, replica_a]
+
+    router.pin(1)
+    assert await router.route(1) is primary
+    assert await router.route(2) is replica_b
+
+
+@pytest.mark.asyncio
+async def test_replica_router_without_replicas_uses_primary():
+    primary = object()
+    router = ReplicaRouter(primary, [], pin_seconds=60)
+    router.pin(1)
+    assert await router.route(1) is primary
+    assert not router.is_pinned(1)
+
+
+class _PinStore:
+    def __init__(self):
+        self.keys = {}
+
+    async def set(self, key, value, px):
+        self.keys[key] = px
+
+    async def exists(self, key):
+        return int(key in self.keys)
+
+
+@pytest.mark.asyncio
+async def test_pins_are_shared_between_workers():
+    store = _PinStore()
+    primary, replica = object(), object()
+    writer = ReplicaRouter(primary, [replica], pin_seconds=5, redis=lambda: store)
+    reader = ReplicaRouter(primary, [replica], pin_seconds=5, redis=lambda: store)
+
+    writer.pin(7)
+    await asyncio.gather(*writer._shared_pins)
+    assert store.keys == {"db:pin:7": 5000}
+    assert not reader.is_pinned(7)
+    assert await reader.route(7) is primary
+    assert await reader.route(8) is replica
+
+
+@pytest.mark.asyncio
+async def test_commit_with_writes_pins_user_to_primary(db_session, monkeypatch):
+    router = ReplicaRouter(object(), [object()], pin_seconds=60)
+    monkeypatch.setattr(db_session_module, "replica_router", router)
+
+    db_session.info[USER_ID_KEY] = 42
+    await db_session.commit()
+    assert not router.is_pinned(42)
+
+    db_session.add(Client(name="Pinned", email="pinned@example.com"))
+    await db_session.commit()
+    assert router.is_pinned(42)
+    db_session.info.pop(USER_ID_KEY)
+
+
+@pytest.mark.asyncio
+async def test_replica_dashboard_metrics_are_not_cached(db_session, monkeypatch):
+    from app.services import dashboard_metrics
+
+    stored = []
+
+    async def record(metrics):
+        stored.append(metrics)
+
+    monkeypatch.setattr(dashboard_metrics, "cache_dashboard_metrics", record)
+    db_session.info[db_session_module.REPLICA_KEY] = True
+    try:
+        await dashboard_metrics.get_dashboard_metrics(db_session, use_cache=False)
+    finally:
+        db_session.info.pop(db_session_module.REPLICA_KEY)
+    assert stored == []
+
+    await dashboard_metrics.get_dashboard_metrics(db_session, use_cache=False)
+    assert len(stored) == 1
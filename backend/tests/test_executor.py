@@ -0,0 +1,64 @@
+import asyncio
+import time
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.core.executor import WorkerPool, WorkerPoolBusy, WorkerPoolTimeout
+from app.models.movement import MovementType
+from app.services.dashboard_metrics import compute_dashboard_metrics_from_rows
+
+DATASET = (
+    [True, False],
+    [(1, "PETR4", "Petrobras")],
+    [(1, 1, Decimal("10"), Decimal("15.5"), date(2024, 5, 1))],
+    [(MovementType.deposit, Decimal("500"), date(2024, 5, 3))],
+)
+
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_metrics_from_row_tuples():
+    pool = WorkerPool(kind="process", max_workers=1)
+    try:
+        metrics = await pool.run(compute_dashboard_metrics_from_rows, *DATASET, timeout=60)
+    finally:
+        pool.shutdown()
+
+    expected = compute_dashboard_metrics_from_rows(*DATASET)
+    assert metrics["totals"] == expected["totals"]
+    assert metrics["totals"]["active_clients"] == 1
+    assert metrics["allocation_mix"][0]["label"] == "PETR4 - Petrobras"
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_keeps_its_slot_until_it_finishes():
+    pool = WorkerPool(kind="thread", max_workers=2, max_pending=1, queue_timeout=0.05)
+    try:
+        with pytest.raises(WorkerPoolTimeout):
+            await pool.run(time.sleep, 0.3, timeout=0.05)
+        with pytest.raises(WorkerPoolBusy):
+            await pool.run(sum, [1, 2])
+
+        await asyncio.sleep(0.35)
+        assert await pool.run(sum, [1, 2]) == 3
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_streaming_jobs_overflow_instead_of_failing():
+    pool = WorkerPool(kind="thread", max_workers=1, max_pending=1, queue_timeout=0.05, job_timeout=0.05)
+    try:
+        blocker = asyncio.create_task(pool.run_local(time.sleep, 0.2, timeout=1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(WorkerPoolBusy):
+            await pool.wait_for_capacity()
+
+        # Mid-stream work neither waits for a slot nor times out.
+        assert await pool.run_streaming(sum, [1, 2]) == 3
+        await blocker
+        await pool.wait_for_capacity()
+        assert await pool.run_streaming(time.sleep, 0.1, local=True) is None
+    finally:
+        pool.shutdown()
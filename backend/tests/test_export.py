@@ -0,0 +1,255 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import select
+
+from app.models import Client
+from app.main import app
+from app.schemas.export import ExportFilters
+from app.services import exports
+from app.services.export_cache import ExportCache, get_export_cache
+from app.services.arrow_exports import stream_arrow
+from app.services.exports import DASHBOARD_SHEETS, export_statement, stream_csv
+
+
+@pytest.fixture(autouse=True)
+def export_cache(tmp_path):
+    cache = ExportCache(tmp_path / "export-cache", max_bytes=10 * 1024 * 1024)
+    app.dependency_overrides[get_export_cache] = lambda: cache
+    yield cache
+    app.dependency_overrides.pop(get_export_cache, None)
+
+
+@pytest.mark.asyncio
+async def test_movements_csv_export_streams_rows(client):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Export Capital", "email": "export@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    for day in range(1, 4):
+        await client.post(
+            "/api/movements/",
+            json={"client_id": client_id, "type": "deposit", "amount": "10.50", "date": f"2024-05-0{day}"},
+        )
+
+    response = await client.get("/api/export/movements")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=movements.csv"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["date"] for row in rows] == ["2024-05-01", "2024-05-02", "2024-05-03"]
+    assert rows[0]["type"] == "deposit"
+    assert rows[0]["note"] == ""
+
+
+@pytest.mark.asyncio
+async def test_empty_csv_export_has_header(client):
+    response = await client.get("/api/export/allocations")
+    assert response.status_code == 200
+    assert response.text.strip() == "id,client_id,asset_id,quantity,buy_price,buy_date"
+
+
+@pytest.mark.asyncio
+async def test_stream_csv_flushes_fixed_size_chunks(db_session):
+    for index in range(20):
+        db_session.add(Client(name=f"Chunk {index}", email=f"chunk{index}@example.com", is_active=True))
+    await db_session.commit()
+
+    stmt = select(Client.id, Client.name).order_by(Client.id)
+    chunks = [chunk async for chunk in stream_csv(db_session, stmt, ["id", "name"], yield_per=5, chunk_bytes=64)]
+
+    assert len(chunks) > 2
+    assert all(len(chunk) < 64 + 32 for chunk in chunks)
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "id,name"
+    assert len(lines) == 21
+
+
+@pytest.mark.asyncio
+async def test_dashboard_excel_export_writes_every_sheet(client):
+    asset_response = await client.post(
+        "/api/assets/",
+        json={"ticker": "VALE3", "name": "Vale", "exchange": "B3", "currency": "BRL"},
+    )
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Sheet Investments", "email": "sheet@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    await client.post(
+        "/api/allocations/",
+        json={
+            "client_id": client_id,
+            "asset_id": asset_response.json()["id"],
+            "quantity": 4,
+            "buy_price": 25,
+            "buy_date": "2024-06-10",
+        },
+    )
+    await client.post(
+        "/api/movements/",
+        json={"client_id": client_id, "type": "withdrawal", "amount": "30", "date": "2024-06-12"},
+    )
+
+    response = await client.get("/api/export/dashboard/excel")
+    assert response.status_code == 200
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == list(DASHBOARD_SHEETS)
+    allocations = list(workbook["Alocacoes"].iter_rows(values_only=True))
+    assert allocations[1][1:4] == ("Sheet Investments", "VALE3", "Vale")
+    assert allocations[1][6] == 100
+    movements = list(workbook["Movimentacoes"].iter_rows(values_only=True))
+    assert movements[1][2] == "Retirada"
+    clients = list(workbook["Clientes"].iter_rows(values_only=True))
+    assert clients[1][3:5] == ("Sim", 100)
+    kpis = {row[0]: row[1] for row in workbook["KPIs"].iter_rows(min_row=2, values_only=True)}
+    assert kpis["Total investido"] == 100
+    assert kpis["Saldo liquido"] == -30
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+async def test_movements_columnar_export_keeps_types(client, export_format):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Columnar Fund", "email": f"columnar-{export_format}@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    await client.post(
+        "/api/movements/",
+        json={"client_id": client_id, "type": "deposit", "amount": "1200.5", "date": "2024-08-01"},
+    )
+    await client.post(
+        "/api/movements/",
+        json={"client_id": client_id, "type": "withdrawal", "amount": "200", "date": "2024-08-02", "note": "fee"},
+    )
+
+    response = await client.get("/api/export/movements", params={"format": export_format})
+    assert response.status_code == 200
+
+    if export_format == "parquet":
+        table = pq.read_table(io.BytesIO(response.content))
+    else:
+        table = ipc.open_stream(response.content).read_all()
+    assert table.schema.field("amount").type == pa.decimal128(18, 2)
+    assert table.schema.field("date").type == pa.date32()
+    assert pa.types.is_dictionary(table.schema.field("type").type)
+    rows = table.to_pylist()
+    assert [row["type"] for row in rows] == ["deposit", "withdrawal"]
+    assert rows[0]["amount"] == Decimal("1200.50")
+    assert rows[1]["date"] == date(2024, 8, 2)
+    assert rows[1]["note"] == "fee"
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_groups_cursor_batches_into_row_groups(db_session):
+    for index in range(30):
+        db_session.add(Client(name=f"Group {index}", email=f"group{index}@example.com", is_active=index % 2 == 0))
+    await db_session.commit()
+
+    stmt = export_statement("clients", ExportFilters())
+    data = b"".join([chunk async for chunk in stream_arrow(db_session, stmt, "clients", "parquet", yield_per=4)])
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_rows == 30
+    assert parquet.metadata.num_row_groups == 1
+
+
+@pytest.mark.asyncio
+async def test_incremental_export_resumes_from_watermark(client):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Nightly Sync", "email": "nightly@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+
+    async def add_movement(movement_type: str, day: int) -> None:
+        await client.post(
+            "/api/movements/",
+            json={"client_id": client_id, "type": movement_type, "amount": "5", "date": f"2024-09-{day:02d}"},
+        )
+
+    await add_movement("deposit", 1)
+    await add_movement("withdrawal", 2)
+
+    first = await client.get("/api/export/movements", params={"movement_type": "deposit"})
+    first_rows = list(csv.DictReader(io.StringIO(first.text)))
+    assert [row["type"] for row in first_rows] == ["deposit"]
+    watermark = first.headers["X-Export-Watermark"]
+    assert watermark == first_rows[-1]["id"]
+
+    await add_movement("deposit", 3)
+    await add_movement("deposit", 4)
+
+    second = await client.get(
+        "/api/export/movements",
+        params={"movement_type": "deposit", "since_id": watermark, "start_date": "2024-09-04"},
+    )
+    second_rows = list(csv.DictReader(io.StringIO(second.text)))
+    assert [row["date"] for row in second_rows] == ["2024-09-04"]
+    assert int(second.headers["X-Export-Watermark"]) > int(watermark)
+
+    empty = await client.get("/api/export/movements", params={"since_id": second.headers["X-Export-Watermark"]})
+    assert list(csv.DictReader(io.StringIO(empty.text))) == []
+    assert empty.headers["X-Export-Watermark"] == second.headers["X-Export-Watermark"]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_excel_is_cached_per_data_version(client, export_cache, monkeypatch):
+    first = await client.get("/api/export/dashboard/excel")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("workbook should come from the cache")
+
+    monkeypatch.setattr("app.api.routes.export.build_dashboard_workbook", fail)
+    cached = await client.get("/api/export/dashboard/excel")
+    assert cached.headers["etag"] == etag
+    assert cached.content == first.content
+
+    not_modified = await client.get("/api/export/dashboard/excel", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    monkeypatch.setattr("app.api.routes.export.build_dashboard_workbook", exports.build_dashboard_workbook)
+    await client.post("/api/clients/", json={"name": "Fresh Data", "email": "fresh@example.com", "is_active": True})
+    changed = await client.get("/api/export/dashboard/excel", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(list(export_cache.directory.glob("*.xlsx"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_table_export_revalidates_with_etag(client):
+    first = await client.get("/api/export/clients", params={"is_active": "true"})
+    etag = first.headers["etag"]
+
+    repeat = await client.get("/api/export/clients", params={"is_active": "true"}, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+
+    other_filter = await client.get("/api/export/clients", params={"is_active": "false"}, headers={"If-None-Match": etag})
+    assert other_filter.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_replica_table_export_has_no_etag(client, db_session):
+    from app.db.session import REPLICA_KEY
+
+    etag = (await client.get("/api/export/clients")).headers["etag"]
+    db_session.info[REPLICA_KEY] = True
+    try:
+        response = await client.get("/api/export/clients", headers={"If-None-Match": etag})
+    finally:
+        db_session.info.pop(REPLICA_KEY)
+    assert response.status_code == 200
+    assert "etag" not in response.headers
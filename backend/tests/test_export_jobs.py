@@ -0,0 +1,101 @@
+import csv
+import io
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.deps import get_current_active_user
+from app.main import app
+from app.models import User
+from app.services.export_jobs import ExportJobService, get_export_jobs
+from app.services.jobs import JobManager, JobStatus
+
+
+@pytest.fixture
+async def export_jobs(async_engine, tmp_path):
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    service = ExportJobService(
+        JobManager(concurrency=1, ttl=timedelta(minutes=5)),
+        export_dir=tmp_path,
+        session_factory=session_factory,
+    )
+    app.dependency_overrides[get_export_jobs] = lambda: service
+    yield service
+    await service.manager.shutdown()
+    app.dependency_overrides.pop(get_export_jobs, None)
+
+
+@pytest.mark.asyncio
+async def test_export_job_runs_in_background_and_serves_artifact(client, export_jobs):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Job Partners", "email": "jobs@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    for amount in ("10", "20"):
+        await client.post(
+            "/api/movements/",
+            json={"client_id": client_id, "type": "deposit", "amount": amount, "date": "2024-07-01"},
+        )
+
+    payload = {"kind": "movements", "format": "csv", "filters": {"client_id": client_id}}
+    created = await client.post("/api/export/jobs", json=payload)
+    assert created.status_code == 202
+    job_id = created.json()["id"]
+    assert created.headers["location"].endswith(f"/api/export/jobs/{job_id}")
+
+    duplicate = await client.post("/api/export/jobs", json=payload)
+    assert duplicate.json()["id"] == job_id
+
+    await export_jobs.manager.join()
+    status_response = await client.get(f"/api/export/jobs/{job_id}")
+    body = status_response.json()
+    assert body["status"] == JobStatus.succeeded.value
+    assert body["progress"] == 1.0
+    assert body["processed_rows"] == body["total_rows"] == 2
+    assert body["watermark"] is not None
+    assert body["download_url"].endswith(f"/api/export/jobs/{job_id}/download")
+
+    download = await client.get(f"/api/export/jobs/{job_id}/download")
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(download.text)))
+    assert [row["amount"] for row in rows] == ["10.00", "20.00"]
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_are_only_visible_to_their_owner(client, export_jobs):
+    created = await client.post("/api/export/jobs", json={"kind": "clients", "format": "csv"})
+    job_id = created.json()["id"]
+    await export_jobs.manager.join()
+
+    other = User(id=2, name="Other", email="other@example.com", hashed_password="", is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: other
+    assert (await client.get(f"/api/export/jobs/{job_id}")).status_code == 404
+    assert (await client.get(f"/api/export/jobs/{job_id}/download")).status_code == 404
+    own = await client.post("/api/export/jobs", json={"kind": "clients", "format": "csv"})
+    assert own.json()["id"] != job_id
+    await export_jobs.manager.join()
+
+
+@pytest.mark.asyncio
+async def test_expired_export_jobs_drop_their_artifacts(client, export_jobs):
+    created = await client.post("/api/export/jobs", json={"kind": "dashboard", "format": "xlsx"})
+    job_id = created.json()["id"]
+    await export_jobs.manager.join()
+
+    job = export_jobs.get(job_id)
+    assert job.status == JobStatus.succeeded
+    artifact = job.artifact
+    assert artifact.exists()
+
+    export_jobs.manager.expire(datetime.now(UTC) + timedelta(minutes=10))
+    assert not artifact.exists()
+    assert (await client.get(f"/api/export/jobs/{job_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export_job_rejects_unsupported_format(client, export_jobs):
+    response = await client.post("/api/export/jobs", json={"kind": "dashboard", "format": "csv"})
+    assert response.status_code == 422
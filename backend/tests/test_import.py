@@ -0,0 +1,155 @@
+import csv
+from datetime import timedelta
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.main import app
+from app.services.import_jobs import ImportJobService, get_import_jobs
+from app.services.importer import run_import
+from app.services.jobs import JobManager, JobStatus
+
+
+@pytest.fixture
+async def import_jobs(async_engine, tmp_path):
+    service = ImportJobService(
+        JobManager(concurrency=1, ttl=timedelta(minutes=5)),
+        import_dir=tmp_path,
+        session_factory=async_sessionmaker(async_engine, expire_on_commit=False),
+        max_bytes=1024 * 1024,
+    )
+    app.dependency_overrides[get_import_jobs] = lambda: service
+    yield service
+    await service.manager.shutdown()
+    app.dependency_overrides.pop(get_import_jobs, None)
+
+
+@pytest.mark.asyncio
+async def test_movement_import_loads_valid_rows_and_reports_rejects(client, import_jobs):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Import Partners", "email": "import@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    body = "\n".join(
+        [
+            "client_email,client_id,type,amount,date,note",
+            "import@example.com,,deposit,100.50,2024-08-01,first",
+            f",{client_id},withdrawal,20,2024-08-02,",
+            "import@example.com,,deposit,abc,2024-08-03,malformed",
+            "missing@example.com,,deposit,10,2024-08-04,unknown",
+        ]
+    )
+
+    created = await client.post(
+        "/api/import/movements",
+        params={"format": "csv"},
+        content=body.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert created.status_code == 202
+    job_id = created.json()["id"]
+    assert created.headers["location"].endswith(f"/api/import/jobs/{job_id}")
+
+    await import_jobs.manager.join()
+    status_response = await client.get(f"/api/import/jobs/{job_id}")
+    status_body = status_response.json()
+    assert status_body["status"] == JobStatus.succeeded.value
+    assert status_body["processed_rows"] == status_body["total_rows"] == 4
+    assert status_body["imported_rows"] == 2
+    assert status_body["rejected_rows"] == 2
+    assert status_body["rejects_url"].endswith(f"/api/import/jobs/{job_id}/rejects")
+
+    rejects = await client.get(f"/api/import/jobs/{job_id}/rejects")
+    assert rejects.status_code == 200
+    rows = list(csv.DictReader(rejects.text.splitlines()))
+    assert [row["line"] for row in rows] == ["4", "5"]
+    assert "amount" in rows[0]["errors"]
+    assert "missing@example.com not found" in rows[1]["errors"]
+
+    movements = await client.get("/api/movements/", params={"client_id": client_id})
+    assert sorted(item["amount"] for item in movements.json()["items"]) == ["100.50", "20.00"]
+
+    audit = await client.get("/api/audit/", params={"action": "movement.imported"})
+    entries = audit.json()["items"]
+    assert len(entries) == 1
+    assert entries[0]["data"]["imported"] == 2
+    assert entries[0]["data"]["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_allocation_import_reads_xlsx_in_chunks(client, async_engine, tmp_path):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Sheet Holder", "email": "sheet@example.com", "is_active": True},
+    )
+    await client.post(
+        "/api/assets/",
+        json={"ticker": "IMPT3", "name": "Import SA", "exchange": "B3", "currency": "BRL"},
+    )
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["client_email", "ticker", "quantity", "buy_price", "buy_date"])
+    for quantity in range(1, 6):
+        sheet.append(["sheet@example.com", "impt3", quantity, 12.5, "2024-08-01"])
+    sheet.append(["sheet@example.com", "NOPE3", 1, 1, "2024-08-01"])
+    path = tmp_path / "allocations.xlsx"
+    workbook.save(path)
+
+    progress = []
+    report = await run_import(
+        async_sessionmaker(async_engine, expire_on_commit=False),
+        "allocations",
+        path,
+        "xlsx",
+        user_id=None,
+        rejects_path=tmp_path / "allocations.rejects.csv",
+        chunk_size=2,
+        on_progress=lambda current: progress.append(current.processed),
+    )
+    assert (report.imported, report.rejected, report.chunks) == (5, 1, 3)
+    assert progress == [2, 4, 6]
+    rejects = list(csv.DictReader(report.rejects_path.read_text().splitlines()))
+    assert [(row["line"], row["errors"]) for row in rejects] == [("7", "ticker: NOPE3 not found")]
+
+    allocations = await client.get(
+        "/api/allocations/", params={"client_id": client_response.json()["id"]}
+    )
+    assert allocations.json()["meta"]["total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_import_still_invalidates_committed_chunks(client, async_engine, tmp_path, monkeypatch):
+    from app.services import importer
+
+    await client.post(
+        "/api/clients/",
+        json={"name": "Partial Holder", "email": "partial@example.com", "is_active": True},
+    )
+    path = tmp_path / "movements.csv"
+    path.write_text(
+        "client_email,type,amount,date\n"
+        + "".join(f"partial@example.com,deposit,{amount},2024-08-01\n" for amount in range(1, 5))
+    )
+    invalidations = []
+
+    async def record():
+        invalidations.append(True)
+
+    def interrupt(report):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(importer, "invalidate_dashboard_metrics", record)
+    with pytest.raises(RuntimeError):
+        await run_import(
+            async_sessionmaker(async_engine, expire_on_commit=False),
+            "movements",
+            path,
+            "csv",
+            user_id=None,
+            rejects_path=tmp_path / "movements.rejects.csv",
+            chunk_size=2,
+            on_progress=interrupt,
+        )
+    assert invalidations == [True]
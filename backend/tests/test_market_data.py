@@ -1,7 +1,7 @@
 import pytest
 
 from app.core.config import get_settings
-from app.services.yahoo_finance import MarketDataService
+from app.services.yahoo_finance import UPSTREAM_SECONDS, MarketDataService
 
 
 @pytest.mark.asyncio
@@ -57,8 +57,10 @@ async def test_market_data_service_caches_new_quote(monkeypatch):
         fake_brapi_fetch,
     )
 
+    upstream_calls = UPSTREAM_SECONDS.count(provider="yahoo", outcome="ok")
     result = await service.fetch_quote("petr4")
     assert result["symbol"] == "PETR4"
+    assert UPSTREAM_SECONDS.count(provider="yahoo", outcome="ok") == upstream_calls + 1
     assert stored["get_key"] == "market:quote:PETR4"
     cache_record = stored["set"]
     assert cache_record["key"] == "market:quote:PETR4"
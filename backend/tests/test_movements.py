@@ -1,5 +1,17 @@
+import asyncio
+
 import pytest
 
+from app.core.config import get_settings
+from app.main import app
+from app.services.idempotency import (
+    IdempotencyInProgress,
+    IdempotentReplay,
+    MemoryIdempotencyStore,
+    begin_idempotent_request,
+    get_idempotency_store,
+)
+
 
 @pytest.mark.asyncio
 async def test_create_movement(client):
@@ -23,3 +35,148 @@ async def test_create_movement(client):
     data = list_response.json()
     assert data["meta"]["total"] == 1
     assert len(data["items"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_movements_reports_row_errors(client):
+    client_response = await client.post(
+        "/api/clients/",
+        json={"name": "Bulk Owner", "email": "bulk@example.com", "is_active": True},
+    )
+    client_id = client_response.json()["id"]
+    items = [
+        {"client_id": client_id, "type": "deposit", "amount": "100", "date": "2024-03-01"},
+        {"client_id": client_id, "type": "bonus", "amount": "5", "date": "2024-03-02"},
+        {"client_id": 999_999, "type": "withdrawal", "amount": "10", "date": "2024-03-03"},
+        {"client_id": client_id, "type": "withdrawal", "amount": "40", "date": "2024-03-04"},
+    ]
+
+    atomic = await client.post("/api/movements/bulk", json={"items": items, "atomic": True})
+    assert atomic.status_code == 422
+    assert [error["index"] for error in atomic.json()["detail"]] == [1, 2]
+    listed = await client.get("/api/movements/", params={"client_id": client_id})
+    assert listed.json()["meta"]["total"] == 0
+
+    response = await client.post("/api/movements/bulk", json={"items": items})
+    assert response.status_code == 201
+    body = response.json()
+    assert [item["amount"] for item in body["created"]] == ["100.00", "40.00"]
+    assert body["created"][0]["id"] < body["created"][1]["id"]
+    assert body["errors"][0]["errors"][0].startswith("type:")
+    assert body["errors"][1]["errors"] == ["client_id: 999999 does not exist"]
+
+    audit = await client.get("/api/audit/", params={"action": "movement.bulk_created"})
+    entries = audit.json()["items"]
+    assert len(entries) == 1
+    assert entries[0]["data"]["count"] == 2
+
+    rejected = await client.post("/api/movements/bulk", json={"items": items[1:3]})
+    assert rejected.status_code == 422
+    assert [error["index"] for error in rejected.json()["detail"]] == [0, 1]
+
+
+@pytest.fixture
+def idempotency_store():
+    store = MemoryIdempotencyStore()
+    app.dependency_overrides[get_idempotency_store] = lambda: store
+    yield store
+    app.dependency_overrides.pop(get_idempotency_store, None)
+
+
+async def _movement_client(client, email):
+    response = await client.post(
+        "/api/clients/",
+        json={"name": "Retry Capital", "email": email, "is_active": True},
+    )
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_replays_the_first_response(client, idempotency_store):
+    client_id = await _movement_client(client, "retry@example.com")
+    payload = {"client_id": client_id, "type": "deposit", "amount": "250", "date": "2024-05-01"}
+    headers = {"Idempotency-Key": "deposit-0001"}
+
+    first = await client.post("/api/movements/", json=payload, headers=headers)
+    retry = await client.post("/api/movements/", json=payload, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+    listing = await client.get("/api/movements/", params={"client_id": client_id})
+    assert listing.json()["meta"]["total"] == 1
+
+    reused = await client.post("/api/movements/", json={**payload, "amount": "999"}, headers=headers)
+    assert reused.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_waits_for_the_first_request(client, idempotency_store):
+    client_id = await _movement_client(client, "concurrent@example.com")
+    payload = {"client_id": client_id, "type": "deposit", "amount": "75", "date": "2024-05-02"}
+    headers = {"Idempotency-Key": "deposit-0002"}
+
+    first, second = await asyncio.gather(
+        client.post("/api/movements/", json=payload, headers=headers),
+        client.post("/api/movements/", json=payload, headers=headers),
+    )
+    assert first.status_code == second.status_code == 201
+    assert first.json()["id"] == second.json()["id"]
+
+    listing = await client.get("/api/movements/", params={"client_id": client_id})
+    assert listing.json()["meta"]["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_request_releases_its_idempotency_key(client, idempotency_store):
+    client_id = await _movement_client(client, "release@example.com")
+    headers = {"Idempotency-Key": "bulk-0001"}
+    rows = [{"client_id": client_id, "type": "deposit", "amount": "10", "date": "2024-05-03"}]
+
+    failed = await client.post(
+        "/api/movements/bulk",
+        json={
+            "items": [*rows, {"client_id": 999999, "type": "deposit", "amount": "1", "date": "2024-05-03"}],
+            "atomic": True,
+        },
+        headers=headers,
+    )
+    assert failed.status_code == 422
+
+    retried = await client.post("/api/movements/bulk", json={"items": rows, "atomic": True}, headers=headers)
+    assert retried.status_code == 201
+    assert len(retried.json()["created"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_slow_requests_reserved(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "idempotency_lock_seconds", 0.15)
+    monkeypatch.setattr(settings, "idempotency_wait_seconds", 0)
+    store = MemoryIdempotencyStore()
+
+    first = await begin_idempotent_request(store, "key", "fingerprint")
+    await asyncio.sleep(0.4)
+    with pytest.raises(IdempotencyInProgress):
+        await begin_idempotent_request(store, "key", "fingerprint")
+
+    await first.save(201, {"id": 1})
+    assert first.completed
+    with pytest.raises(IdempotentReplay):
+        await begin_idempotent_request(store, "key", "fingerprint")
+
+
+@pytest.mark.asyncio
+async def test_save_does_not_overwrite_a_lost_reservation(monkeypatch):
+    store = MemoryIdempotencyStore()
+    first = await begin_idempotent_request(store, "key", "fingerprint")
+    await first._stop_heartbeat()
+    await store.release("key", first.token)
+    second = await begin_idempotent_request(store, "key", "fingerprint")
+
+    await first.save(201, {"id": 1})
+    assert not first.completed
+    await first.release()
+    assert await store.reserve("key", "other", 10) == second.token
+    await second.release()
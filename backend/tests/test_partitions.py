@@ -0,0 +1,75 @@
+from datetime import date
+
+from app.db.partitions import (
+    add_months,
+    create_partition_sql,
+    default_overlap_sql,
+    parse_partition_month,
+    plan_partition_maintenance,
+    split_default_partition_sql,
+)
+
+
+def test_add_months_rolls_over_years():
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+
+def test_create_partition_sql_uses_month_bounds():
+    assert create_partition_sql("movements", date(2024, 12, 15)) == (
+        "CREATE TABLE IF NOT EXISTS movements_p2024_12 PARTITION OF movements "
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    )
+    assert "FROM ('2024-12-01 00:00:00+00') TO ('2025-01-01 00:00:00+00')" in create_partition_sql(
+        "audit_logs", date(2024, 12, 1)
+    )
+
+
+def test_split_default_partition_moves_rows_while_default_is_detached():
+    statements = split_default_partition_sql("movements", date(2024, 7, 9))
+    assert statements[0] == "ALTER TABLE movements DETACH PARTITION movements_default"
+    assert statements[1] == create_partition_sql("movements", date(2024, 7, 1))
+    condition = "date >= '2024-07-01' AND date < '2024-08-01'"
+    assert statements[2] == f"INSERT INTO movements SELECT * FROM movements_default WHERE {condition}"
+    assert statements[3] == f"DELETE FROM movements_default WHERE {condition}"
+    assert statements[4] == "ALTER TABLE movements ATTACH PARTITION movements_default DEFAULT"
+    assert default_overlap_sql("movements", date(2024, 7, 9)) == (
+        f"SELECT 1 FROM movements_default WHERE {condition} LIMIT 1"
+    )
+
+
+def test_parse_partition_month_ignores_other_tables():
+    assert parse_partition_month("movements", "movements_p2024_03") == date(2024, 3, 1)
+    assert parse_partition_month("movements", "movements_default") is None
+    assert parse_partition_month("audit_logs", "movements_p2024_03") is None
+
+
+def test_plan_creates_missing_months_and_detaches_expired():
+    existing = [
+        "audit_logs_default",
+        "audit_logs_p2023_12",
+        "audit_logs_p2024_01",
+        "audit_logs_p2024_05",
+        "audit_logs_p2024_06",
+    ]
+    plan = plan_partition_maintenance(
+        "audit_logs",
+        existing,
+        today=date(2024, 6, 20),
+        months_ahead=2,
+        retain_months=4,
+    )
+    assert plan.create == [date(2024, 7, 1), date(2024, 8, 1)]
+    assert plan.detach == ["audit_logs_p2023_12", "audit_logs_p2024_01"]
+
+
+def test_plan_keeps_everything_without_retention():
+    plan = plan_partition_maintenance(
+        "movements",
+        ["movements_p2020_01"],
+        today=date(2024, 6, 1),
+        months_ahead=0,
+        retain_months=0,
+    )
+    assert plan.create == [date(2024, 6, 1)]
+    assert plan.detach == []
@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+
+from app.api.deps import get_current_active_user
+from app.core import profiling
+from app.core.config import get_settings
+from app.core.profiling import FrameTable, SamplingProfiler, SlowestProfiles
+from app.core.security import create_access_token
+from app.main import app
+from app.middleware.profiling import ProfilingMiddleware
+from app.models import User
+from app.services.principals import clear_local_principals
+
+
+def _busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampling_profiler_records_the_running_stack():
+    table = FrameTable()
+    profiler = SamplingProfiler(table, interval=0.001)
+    profiler.start()
+    _busy_loop(0.05)
+    profiler.stop()
+
+    profile = profiler.profiles()[0]
+    assert profile["samples"]
+    names = {table.frames[index]["name"] for stack in profile["samples"] for index in stack}
+    assert "_busy_loop" in names
+    assert sum(profile["weights"]) == pytest.approx(profiler.elapsed, abs=0.02)
+
+
+@pytest.fixture
+def authenticated(client, db_session, monkeypatch):
+    # Run the real get_current_user so profiles depend on actual authentication.
+    app.dependency_overrides.pop(get_current_active_user, None)
+    monkeypatch.setattr(get_settings(), "profiling_admin_ids", "1")
+    clear_local_principals()
+    yield
+    clear_local_principals()
+
+
+@pytest.mark.asyncio
+async def test_admin_gets_speedscope_profile_instead_of_response(client, authenticated):
+    headers = {"Authorization": f"Bearer {create_access_token(1)}", "X-Profile": "1"}
+
+    response = await client.get("/api/clients/", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert ".speedscope.json" in response.headers["Content-Disposition"]
+    document = response.json()
+    assert document["$schema"] == profiling.SPEEDSCOPE_SCHEMA
+    units = {item["unit"] for item in document["profiles"]}
+    assert units == {"seconds", "bytes"}
+
+    other = {"Authorization": f"Bearer {create_access_token(2)}"}
+    plain = await client.get("/api/clients/?profile=1", headers=other)
+    assert "X-Profiled-Status" not in plain.headers
+    assert plain.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_inactive_admin_gets_the_real_response(client, db_session, authenticated):
+    user = await db_session.get(User, 1)
+    user.is_active = False
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(1)}", "X-Profile": "1"}
+    response = await client.get("/api/clients/", headers=headers)
+    assert response.status_code == 401
+    assert "X-Profiled-Status" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_busy_profiler_rejects_explicit_requests(client, authenticated, monkeypatch):
+    middleware = next(m for m in _middleware_stack(app) if isinstance(m, ProfilingMiddleware))
+    monkeypatch.setattr(middleware, "_busy", True)
+
+    headers = {"Authorization": f"Bearer {create_access_token(1)}", "X-Profile": "1"}
+    response = await client.get("/api/clients/", headers=headers)
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+
+
+def _middleware_stack(asgi_app):
+    layer = asgi_app.middleware_stack
+    while layer is not None:
+        yield layer
+        layer = getattr(layer, "app", None)
+
+
+@pytest.mark.asyncio
+async def test_sampled_mode_keeps_only_the_slowest_profiles(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(get_settings(), "profiling_sample_rate", 1.0)
+    monkeypatch.setattr(profiling, "_slowest", SlowestProfiles(tmp_path, keep=2))
+
+    for _ in range(4):
+        response = await client.get("/api/clients/")
+        assert response.status_code == 200
+
+    files = sorted(tmp_path.glob("*.speedscope.json"))
+    assert len(files) == 2
+    assert json.loads(files[0].read_text())["name"] == "GET /api/clients/"
+    assert len(SlowestProfiles(tmp_path, keep=1).files()) == 1
+    assert len(list(tmp_path.glob("*.speedscope.json"))) == 1
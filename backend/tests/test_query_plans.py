@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select, text
+
+from app.models import Allocation, AuditLog, Movement, MovementType
+
+
+async def _query_plan(db_session, stmt) -> str:
+    compiled = stmt.compile(
+        dialect=db_session.bind.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    result = await db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+    return "\n".join(str(row[-1]) for row in result.all())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("stmt", "index_name"),
+    [
+        (
+            select(Allocation)
+            .where(Allocation.client_id == 1)
+            .order_by(Allocation.buy_date.desc(), Allocation.id.desc()),
+            "ix_allocations_client_id_buy_date",
+        ),
+        (
+            select(Allocation)
+            .where(Allocation.asset_id == 1)
+            .order_by(Allocation.buy_date.desc(), Allocation.id.desc()),
+            "ix_allocations_asset_id_buy_date",
+        ),
+        (
+            select(Movement)
+            .where(Movement.client_id == 1, Movement.date >= "2024-01-01")
+            .order_by(Movement.date.desc(), Movement.id.desc()),
+            "ix_movements_client_id_date",
+        ),
+        (
+            select(Movement)
+            .where(Movement.type == MovementType.deposit)
+            .order_by(Movement.date.desc(), Movement.id.desc()),
+            "ix_movements_type_date",
+        ),
+        (
+            select(AuditLog)
+            .where(AuditLog.action == "client.created")
+            .order_by(AuditLog.created_at.desc(), AuditLog.id.desc()),
+            "ix_audit_logs_action_created_at",
+        ),
+        (
+            select(AuditLog)
+            .where(AuditLog.user_id == 1)
+            .order_by(AuditLog.created_at.desc(), AuditLog.id.desc()),
+            "ix_audit_logs_user_id_created_at",
+        ),
+    ],
+)
+async def test_list_queries_use_composite_indexes(db_session, stmt, index_name):
+    plan = await _query_plan(db_session, stmt)
+    assert index_name in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,167 @@
+import json
+import logging
+import re
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.deps import get_current_active_user
+from app.core.config import get_settings
+from app.core.security import create_access_token
+from app.db.instrumentation import (
+    _QUERY_START_KEY,
+    QueryBudgetExceeded,
+    RequestQueryStats,
+    begin_request_stats,
+    end_request_stats,
+    statement_shape,
+)
+from app.db.session import get_db
+from app.main import app
+from app.services import dashboard_metrics
+from app.services.principals import clear_local_principals
+
+
+@pytest.mark.asyncio
+async def test_server_timing_reports_request_queries(client):
+    response = await client.get("/api/clients/")
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    assert 'desc="2 queries"' in server_timing
+    assert "db-slowest;dur=" in server_timing
+    assert "X-Query-Warnings" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_streamed_export_queries_are_logged_after_the_headers(client, caplog):
+    await client.post(
+        "/api/clients/",
+        json={"name": "Streamed", "email": "streamed@example.com", "is_active": True},
+    )
+    with caplog.at_level(logging.INFO, logger="app.sql"):
+        response = await client.get("/api/export/clients")
+    assert response.status_code == 200
+    assert "Streamed" in response.text
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["path"] == "/api/export/clients"
+    header_queries = int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+    assert record["queries_after_headers"] >= 1
+    assert record["queries"] == header_queries + record["queries_after_headers"]
+
+
+@pytest.mark.asyncio
+async def test_query_budget_violation_is_flagged(client, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "sql_detection_enabled", True)
+    monkeypatch.setattr(settings, "sql_query_budget", 1)
+
+    response = await client.get("/api/clients/")
+    assert response.status_code == 200
+    assert response.headers["X-Query-Warnings"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_query_budget_violation_raises_in_strict_mode(client, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "sql_detection_enabled", True)
+    monkeypatch.setattr(settings, "sql_detection_raise", True)
+    monkeypatch.setattr(settings, "sql_query_budget", 1)
+
+    with pytest.raises(QueryBudgetExceeded):
+        await client.get("/api/clients/")
+
+
+def test_repeated_statement_shapes_are_detected():
+    stats = RequestQueryStats(repeat_threshold=2)
+    for _ in range(3):
+        stats.record("SELECT * FROM users WHERE users.id = ?", 0.001)
+    stats.record("SELECT * FROM clients", 0.002)
+
+    violations = stats.violations()
+    assert len(violations) == 1
+    assert "repeated 3 times" in violations[0]
+    assert stats.slowest_statement == "SELECT * FROM clients"
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN ($1, $2)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+@pytest.mark.asyncio
+async def test_create_writes_row_and_audit_without_refresh(client):
+    response = await client.post(
+        "/api/clients/",
+        json={"name": "Round Trip", "email": "round-trip@example.com", "is_active": True},
+    )
+    assert response.status_code == 201
+    assert response.json()["created_at"] is not None
+    # INSERT ... RETURNING for the client plus the audit INSERT; no SELECT afterwards.
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
+
+
+@pytest.mark.asyncio
+async def test_cache_served_dashboard_checks_out_no_connection(client, async_engine, monkeypatch):
+    # Real authentication (get_current_user and the principal cache) and a fresh
+    # session per request, as in production, instead of the conftest overrides;
+    # the shared test session would keep its connection checked out.
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def fresh_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides.pop(get_current_active_user, None)
+    app.dependency_overrides[get_db] = fresh_session
+    clear_local_principals()
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+    cold = await client.get("/api/dashboard/metrics", headers=headers)
+    assert cold.status_code == 200
+    # Authentication and the dashboard query share the request's primary session.
+    assert 'db-checkouts;desc="1"' in cold.headers["Server-Timing"]
+
+    async def cached(_key):
+        return cold.json()
+
+    monkeypatch.setattr(dashboard_metrics, "redis_get_json", cached)
+    warm = await client.get("/api/dashboard/metrics", headers=headers)
+    assert warm.status_code == 200
+    assert warm.json() == cold.json()
+    assert 'desc="0 queries"' in warm.headers["Server-Timing"]
+    assert 'db-checkouts;desc="0"' in warm.headers["Server-Timing"]
+    clear_local_principals()
+
+
+@pytest.mark.asyncio
+async def test_pool_checkouts_are_counted_on_first_statement(async_engine):
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    stats = RequestQueryStats()
+    token = begin_request_stats(stats)
+    try:
+        async with session_factory() as session:
+            assert stats.checkouts == 0
+            await session.execute(select(1))
+            await session.execute(select(1))
+    finally:
+        end_request_stats(token)
+    assert stats.checkouts == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_do_not_leak_start_times(async_engine):
+    stats = RequestQueryStats()
+    token = begin_request_stats(stats)
+    try:
+        async with async_engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(select(1))
+            assert not conn.sync_connection.info.get(_QUERY_START_KEY)
+    finally:
+        end_request_stats(token)
+    assert stats.count == 4
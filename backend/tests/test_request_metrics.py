@@ -0,0 +1,34 @@
+import pytest
+
+from app.middleware.request_metrics import HTTP_DURATION, HTTP_IN_FLIGHT, HTTP_RESPONSE_SIZE
+
+
+@pytest.mark.asyncio
+async def test_requests_are_recorded_by_route_template(client):
+    labels = {"method": "GET", "route": "/api/clients/{client_id}", "status": "404"}
+    before = HTTP_DURATION.count(**labels)
+
+    response = await client.get("/api/clients/987654")
+    assert response.status_code == 404
+
+    assert HTTP_DURATION.count(**labels) == before + 1
+    assert HTTP_RESPONSE_SIZE.sum(method="GET", route="/api/clients/{client_id}") >= len(response.content)
+    assert HTTP_IN_FLIGHT.value() == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_paths_share_one_label(client):
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = HTTP_DURATION.count(**labels)
+    await client.get("/does-not-exist/123")
+    await client.get("/does-not-exist/456")
+    assert HTTP_DURATION.count(**labels) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_request_and_cache_metrics(client):
+    await client.get("/api/dashboard/metrics")
+    body = (await client.get("/metrics")).text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/dashboard/metrics"' in body
+    assert "http_requests_in_flight" in body
+    assert 'cache_lookups_total{cache="dashboard"' in body
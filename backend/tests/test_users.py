@@ -1,4 +1,10 @@
 import pytest
+from fastapi import HTTPException, Request
+
+from app.api.deps import get_current_user
+from app.core.security import create_access_token
+from app.db.instrumentation import RequestQueryStats, begin_request_stats, end_request_stats
+from app.services.principals import clear_local_principals
 
 
 @pytest.mark.asyncio
@@ -18,3 +24,37 @@ async def test_create_and_list_users(client):
     data = list_response.json()
     assert data["meta"]["total"] >= 1
     assert any(user["email"] == payload["email"] for user in data["items"])
+
+
+@pytest.fixture
+def principal_cache():
+    clear_local_principals()
+    yield
+    clear_local_principals()
+
+
+@pytest.mark.asyncio
+async def test_authenticated_principal_is_cached_until_user_changes(client, db_session, principal_cache):
+    create_response = await client.post(
+        "/api/users/",
+        json={"name": "Cached", "email": "cached@example.com", "password": "secret"},
+    )
+    user_id = create_response.json()["id"]
+    token = create_access_token(user_id)
+
+    stats = RequestQueryStats()
+    token_ref = begin_request_stats(stats)
+    try:
+        first = await get_current_user(Request({"type": "http"}), token=token, session=db_session)
+        second = await get_current_user(Request({"type": "http"}), token=token, session=db_session)
+    finally:
+        end_request_stats(token_ref)
+    assert first.id == second.id == user_id
+    assert second.email == "cached@example.com"
+    assert stats.count == 1
+
+    update_response = await client.put(f"/api/users/{user_id}", json={"is_active": False})
+    assert update_response.status_code == 200
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(Request({"type": "http"}), token=token, session=db_session)
+    assert exc_info.value.status_code == 401